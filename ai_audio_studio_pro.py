@@ -101,6 +101,7 @@ import webbrowser # [NEW] 링크 열기용
 BASIC_PITCH_AVAILABLE = True # Assume available, handle errors during local import
 from pydub import AudioSegment, effects
 import numpy as np
+import soundfile as sf
 import ctypes
 import io
 
@@ -111,6 +112,41 @@ from chord_remover import ChordRemover
 from voice_trainer import RealVoiceTrainer
 from training_scripts import TRAINING_SCRIPTS
 
+# [NEW] 분리 결과 캐시 (같은 곡 재실행 시 Demucs 생략)
+from stem_cache import StemCache
+
+# [NEW] 폴더 단위 일괄 분리 큐
+from batch_separator import discover_audio_files
+
+# [NEW] 분리 진행 이벤트 표시 / 실행별 성능 기록
+from perf_records import PERF_LOG_NAME
+from subprocess_utils import hidden_startupinfo
+
+# [NEW] 작업별 격리 임시 폴더 (동시 작업 간 파일 충돌 방지)
+from workspace import purge_stale
+
+# [NEW] 분리 없이 바뀐 단계만 다시 렌더링하는 리믹스 세션 (스템 FX → 합산 → 마스터)
+from remix_session import PREVIEW_SECONDS
+PREVIEW_DEBOUNCE_MS = 120  # 슬라이더 드래그 중 미리듣기 요청을 모으는 간격
+
+# [NEW] CPU 전용 환경에서 곡 하나를 여러 분리 서버에 나눠 처리
+from sharded_separator import recommended_shard_workers
+
+# [NEW] 분리 엔진 종류 (float / int8 CPU 양자화)
+from quantized_engine import ENGINE_FLOAT, ENGINE_INT8
+
+# [NEW] 분리 → FX → 마스터 → 저장 파이프라인 (GUI / 헤드리스 CLI 공용)
+from mix_pipeline import MixPipeline, clean_name
+
+# [NEW] 상주 MIDI 변환 서버 클라이언트 (basic-pitch 모델을 한 번만 로딩)
+from transcription_worker import get_shared_transcription_worker, TranscriptionWorkerError
+
+# [NEW] 스템 병렬 MIDI + 악보 변환 풀 (코어 수 / 가용 메모리로 워커 수 결정)
+from midi_batch import MidiBatchConverter, recommended_midi_pool_size
+
+# [NEW] 스템별 MIDI 변환 엔진 선택지 (midi_engine.BACKENDS 이름, auto = basic-pitch → librosa 예비 경로)
+MIDI_BACKENDS = ["auto", "basic-pitch", "librosa"]
+
 # [NEW] Official RVC Engine Integration
 try:
     from official_rvc_converter import OfficialRVCConverter
@@ -154,6 +190,12 @@ try:
 except ImportError:
     LIBROSA_AVAILABLE = False
 
+# [NEW] 믹서 미리듣기 재생 (Windows 표준 라이브러리, 없으면 파형 표시만)
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
 # [기본 경로 설정] 실행 파일 또는 스크립트 위치 기준
 if getattr(sys, 'frozen', False):
     base_dir = os.path.dirname(sys.executable)
@@ -188,128 +230,27 @@ OUTPUT_DIR = os.path.join(base_dir, "output_result")
 TEMP_DIR = os.path.join(base_dir, "temp_work")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
+# [NEW] 작업은 TEMP_DIR 아래 각자의 JobWorkspace 폴더를 사용 (이전 실행이 남긴 폴더만 정리)
+purge_stale(TEMP_DIR)
 
-def clean_name(name):
-    # [수정] 한글 및 공백 등을 보존하면서 윈도우 예약 문자만 제거
-    name = os.path.splitext(os.path.basename(name))[0]
-    # 윈도우에서 금지된 문자들: \ / : * ? " < > |
-    name = re.sub(r'[\\/:*?"<>|]', '', name)
-    # 양끝 공백 제거 및 마침표 제거 (시스템 예약어 방지용)
-    return name.strip().rstrip('.') or "song"
-
-def separate(file_path, use_gpu, mode, progress_callback):
-    """
-    Demucs AI 분리 실행 (실시간 진행률 파싱 포함)
-    """
-    model_name = "htdemucs_ft" if mode == "2-Stem" else "htdemucs_6s"
-    str_mode = "Standard 2-Stem" if mode == "2-Stem" else "Pro 6-Stem"
-    
-    progress_callback(f"AI Engine Starting... ({mode})", 0.05)
-    
-    progress_callback(f"AI Engine Starting... ({mode})", 0.05)
-    
-    # [수정] 실행 환경에 따른 명령어 분기 처리 (Frozen vs Script)
-    if getattr(sys, 'frozen', False):
-        # ■ EXE 배포 상태: 별도로 빌드된 'demucs_runner.exe'를 호출
-        executable_dir = os.path.dirname(sys.executable)
-        runner_path = os.path.join(executable_dir, "demucs_runner.exe")
-        
-        # 만약 runner가 없으면 내부(_internal)에 있을 수도 있음 (onedir 구조에 따라 다름)
-        if not os.path.exists(runner_path):
-             runner_path = os.path.join(sys._MEIPASS, "demucs_runner.exe") if hasattr(sys, '_MEIPASS') else runner_path
-             
-        # [추가] 여전히 못찾으면 현재 작업 디렉토리에서도 확인
-        if not os.path.exists(runner_path):
-            runner_path = os.path.join(os.getcwd(), "demucs_runner.exe")
-             
-        cmd = [runner_path, "-n", model_name, "--shifts=2", "--overlap=0.25", "--mp3-bitrate", "320", "--out", TEMP_DIR, file_path]
-    else:
-        # ■ 개발/스크립트 상태: 'python -m demucs' 사용
-        cmd = [sys.executable, "-m", "demucs", "-n", model_name, "--shifts=2", "--overlap=0.25", "--mp3-bitrate", "320", "--out", TEMP_DIR, file_path]
-    
-    # [중요] 2-Stem 모드일 때만 반주를 하나로 뭉침 (no_vocals 생성)
-    if "2-Stem" in str_mode or mode == "2-Stem":
-        cmd.append("--two-stems=vocals")
-    
-    if use_gpu:
-        cmd.append("-d")
-        cmd.append("cuda")
-    else:
-        cmd.append("-d")
-        cmd.append("cpu")
-        
-    # 콘솔 창 숨기기 설정
-    startupinfo = subprocess.STARTUPINFO()
-    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    
-    # [FIX] torchcodec 이슈 해결을 위한 환경 변수 설정
-    env = os.environ.copy()
-    env["TORCHAUDIO_BACKEND"] = "soundfile"
-    
-    # [핵심] 실시간 로그 캡처
-    process = subprocess.Popen(
-        cmd, 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE, 
-        text=True, 
-        encoding='utf-8', 
-        errors='replace',
-        startupinfo=startupinfo,
-        env=env,
-        bufsize=1,
-        universal_newlines=True
-    )
-    
-    # 진행률 파싱용 정규식
-    progress_pattern = re.compile(r"(\d+)%")
-    
-    error_logs = [] # 에러 내용 수집
-    
-    while True:
-        output = process.stderr.readline()
-        if output == '' and process.poll() is not None:
-            break
-        if output:
-            if "Error" in output or "Traceback" in output or "out of memory" in output:
-                error_logs.append(output.strip())
-                
-            match = progress_pattern.search(output)
-            if match:
-                percent = int(match.group(1))
-                normalized_p = 0.1 + (percent * 0.8 / 100)
-                progress_callback(f"Analyzing... {percent}%", normalized_p)
-
-    process.wait()
-
-    if process.returncode != 0:
-        err_msg = "\n".join(error_logs[-5:])
-        raise Exception(f"AI 엔진 오류 발생 (코드 {process.returncode}):\n{err_msg}")
-
-    base_name = os.path.splitext(os.path.basename(file_path))[0]
-    # AI 결과는 이제 TEMP_DIR 안에 있음
-    target_dir = os.path.join(TEMP_DIR, model_name)
-    expected_path = os.path.join(target_dir, base_name)
-    
-    final_path = expected_path
+# [NEW] 분리 실행별 성능 기록 (JSON-lines)
+PERF_LOG_PATH = os.path.join(OUTPUT_DIR, PERF_LOG_NAME)
 
-    # [강력한 폴더 찾기 로직]
-    if os.path.exists(expected_path):
-        final_path = expected_path
-    else:
-        if os.path.exists(target_dir):
-            try:
-                subdirs = [os.path.join(target_dir, d) for d in os.listdir(target_dir) if os.path.isdir(os.path.join(target_dir, d))]
-                if subdirs:
-                    latest_folder = max(subdirs, key=os.path.getmtime)
-                    final_path = latest_folder
-            except: pass
-
-    # [최종 검증]
-    check_file = "vocals.wav" if mode == "2-Stem" else "drums.wav"
-    if not os.path.exists(os.path.join(final_path, check_file)):
-         raise Exception(f"결과 파일을 찾을 수 없습니다.\n경로: {final_path}")
-    
-    return final_path, model_name
+# [NEW] 스템 캐시 폴더 (TEMP_DIR 과 분리되어 작업 후 청소 대상이 아님)
+STEM_CACHE_DIR = os.path.join(base_dir, "stem_cache")
+# [NEW] 분리 서버 → 믹서 스템 전달 방식 (True: 공유 메모리 배열, False: WAV 파일)
+STEM_HANDOFF_IN_MEMORY = True
+# [NEW] int8 CPU 엔진 양자화 모델 캐시 (최초 1회 생성 후 재사용)
+ENGINE_CACHE_DIR = os.path.join(base_dir, "model_cache")
+# [NEW] CPU 모드 샤드 분리 워커 수 (1 이하면 사용 안 함, 기본: 코어/메모리 기준 자동)
+CPU_SHARD_WORKERS = recommended_shard_workers()
+STEM_CACHE_MAX_GB = 8
+# [NEW] 같은 곡의 6-Stem 결과가 캐시에 있으면 2-Stem 은 분리 없이 합성 (False: 항상 htdemucs_ft 로 분리)
+DERIVE_STEMS_FROM_CACHE = True
+FFMPEG_CMD = ffmpeg_exe if os.path.exists(ffmpeg_exe) else "ffmpeg"
+stem_cache = StemCache(STEM_CACHE_DIR, max_bytes=STEM_CACHE_MAX_GB * 1024 ** 3, ffmpeg=FFMPEG_CMD)
+
+# [NEW] 분리 → FX → 마스터 → 저장 흐름은 core/mix_pipeline.MixPipeline (헤드리스 CLI 와 같은 경로)
 
 
 class GlassFrame(ctk.CTkFrame):
@@ -347,11 +288,17 @@ class AudioStudioApp(ctk.CTk):
         self.resizable(True, True) # [수정] 창 크기 조절 허용
         self.file_path = None
         self.effect_path = None
+        # [NEW] 분리/믹스/마스터 파이프라인 (리믹스 세션, 백그라운드 스템 백업 상태 포함)
+        self.pipeline = MixPipeline(OUTPUT_DIR, TEMP_DIR, stem_cache, ffmpeg=FFMPEG_CMD,
+                                    engine_cache_dir=ENGINE_CACHE_DIR, shard_workers=CPU_SHARD_WORKERS,
+                                    derive_from_cache=DERIVE_STEMS_FROM_CACHE, perf_log_path=PERF_LOG_PATH,
+                                    status_callback=self.safe_status)
         self.is_processing = False
         self.slider_labels = {} 
         self.sliders = {}
         self.current_preset = "Manual"  # 프리셋 이름 저장 변수 추가
         self.midi_vars = {} # [NEW] 각 줄기별 MIDI 추출 여부 저장
+        self.midi_backend_vars = {} # [NEW] 각 줄기별 MIDI 변환 엔진 (MIDI_BACKENDS)
         self.active_midi_tasks = set() # [NEW] 현재 변환 중인 트랙 추적 (중복 방지)
         self.status_glow_step = 0 # [NEW] 상태바 애니메이션용
         
@@ -375,8 +322,15 @@ class AudioStudioApp(ctk.CTk):
         self.wave_phase = 0.0
         self.current_prog = 0.0
         self.wave_lines = [] # 라인 객체 캐싱용
+        
+        # [NEW] 구간 미리듣기 상태 (커서 위치 = 곡 길이 대비 비율)
+        self.preview_cursor = 0.5
+        self.preview_job = None
+        self.preview_gen = 0
+        self.preview_lock = threading.Lock()
 
         self.setup_ui()
+        self.bind_preview_controls()
         
         # [GPU 감지] UI 로딩 후 0.5초 뒤에 체크 (정확도 향상)
         self.after(500, self.check_gpu_status)
@@ -429,6 +383,13 @@ class AudioStudioApp(ctk.CTk):
                                        text_color=COLOR_GOLD_DIM, width=20, height=20)
         self.gpu_chk.pack(side="top", pady=(2, 0), anchor="e")
 
+        # [NEW] CPU 모드 전용 int8 양자화 엔진 (GPU 사용 시 무시)
+        self.int8_var = ctk.BooleanVar(value=False)
+        self.int8_chk = ctk.CTkCheckBox(gpu_control_frame, text="🧮 INT8 CPU ENGINE", variable=self.int8_var,
+                                        font=("Arial", 9, "bold"), fg_color=COLOR_GOLD, hover_color=COLOR_GOLD,
+                                        text_color=COLOR_GOLD_DIM, width=20, height=20)
+        self.int8_chk.pack(side="top", pady=(2, 0), anchor="e")
+
         # [NEW] System Diagnosis Button
         self.diag_btn = ctk.CTkButton(gpu_control_frame, text="🔍 DIAGNOSIS", width=80, height=22, 
                                       font=("Arial", 8, "bold"), fg_color="#333", border_width=1, border_color="#555",
@@ -440,6 +401,7 @@ class AudioStudioApp(ctk.CTk):
         self.viz_frame.pack(fill="x", pady=(0, 15))
         self.viz_canvas = tk.Canvas(self.viz_frame, bg=COLOR_FRAME_BG, height=70, highlightthickness=0)
         self.viz_canvas.pack(fill="both", expand=True, padx=2, pady=2)
+        self.viz_canvas.bind("<Button-1>", self.on_waveform_click) # [NEW] 클릭 위치 주변 구간 미리듣기
         self.draw_initial_waveform(0)
         
         # [UPLIFTED] 4. 상태 표시 및 프로그레스 (파형 바로 아래로 이동하여 가시성 극대화)
@@ -513,6 +475,10 @@ class AudioStudioApp(ctk.CTk):
 
         self.eff_btn = self.create_file_btn(files_group, "🔔 Add Effect (Optional)", self.select_effect)
         self.eff_btn.pack(fill="x", padx=20, pady=5)
+
+        # [NEW] 폴더 일괄 처리 (앨범 모드)
+        self.batch_btn_1 = self.create_file_btn(files_group, "📚 Batch Folder (Album Mode)", self.start_batch_thread)
+        self.batch_btn_1.pack(fill="x", padx=20, pady=5)
         
         mix_group = GlassFrame(mix_left)
         mix_group.pack(fill="x", expand=False, ipady=5)
@@ -760,6 +726,10 @@ class AudioStudioApp(ctk.CTk):
         self.pro_file_btn = self.create_file_btn(pro_btn_row, "📂 Select Main Audio File", self.select_file)
         self.pro_file_btn.pack(fill="x", expand=True)
         self.pro_file_btn.configure(fg_color="#333", border_color=COLOR_GOLD, border_width=1)
+
+        # [NEW] 폴더 일괄 처리 (앨범 모드)
+        self.batch_btn_2 = self.create_file_btn(pro_btn_row, "📚 Batch Folder (Album Mode)", self.start_batch_thread)
+        self.batch_btn_2.pack(fill="x", expand=True, pady=(5, 0))
         
         self.pro_file_label = ctk.CTkLabel(master_panel, text="선택안함 (파일을 불러오세요)", font=("Arial", 12, "bold"), text_color=COLOR_GOLD_DIM)
         self.pro_file_label.pack(pady=(2, 2))
@@ -985,7 +955,7 @@ class AudioStudioApp(ctk.CTk):
         self.safe_status(f"🎯 MIDI Preset: {value} Mode Selected. Click 'START SELECTED' to begin.", COLOR_GOLD)
 
     def convert_all_to_midi_request(self):
-        """[NEW] 선택된 악기들에 대해 MIDI 변환 순차적(Sequential) 실행"""
+        """[NEW] 선택된 악기들에 대해 MIDI 변환 + 악보 생성 (스템 병렬 풀, 스템마다 MIDI → 악보 순서)"""
         if not hasattr(self, 'last_output_dir') or not self.last_output_dir:
             self.safe_status("❌ Error: 6-Stem 분석을 먼저 실행해주세요.", "#FF5555")
             return
@@ -998,9 +968,10 @@ class AudioStudioApp(ctk.CTk):
         self.batch_midi_btn.configure(state="disabled", text="⏳ MIDI Processing...")
         self.progress.set(0)
 
-        # 순차적 처리를 위한 워커 스레드 생성
-        def sequential_worker():
+        # 백그라운드 워커 스레드 (스템 병렬 변환 풀은 이 안에서 실행)
+        def batch_worker():
             try:
+                self.wait_background_export() # [NEW] 스템 백업 저장이 끝난 파일만 변환
                 stems = ["vocals", "drums", "bass", "guitar", "piano", "other"]
                 targets = [s for s in stems if self.midi_vars.get(s) and self.midi_vars[s].get()]
                 
@@ -1009,14 +980,13 @@ class AudioStudioApp(ctk.CTk):
                     return
 
                 self.safe_status(f"🎹 Batch MIDI Start (0/{len(targets)})", COLOR_GOLD)
+                clean_basename = clean_name(self.file_path)
+                audio_dir = os.path.join(self.last_output_dir, "음원분리")
             
-                for i, s in enumerate(targets):
+                # 오디오 파일 찾기
+                stem_files = []
+                for s in targets:
                     if s in self.active_midi_tasks: continue # 이미 작업 중이면 건너뜀
-                    self.active_midi_tasks.add(s)
-                    
-                    # 오디오 파일 찾기
-                    audio_dir = os.path.join(self.last_output_dir, "음원분리")
-                    clean_basename = clean_name(self.file_path)
                     target_file = os.path.join(audio_dir, f"6S_{s}_{clean_basename}.wav")
                     
                     if not os.path.exists(target_file):
@@ -1024,36 +994,40 @@ class AudioStudioApp(ctk.CTk):
                         elif s == "mr": target_file = os.path.join(audio_dir, f"Inst_{clean_basename}.wav")
 
                     if os.path.exists(target_file):
-                        # 1. MIDI 변환
-                        msg_midi = f"🎹 Converting MIDI: {s.upper()} ({i+1}/{len(targets)})..."
-                        self.safe_status(msg_midi, "#00CCFF")
-                        self.run_midi_conversion_logic(target_file, s)
-                        
-                        # 2. 악보 자동 생성 (LilyPond) - 각 파일 변환 직후 실행하여 피드백 강화
-                        base_dir = os.path.dirname(os.path.abspath(__file__))
-                        lily_exe = os.path.join(base_dir, "lilypond-2.24.4", "bin", "lilypond.exe")
-                        if not os.path.exists(lily_exe):
-                            lily_exe = r"C:\lilypond-2.24.4\bin\lilypond.exe"
-                            
-                        if os.path.exists(lily_exe):
-                            msg_score = f"📄 Generating Score: {s.upper()}..."
-                            self.safe_status(msg_score, "#00FF7F")
-                            
-                            score_maker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "score_maker.py")
-                            midi_dir_path = os.path.join(self.last_output_dir, "미디분리")
-                            
-                            if os.path.exists(score_maker_script) and os.path.exists(midi_dir_path):
-                                 # [FIX] LilyPond 엔진을 직접 호출하지 않고 score_maker.py를 통해 통제
-                                 midi_filename = f"{clean_basename}_{s}.mid"
-                                 subprocess.run([sys.executable, score_maker_script, midi_dir_path, midi_filename], check=False)
-
-                        if s in self.active_midi_tasks: self.active_midi_tasks.remove(s)
-                        
-                    # 진행 바 업데이트 (하단 공통 바 동기화)
-                    progress_val = (i + 1) / len(targets)
-                    self.safe_update(self.progress.set, progress_val)
-                    
-                self.safe_status("✅ All Done! MIDI & Scores Created.", "#00FF7F")
+                        self.active_midi_tasks.add(s)
+                        stem_files.append((s, target_file))
+                
+                # [NEW] 스템 병렬 변환 풀 - 워커(상주 변환 서버)마다 스템 그룹 배치 MIDI → 스템별 악보
+                midi_dir = os.path.join(self.last_output_dir, "미디분리")
+                os.makedirs(midi_dir, exist_ok=True)
+                jobs = [(s, f, os.path.join(midi_dir, f"{clean_basename}_{s}.mid"), self.midi_backend(s))
+                        for s, f in stem_files]
+                engine_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "core", "midi_engine.py")
+                server_cmd = [sys.executable, engine_path, "--serve"]
+                pool_size = recommended_midi_pool_size(len(jobs))
+
+                def on_progress(done, total, msg):
+                    self.safe_status(f"🎹 MIDI & Scores ({done}/{total}, {pool_size} workers) {msg}", "#00CCFF")
+                    self.safe_update(self.progress.set, done / max(1, total))
+
+                def midi_fallback(stem, audio_path, midi_path):
+                    self.run_midi_conversion_logic(audio_path, stem)
+                    return os.path.exists(midi_path)
+
+                converter = MidiBatchConverter(server_cmd, pool_size,
+                                               shared_worker=get_shared_transcription_worker(server_cmd))
+                try:
+                    summary = converter.run(jobs, self.run_score_maker, on_progress, midi_fallback)
+                finally:
+                    for s, _ in stem_files:
+                        self.active_midi_tasks.discard(s)
+                print(f"MIDI Batch Summary: {summary}")
+
+                if summary["failed"]:
+                    self.safe_status(f"⚠️ MIDI & Scores: {summary['succeeded']}/{summary['total_stems']} stems done "
+                                     f"({summary['failed']} failed)", "#FFAA00")
+                else:
+                    self.safe_status("✅ All Done! MIDI & Scores Created.", "#00FF7F")
                 self.safe_update(self.progress.set, 1.0)
             except Exception as e:
                 print(f"Batch Processing Error: {e}")
@@ -1061,7 +1035,7 @@ class AudioStudioApp(ctk.CTk):
             finally:
                 self.safe_update(self.batch_midi_btn.configure, {"state": "normal", "text": "✨ Convert All to MIDI & Scores"})
 
-        threading.Thread(target=sequential_worker, daemon=True).start()
+        threading.Thread(target=batch_worker, daemon=True).start()
 
     def convert_to_midi_request(self, stem_name):
         """[NEW] 개별 MIDI 변환 요청 (비동기)"""
@@ -1093,8 +1067,10 @@ class AudioStudioApp(ctk.CTk):
         threading.Thread(target=self.run_midi_conversion_logic, args=(target_file, stem_name, True), daemon=True).start()
 
     def run_midi_conversion_logic(self, audio_path, stem_name, is_individual=False):
-        """[FIX] 독립 프로세스(midi_engine.py)를 통한 MIDI 변환 - 환경 충돌 완벽 차단"""
+        """[FIX] 독립 프로세스(midi_engine.py)를 통한 MIDI 변환 - 환경 충돌 완벽 차단
+        [NEW] 상주 변환 서버(midi_engine.py --serve)를 우선 사용 - TensorFlow/모델 로딩은 첫 작업 1회만"""
         try:
+            self.wait_background_export() # [NEW] 스템 백업 저장이 끝난 파일만 변환
             midi_dir = os.path.join(self.last_output_dir, "미디분리")
             os.makedirs(midi_dir, exist_ok=True)
             clean_basename = clean_name(self.file_path)
@@ -1109,23 +1085,31 @@ class AudioStudioApp(ctk.CTk):
                 print(f"Error: {engine_path} not found")
                 return
 
-            cmd = [executable, engine_path, audio_path, output_midi]
-            
-            # 콘솔 창 숨기기
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            
-            # 작업을 수행하고 완료될 때까지 대기 (순차적 처리를 위해)
-            process = subprocess.Popen(cmd, startupinfo=startupinfo)
-            process.wait()
+            backend = self.midi_backend(stem_name)
+            try:
+                worker = get_shared_transcription_worker([executable, engine_path, "--serve"])
+                stats = worker.transcribe(audio_path, output_midi, backend=backend)
+                print(f"MIDI Stats ({stem_name}): {stats}")
+                returncode = 0
+            except (TranscriptionWorkerError, OSError) as e:
+                if worker.is_alive():
+                    # 서버는 정상, 이 파일만 실패 (basic-pitch / librosa 모두 실패)
+                    print(f"MIDI Engine Error ({stem_name}): {e}")
+                    returncode = 1
+                else:
+                    # 서버 기동 실패/비정상 종료 시 기존 1회용 프로세스로 재시도
+                    print(f"Transcription server unavailable, falling back to one-shot process: {e}")
+                    cmd = [executable, engine_path, audio_path, output_midi, "--backend", backend]
+                    process = subprocess.Popen(cmd, startupinfo=hidden_startupinfo())
+                    returncode = process.wait()
 
-            if process.returncode == 0:
+            if returncode == 0:
                 print(f"MIDI Success ({stem_name}): {output_midi}")
                 if is_individual:
                     self.safe_status(f"✅ MIDI Done: {stem_name.upper()}", "#00FF7F")
                     self.safe_update(self.progress.set, 1.0)
             else:
-                print(f"MIDI Engine Failed for {stem_name} with code {process.returncode}")
+                print(f"MIDI Engine Failed for {stem_name} with code {returncode}")
                 if is_individual:
                     self.safe_status(f"❌ MIDI Error: {stem_name.upper()}", "#FF5555")
         except Exception as e:
@@ -1137,6 +1121,26 @@ class AudioStudioApp(ctk.CTk):
             if stem_name in self.active_midi_tasks:
                 self.active_midi_tasks.remove(stem_name)
 
+    def midi_backend(self, stem_name):
+        """[NEW] 스템에 선택된 MIDI 변환 엔진 (선택 메뉴가 없는 스템은 auto)"""
+        var = self.midi_backend_vars.get(stem_name)
+        return var.get() if var else "auto"
+
+    def run_score_maker(self, stem_name, midi_path):
+        """[NEW] MIDI 1개 → 악보 (score_maker.py 별도 프로세스, LilyPond 가 없으면 건너뜀)"""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        lily_exe = os.path.join(base_dir, "lilypond-2.24.4", "bin", "lilypond.exe")
+        if not os.path.exists(lily_exe):
+            lily_exe = r"C:\lilypond-2.24.4\bin\lilypond.exe"
+        if not os.path.exists(lily_exe):
+            return
+
+        # [FIX] LilyPond 엔진을 직접 호출하지 않고 score_maker.py를 통해 통제 (core 폴더의 스크립트)
+        score_maker_script = os.path.join(base_dir, "core", "score_maker.py")
+        if os.path.exists(score_maker_script) and os.path.exists(midi_path):
+            subprocess.run([sys.executable, score_maker_script, os.path.dirname(midi_path), os.path.basename(midi_path)],
+                           check=False, startupinfo=hidden_startupinfo())
+
     def fetch_suno_lyrics_action(self):
         """[NEW] Suno URL에서 가사 가져오기"""
         url = self.suno_url_entry.get().strip().rstrip(':').rstrip('/')
@@ -1320,6 +1324,13 @@ class AudioStudioApp(ctk.CTk):
                                  border_color=COLOR_GOLD_DIM, border_width=1,
                                  command=lambda k=key: self.convert_to_midi_request(k))
         midi_btn.pack(side="right", padx=(5, 10))
+
+        # [NEW] MIDI 변환 엔진 선택 (auto / basic-pitch / librosa)
+        bv = ctk.StringVar(value="auto")
+        self.midi_backend_vars[key] = bv
+        ctk.CTkOptionMenu(h, values=MIDI_BACKENDS, variable=bv, width=90, height=22, font=("Arial", 10),
+                          fg_color="#333", button_color="#333", button_hover_color=COLOR_GOLD,
+                          text_color=COLOR_GOLD).pack(side="right", padx=(5, 0))
         
         self.pro_sliders[key] = s
         self.pro_slider_labels[key] = v_lbl
@@ -1342,6 +1353,7 @@ class AudioStudioApp(ctk.CTk):
 
     def update_pro_slider_text(self, key, value):
         self.pro_slider_labels[key].configure(text=f"{int(value)} dB")
+        self.request_preview()
 
     def create_fx_toggle(self, parent, text, variable):
         f = ctk.CTkFrame(parent, fg_color="transparent")
@@ -1353,6 +1365,7 @@ class AudioStudioApp(ctk.CTk):
 
     def update_slider_text(self, key, value):
         self.slider_labels[key].configure(text=f"{int(value)} dB")
+        self.request_preview()
 
     def apply_preset(self, v, m, name=None):
         self.sliders['vocal'].set(v)
@@ -1382,6 +1395,7 @@ class AudioStudioApp(ctk.CTk):
         f = filedialog.askopenfilename(filetypes=[("Audio", "*.mp3 *.wav *.flac")])
         if f: 
             self.file_path = f
+            self.pipeline.remix_session = None # [NEW] 다른 곡이므로 이전 리믹스 세션(스템 메모리) 해제
             short_name = os.path.basename(f)
             
             # [수정] 양쪽 탭 모두에 파일 정보 업데이트
@@ -1403,6 +1417,7 @@ class AudioStudioApp(ctk.CTk):
         if f:
             self.effect_path = f
             self.eff_btn.configure(text=f"🔔 {os.path.basename(f)}")
+            self.pipeline.remix_session = None # [FIX] 효과음 트랙은 세션 버스에 포함 → 바뀌면 다시 렌더링
 
     def draw_initial_waveform(self, p=None):
         """[UI] 상단 시각화 바 그리기 및 업데이트 (p가 있으면 진행도 반영)"""
@@ -1492,6 +1507,65 @@ class AudioStudioApp(ctk.CTk):
         self.wave_lines = [] # 라인을 비워주면 다음 draw_initial_waveform 호출 시 새로 그립니다.
         self.current_prog = 0 # 진행도 초기화
 
+    # --- [NEW] 구간 미리듣기 (분리 결과가 메모리에 있을 때, 전체 렌더링/저장 없이 커서 주변만) ---
+    def bind_preview_controls(self):
+        """FX/마스터 체크박스가 바뀌면 미리듣기 요청 (슬라이더는 update_*_slider_text 에서 요청)"""
+        for name in ('dolby_var', 'hifi_var', 'fx_vocal_air', 'fx_drum_punch', 'fx_bass_warmth', 'fx_stereo_wall'):
+            var = getattr(self, name, None)
+            if var is not None:
+                var.trace_add("write", lambda *_: self.request_preview())
+
+    def on_waveform_click(self, event):
+        """파형 패널 클릭 → 미리듣기 커서 이동"""
+        w = self.viz_canvas.winfo_width()
+        if w > 1:
+            self.preview_cursor = min(max(event.x / w, 0.0), 1.0)
+            self.request_preview()
+
+    def request_preview(self):
+        """드래그 중 연속 요청은 PREVIEW_DEBOUNCE_MS 동안 모아 마지막 값으로 1회만 렌더링"""
+        if not self.pipeline.remix_session or self.is_processing:
+            return
+        if self.preview_job:
+            self.after_cancel(self.preview_job)
+        self.preview_job = self.after(PREVIEW_DEBOUNCE_MS, self.start_preview)
+
+    def start_preview(self):
+        self.preview_job = None
+        session = self.pipeline.remix_session
+        if not session:
+            return
+        params = self.collect_params()
+        if params['mode'] != session[1]:
+            return
+        self.preview_gen += 1
+        threading.Thread(target=self.preview_thread, args=(session[4], params, self.preview_cursor, self.preview_gen),
+                         daemon=True).start()
+
+    def preview_thread(self, session, params, cursor, gen):
+        """[스레드] 커서 주변 PREVIEW_SECONDS 구간 렌더링 → 재생 + 파형 표시 (더 새로운 요청이 있으면 건너뜀)"""
+        with self.preview_lock:
+            if gen != self.preview_gen:
+                return
+            try:
+                duration = session.length / session.samplerate
+                start = max(0.0, min(cursor * duration - PREVIEW_SECONDS / 2, duration - PREVIEW_SECONDS))
+                mix = session.preview(params, start, PREVIEW_SECONDS)
+                elapsed_ms = int(session.last_stages.get("elapsed", 0) * 1000)
+                if winsound is not None:
+                    path = os.path.join(TEMP_DIR, f"preview_{gen % 2}.wav")
+                    os.makedirs(TEMP_DIR, exist_ok=True)
+                    sf.write(path, mix.T, session.samplerate, subtype="PCM_16")
+                    winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+                self.safe_update(self.show_preview_ui, mix.mean(axis=0), start, elapsed_ms)
+            except Exception as e:
+                print(f"Preview Error: {e}")
+
+    def show_preview_ui(self, mono, start, elapsed_ms):
+        self.draw_waveform_ui(mono)
+        self.status_lbl.configure(text=f"🎧 Preview {int(start // 60)}:{int(start % 60):02d} "
+                                       f"+{int(PREVIEW_SECONDS)}s ({elapsed_ms} ms)", text_color=COLOR_GOLD)
+
     def animate_status(self):
         """[UI] 하단 상태바 글로우 애니메이션 (숨쉬기 효과)"""
         try:
@@ -1567,7 +1641,7 @@ class AudioStudioApp(ctk.CTk):
 
     def _set_run_btns_state(self, state):
         """[UX] 버튼 활성/비활성 제어"""
-        for btn_attr in ['run_btn_1', 'run_btn_2']:
+        for btn_attr in ['run_btn_1', 'run_btn_2', 'batch_btn_1', 'batch_btn_2']:
             if hasattr(self, btn_attr):
                 getattr(self, btn_attr).configure(state=state)
 
@@ -1590,10 +1664,8 @@ class AudioStudioApp(ctk.CTk):
         self.is_processing = False
         messagebox.showerror("Error", error_msg)
 
-    def start_thread(self):
-        if self.is_processing: return # 중복 실행 방지
-        if not self.file_path: return messagebox.showwarning("No File", "Please select a file!")
-        
+    def collect_params(self):
+        """[NEW] 현재 UI 설정값을 작업 파라미터로 수집 (단일/배치 공용)"""
         # [NEW] 현재 선택된 탭 감지
         current_tab = self.tabview.get()
         mode = "6-Stem" if "6-Stem" in current_tab else "2-Stem"
@@ -1604,6 +1676,9 @@ class AudioStudioApp(ctk.CTk):
             'm_val': self.sliders['mr'].get(),
             'e_val': self.sliders['sfx'].get(),
             'gpu': self.gpu_var.get(),
+            'in_memory': STEM_HANDOFF_IN_MEMORY,
+            'effect_path': self.effect_path,
+            'engine': ENGINE_INT8 if self.int8_var.get() else ENGINE_FLOAT,
             'mode': mode,
             'dolby': self.dolby_var.get() if hasattr(self, 'dolby_var') else False,
             'hifi': self.hifi_var.get() if hasattr(self, 'hifi_var') else False,
@@ -1616,266 +1691,73 @@ class AudioStudioApp(ctk.CTk):
                 'stereo_wall': self.fx_stereo_wall.get()
             } if hasattr(self, 'fx_vocal_air') else {}
         }
-        
-        self.is_processing = True
         # 현재 프리셋 이름을 파라미터로 넘김
         params['preset_name'] = self.current_preset
+        return params
+
+    def start_thread(self):
+        if self.is_processing: return # 중복 실행 방지
+        if not self.file_path: return messagebox.showwarning("No File", "Please select a file!")
+        
+        params = self.collect_params()
+        self.is_processing = True
         
         # 버튼 디자인 업데이트
         self._set_run_btns_state("disabled")
         self._update_run_btns("⏳ Processing...", "#F59E0B", "black")
         threading.Thread(target=self.process, args=(params,), daemon=True).start()
 
-    def process(self, params):
-        """[스레드] 무거운 AI 작업 수행 (Safe Temp File 방식 적용)"""
-        from pydub import AudioSegment, effects
+    def start_batch_thread(self):
+        """[NEW] 폴더 단위 일괄 처리 (앨범 모드)"""
+        if self.is_processing: return # 중복 실행 방지
+        folder = filedialog.askdirectory(title="일괄 처리할 오디오 폴더를 선택하세요")
+        if not folder: return
+        
+        files = discover_audio_files(folder)
+        if not files:
+            return messagebox.showwarning("No File", "선택한 폴더에 오디오 파일(mp3/wav/flac)이 없습니다.")
+        
+        params = self.collect_params()
+        self.is_processing = True
+        self._set_run_btns_state("disabled")
+        self._update_run_btns(f"⏳ Batch 0/{len(files)}", "#F59E0B", "black")
+        threading.Thread(target=self.process_batch, args=(files, params), daemon=True).start()
+
+    def process_batch(self, files, params):
+        """[스레드] 여러 곡을 워커 풀로 처리하고 마지막에 요약 파일 1개를 기록 (MixPipeline.process_batch)"""
         try:
-            def cb(msg, p):
-                self.safe_update(self.update_progress_ui, msg, p)
-            
-            # [Step 1] 안전해제: 복잡한 파일명 에러 방지를 위해 임시 파일로 복사
-            if not os.path.exists(TEMP_DIR): os.makedirs(TEMP_DIR)
-            
-            ext = os.path.splitext(self.file_path)[1]
-            safe_input = os.path.join(TEMP_DIR, f"temp_input{ext}")
-            shutil.copyfile(self.file_path, safe_input)
-            
-            # [Step 2] 분리 (이제 safe_input을 사용하므로 에러 없음)
-            # separate 함수는 폴더 경로와 모델명을 반환함
-            res_dir, model_name = separate(safe_input, params['gpu'], params['mode'], cb)
+            def on_progress(done, total, msg, pool_size):
+                self.safe_update(self.update_progress_ui, f"📚 Batch {done}/{total} ({pool_size} workers) {msg}", done / total)
             
-            # [Step 3] 결과 저장 (output_result 바로 아래에 저장)
-            base_filename = clean_name(self.file_path)
+            # [FIX] last_output_dir / file_path 는 그대로 둠 (MIDI/악보 단계가 선택한 곡의 폴더와 이름을 함께 쓰도록)
+            summary = self.pipeline.process_batch(files, params, on_progress, summary_dir=OUTPUT_DIR)
             
-            # [수정] 폴더 생성하지 않고 바로 OUTPUT_DIR 사용
-            save_path = OUTPUT_DIR 
-            if not os.path.exists(save_path): os.makedirs(save_path)
-            
-            final_output = ""
-
-            # --- 6-Stem 혁명적 믹싱 모드 처리 ---
-            if params['mode'] == "6-Stem":
-                cb("Loading 6-Stem Channels...", 0.6)
-                stems_data = {}
-                stem_files = ["vocals.wav", "drums.wav", "bass.wav", "guitar.wav", "piano.wav", "other.wav"]
-                
-                # [1] 모든 줄기 로드 및 기본 게인 적용
-                for s in stem_files:
-                    src = os.path.join(res_dir, s)
-                    if os.path.exists(src):
-                        name = s.replace(".wav", "")
-                        gain = params['pro_mixer'].get(name, 0)
-                        audio = AudioSegment.from_file(src) + gain
-                        stems_data[name] = audio
-                
-                # [2] 개별 줄기별 혁명적 프로세싱 (Advanced FX)
-                pro_fx = params.get('pro_fx', {})
-                
-                # 🎤 Vocal Air: 고음역대 선명도와 공기감 추가
-                if pro_fx.get('vocal_air') and 'vocals' in stems_data:
-                    cb("Polishing Vocals (Air)...", 0.7)
-                    try:
-                        import io
-                        raw = stems_data['vocals'].export(format="wav").read()
-                        cmd = ["ffmpeg", "-i", "pipe:0", "-af", "firequalizer=gain='if(gt(f,10000), 4, 0)'", "-f", "wav", "pipe:1"]
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-                        out, _ = proc.communicate(input=raw)
-                        if proc.returncode == 0: stems_data['vocals'] = AudioSegment.from_wav(io.BytesIO(out))
-                    except: pass
-
-                # 🥁 Drum Punch: 타격감 및 어택 강화
-                if pro_fx.get('drum_punch') and 'drums' in stems_data:
-                    cb("Powering Up Drums...", 0.75)
-                    stems_data['drums'] = effects.compress_dynamic_range(stems_data['drums'], threshold=-15, ratio=3.0, attack=5, release=100)
-
-                # 🔥 Bass Warmth: 저음의 깊이와 따뜻함
-                if pro_fx.get('bass_warmth') and 'bass' in stems_data:
-                    cb("Deeper Bass Processing...", 0.8)
-                    stems_data['bass'] = stems_data['bass'].low_pass_filter(500) + 2 # 압도적 중저음
-
-                # ↔️ Stereo Wall (Guitar/Piano): 스테레오 이미지 확장
-                if pro_fx.get('stereo_wall'):
-                    cb("Widening Soundstage...", 0.85)
-                    for k in ['guitar', 'piano']:
-                        if k in stems_data:
-                            try:
-                                import io
-                                raw = stems_data[k].export(format="wav").read()
-                                cmd = ["ffmpeg", "-i", "pipe:0", "-af", "stereowidener=level_in=1:level_out=1:crossfeed=0.4:drymix=0.6", "-f", "wav", "pipe:1"]
-                                startupinfo = subprocess.STARTUPINFO()
-                                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                                proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-                                out, _ = proc.communicate(input=raw)
-                                if proc.returncode == 0: stems_data[k] = AudioSegment.from_wav(io.BytesIO(out))
-                            except: pass
-
-                # [3] 최종 융합 (Revolution Fusion)
-                cb("Master Fusion in Progress...", 0.9)
-                final = None
-                for name in stems_data:
-                    audio = stems_data[name]
-                    if final is None: 
-                        final = audio
-                    else: 
-                        final = final.overlay(audio)
-                
-                # [안전장치] 만약 어떤 이유로든 데이터가 없다면 빈 오디오 생성
-                if final is None:
-                    final = AudioSegment.silent(duration=1000)
-
-                # [4] 마스터 글루 컴프레션 및 노멀라이즈
-                final = effects.compress_dynamic_range(final, threshold=-12.0, ratio=2.5)
-                
-                # Dolby Style (6-Stem Revolution Mix 적용)
-                if params.get('dolby', False):
-                    cb("Applying Dolby Effect...", 0.94)
-                    try:
-                        raw = final.export(format="wav").read()
-                        cmd = [
-                            "ffmpeg", "-i", "pipe:0",
-                            "-af", "stereotools=mlev=1:slev=1.4,bass=g=3:f=100,treble=g=3:f=10000",
-                            "-f", "wav", "pipe:1"
-                        ]
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-                        out, _ = proc.communicate(input=raw)
-                        if proc.returncode == 0: final = AudioSegment.from_wav(io.BytesIO(out))
-                    except: pass
-
-                # Hi-Fi Polishing (6-Stem Revolution Mix 적용)
-                if params.get('hifi', False):
-                    cb("Optimizing Hi-Fi Quality...", 0.96)
-                    try:
-                        raw = final.export(format="wav").read()
-                        cmd = ["ffmpeg", "-i", "pipe:0", "-af", "treble=g=4:f=14000", "-f", "wav", "pipe:1"]
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-                        out, _ = proc.communicate(input=raw)
-                        if proc.returncode == 0: final = AudioSegment.from_wav(io.BytesIO(out))
-                    except: pass
+            self.safe_update(self.update_progress_ui, f"Batch Done! {summary['succeeded']}/{summary['total_files']} ({summary['wall_sec']}s)", 1.0)
+            self.safe_update(self.finish_process_ui, OUTPUT_DIR)
+        except Exception as e:
+            self.safe_update(self.error_process_ui, str(e))
 
-                final = effects.normalize(final, headroom=0.1)
-                
-                # [5] 결과 저장 및 개별 줄기 백업
-                # [수정] 노래 제목 폴더 내부에 '음원분리' 및 '미디분리' 서브 폴더 생성
-                song_folder = os.path.join(save_path, base_filename)
-                audio_dir = os.path.join(song_folder, "음원분리")
-                os.makedirs(audio_dir, exist_ok=True)
-                os.makedirs(os.path.join(song_folder, "미디분리"), exist_ok=True)
-                
-                preset_suffix = params.get('preset_name', 'Revolution').replace("Pro:", "")
-                final_name = f"{base_filename}_{preset_suffix}"
-                
-                if params.get('hifi', False):
-                    final_output_file = os.path.join(audio_dir, f"{final_name}.wav")
-                    final.export(final_output_file, format="wav")
-                else:
-                    final_output_file = os.path.join(audio_dir, f"{final_name}.mp3")
-                    final.export(final_output_file, format="mp3", bitrate="320k")
-                
-                # 개별 줄기도 해당 폴더에 보관
-                for name, audio in stems_data.items():
-                    audio.export(os.path.join(audio_dir, f"6S_{name}_{base_filename}.wav"), format="wav")
-                
-                final_output = song_folder # 결과 폴더를 리턴
-                self.last_output_dir = song_folder # [추가] MIDI 변환을 위해 경로 저장
+    def process(self, params):
+        """[스레드] 무거운 AI 작업 수행 (MixPipeline.process_file - 헤드리스 CLI 와 같은 경로)"""
+        try:
+            def cb(msg, p):
+                self.safe_update(self.update_progress_ui, msg, p)
             
-            # --- 2-Stem 모드 처리 ---
-            else:
-                v_path = os.path.join(res_dir, "vocals.wav")
-                m_path = os.path.join(res_dir, "no_vocals.wav")
-                
-                if not os.path.exists(v_path):
-                     raise Exception(f"결과 파일 없음: {v_path}")
-
-                cb("Mixing Vocals & Inst...", 0.85)
-                v = AudioSegment.from_file(v_path).high_pass_filter(80) + params['v_val']
-                m = AudioSegment.from_file(m_path) + params['m_val']
-                final = v.overlay(m)
-                
-                if self.effect_path:
-                    try: final = final.overlay(AudioSegment.from_file(self.effect_path) + params['e_val'])
-                    except: pass
-                
-                cb("Mastering Audio...", 0.9)
-                final = effects.compress_dynamic_range(final, threshold=-12.0, ratio=2.0)
-                
-                # Dolby Style
-                if params.get('dolby', False):
-                    cb("Applying Dolby Effect...", 0.95)
-                    try:
-                        import io
-                        raw = final.export(format="wav").read()
-                        cmd = [
-                            "ffmpeg", "-i", "pipe:0",
-                            "-af", "stereotools=mlev=1:slev=1.4,bass=g=3:f=100,treble=g=3:f=10000",
-                            "-f", "wav", "pipe:1"
-                        ]
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-                        out, _ = proc.communicate(input=raw)
-                        if proc.returncode == 0:
-                            final = AudioSegment.from_wav(io.BytesIO(out))
-                    except: pass
-
-                # Hi-Fi Polishing
-                if params.get('hifi', False):
-                    cb("Optimizing Hi-Fi Quality...", 0.98)
-                    try:
-                        import io
-                        raw = final.export(format="wav").read()
-                        cmd = [
-                            "ffmpeg", "-i", "pipe:0",
-                            "-af", "treble=g=4:f=14000",
-                            "-f", "wav", "pipe:1"
-                        ]
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-                        out, _ = proc.communicate(input=raw)
-                        if proc.returncode == 0:
-                            final = AudioSegment.from_wav(io.BytesIO(out))
-                    except: pass
-
-                # 최종 노멀라이즈 및 저장
-                final = effects.normalize(final, headroom=0.1)
-                
-                # [수정] 파일명 폴더 내부에 서브 폴더 구성
-                song_folder = os.path.join(save_path, base_filename)
-                audio_dir = os.path.join(song_folder, "음원분리")
-                os.makedirs(audio_dir, exist_ok=True)
-                os.makedirs(os.path.join(song_folder, "미디분리"), exist_ok=True)
-
-                preset_prefix = params.get('preset_name', 'Custom')
-                final_name = f"{base_filename}_{preset_prefix}"
-                
-                if params.get('hifi', False):
-                    final_output_file = os.path.join(audio_dir, f"{final_name}_HiFi.wav")
-                    final.export(final_output_file, format="wav")
-                else:
-                    final_output_file = os.path.join(audio_dir, f"{final_name}.mp3")
-                    final.export(final_output_file, format="mp3", bitrate="320k")
-
-                v.export(os.path.join(audio_dir, f"Vocals_{base_filename}.wav"), format="wav")
-                m.export(os.path.join(audio_dir, f"Inst_{base_filename}.wav"), format="wav")
-                
-                final_output = song_folder
-                self.last_output_dir = song_folder # [추가] MIDI 변환을 위해 경로 저장
+            # [NEW] 같은 곡/모드/엔진을 다시 실행하면 분리 없이 리믹스 세션에서 바뀐 단계만 다시 렌더링
+            report = {}
+            final_output = self.pipeline.process_file(self.file_path, params, cb, keep_session=True, report=report)
+            print(f"Pipeline stages: {report.get('stages')}")
+            self.last_output_dir = final_output # [추가] MIDI 변환을 위해 경로 저장
 
             cb("Done!", 1.0)
             self.safe_update(self.finish_process_ui, final_output)
-            
-            # [청소] 임시 폴더 삭제 (output_result는 건드리지 않음)
-            try: shutil.rmtree(TEMP_DIR, ignore_errors=True)
-            except: pass
 
         except Exception as e:
             self.safe_update(self.error_process_ui, str(e))
+
+    def wait_background_export(self):
+        """[NEW] 백그라운드 스템 백업 저장이 남아 있으면 끝날 때까지 대기"""
+        self.pipeline.wait_background_export()
     
     # ============================================================
     # [NEW] Voice Enhancement Tab (RVC Integration)
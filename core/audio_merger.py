@@ -6,6 +6,9 @@ from pydub import AudioSegment, effects
 import traceback
 import math
 
+# [NEW] 벡터화 컴프레서 (pydub compress_dynamic_range 대체) / 사이드체인 덕킹
+from dynamics import compress_segment, sidechain_segment
+
 def safe_print(message):
     """Prints messages safely regardless of the console's encoding."""
     try:
@@ -19,13 +22,23 @@ def _apply_sidechain_compression(vocal_track, instrumental_track, threshold_db=-
     """
     Applies side-chain compression to the instrumental track, triggered by the vocal track.
     Makes the instrumental track duck slightly when vocals are present.
+    [NEW] 50ms 프레임 RMS → 샘플 단위로 보간한 게인 곡선 → 반주에 곱셈 (NumPy, 곡 길이에 선형)
     """
     safe_print("Applying Side-Chain Compression (Vocal Priority)...")
+    ducked = sidechain_segment(vocal_track, instrumental_track, threshold_db=threshold_db, ratio=ratio,
+                               max_reduction_db=6.0, frame_ms=50)
+    if ducked is not None:
+        return ducked
+    return _apply_sidechain_compression_chunks(vocal_track, instrumental_track, threshold_db, ratio)
+
+
+def _apply_sidechain_compression_chunks(vocal_track, instrumental_track, threshold_db=-25.0, ratio=2.5):
+    """기존 청크 루프 방식 (8-bit 등 NumPy 경로가 지원하지 않는 샘플 폭용)"""
     compressed_instrumental = instrumental_track.empty() # Create an empty segment for compressed audio
 
     # Parameters for compression
-    samplerate = instrumental_track.frame_rate
-    chunk_size = int(samplerate * 0.05) # 50ms chunk for smoother analysis (increased from 20ms)
+    # [FIX] pydub 슬라이스 단위는 ms - 기존 int(samplerate * 0.05) 는 2205ms 청크가 되어 50ms 의도와 달랐음
+    chunk_size = 50 # 50ms chunk for smoother analysis (increased from 20ms)
 
     # Ensure tracks are same length for iteration
     min_length = min(len(vocal_track), len(instrumental_track))
@@ -134,7 +147,7 @@ def main():
 
         # 5. Apply mastering effects
         safe_print("🎚️ Applying master compressor...")
-        final_mix = effects.compress_dynamic_range(final_mix, threshold=-12.0, ratio=2.0)
+        final_mix = compress_segment(final_mix, threshold=-12.0, ratio=2.0)
         
         if args.apply_dolby:
             safe_print("💎 Applying Dolby Style effect...")
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+📚 Batch Separation Queue
+=========================
+앨범/폴더 단위 일괄 분리 큐.
+- 워커 수는 CPU 코어 수와 가용 메모리로 결정 (GPU 모드는 1개)
+- 워커마다 자신만의 상주 분리 서버(SeparationWorker)를 가집니다.
+- 현재 곡이 분리되는 동안 다음 곡을 미리 WAV 로 디코딩 (prefetch)
+- 모든 곡이 끝나면 곡별 소요 시간/분리 성능이 담긴 요약 파일 1개를 기록합니다.
+- 진행 메시지에는 지금까지의 곡당 평균 시간으로 계산한 배치 ETA 가 붙습니다.
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+import subprocess
+import concurrent.futures
+
+from subprocess_utils import hidden_startupinfo
+from separation_worker import SeparationWorker
+from perf_records import format_eta
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.m4a', '.ogg')
+
+# Demucs 1개 작업이 차지하는 대략적인 메모리 (CPU 모드 기준)
+MEMORY_PER_JOB_GB = 3.0
+# Demucs 1개 작업에 배정할 최소 CPU 코어 수
+CORES_PER_JOB = 4
+
+
+def discover_audio_files(source):
+    """폴더 경로 또는 파일 경로 목록을 받아 오디오 파일 목록(정렬됨)을 반환"""
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            return sorted(os.path.join(source, f) for f in os.listdir(source)
+                          if f.lower().endswith(AUDIO_EXTENSIONS))
+        source = [source]
+    return [f for f in source if os.path.isfile(f) and f.lower().endswith(AUDIO_EXTENSIONS)]
+
+
+def available_memory_gb():
+    """가용 RAM (psutil 이 없으면 None)"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 ** 3)
+    except ImportError:
+        return None
+
+
+def recommended_pool_size(use_gpu, job_count=None):
+    """
+    CPU 코어와 가용 메모리 기준 워커 수 계산
+    - GPU 모드: 1 (VRAM 을 여러 프로세스가 나눠 쓰면 오히려 느려짐)
+    - CPU 모드: min(코어 / CORES_PER_JOB, 가용RAM / MEMORY_PER_JOB_GB)
+    """
+    if use_gpu:
+        size = 1
+    else:
+        size = max(1, (os.cpu_count() or 1) // CORES_PER_JOB)
+        mem_gb = available_memory_gb()
+        if mem_gb is not None:
+            size = min(size, max(1, int(mem_gb // MEMORY_PER_JOB_GB)))
+    if job_count:
+        size = min(size, job_count)
+    return max(1, size)
+
+
+def decode_to_wav(src, dest, ffmpeg="ffmpeg"):
+    """
+    입력 곡을 PCM WAV 로 미리 디코딩 (분리 서버가 mp3 디코딩을 기다리지 않도록)
+    ffmpeg 사용이 불가능하면 원본을 그대로 복사합니다.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    try:
+        cmd = [ffmpeg, "-y", "-v", "error", "-i", src, "-vn", "-acodec", "pcm_s16le", dest]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                startupinfo=hidden_startupinfo())
+        if result.returncode == 0 and os.path.exists(dest):
+            return dest
+    except OSError:
+        pass
+    dest = os.path.splitext(dest)[0] + os.path.splitext(src)[1]
+    shutil.copyfile(src, dest)
+    return dest
+
+
+class BatchSeparator:
+    """
+    사용법:
+        batch = BatchSeparator(server_cmd, work_dir, pool_size=2)
+        summary = batch.run(files, song_fn, progress_callback, summary_dir=OUTPUT_DIR)
+
+    song_fn(source_path, decoded_path, worker) -> 결과 폴더 경로
+        source_path : 원본 파일 (이름/캐시 키 계산용)
+        decoded_path: prefetch 가 만들어 둔 WAV
+        worker      : 이 스레드 전용 SeparationWorker
+    progress_callback(done_count, total, message)
+    """
+
+    def __init__(self, server_cmd, work_dir, pool_size=1, ffmpeg="ffmpeg", threads_per_worker=None):
+        self.server_cmd = server_cmd
+        self.work_dir = work_dir
+        self.pool_size = max(1, pool_size)
+        self.ffmpeg = ffmpeg
+        self.threads_per_worker = threads_per_worker
+        self._local = threading.local()
+        self._workers = []
+        self._workers_lock = threading.Lock()
+
+    def _thread_worker(self):
+        """풀 스레드마다 전용 분리 서버 1개 (최초 사용 시 생성)"""
+        worker = getattr(self._local, "worker", None)
+        if worker is None:
+            worker = SeparationWorker(self.server_cmd, threads=self.threads_per_worker)
+            self._local.worker = worker
+            with self._workers_lock:
+                self._workers.append(worker)
+        return worker
+
+    def _prefetch(self, files, ready):
+        """다음 곡들을 미리 디코딩하여 큐에 넣음 (큐 크기 = 워커 수 → 최대 그만큼만 앞서감)"""
+        for index, src in enumerate(files):
+            started = time.time()
+            try:
+                decoded = decode_to_wav(src, os.path.join(self.work_dir, f"song_{index:03d}.wav"), self.ffmpeg)
+                ready.put((index, src, decoded, time.time() - started, None))
+            except Exception as e:
+                ready.put((index, src, None, time.time() - started, e))
+        for _ in range(self.pool_size):
+            ready.put(None)
+
+    def run(self, files, song_fn, progress_callback=None, summary_dir=None):
+        files = list(files)
+        total = len(files)
+        results = [None] * total
+        done = {"count": 0}
+        done_lock = threading.Lock()
+        ready = queue.Queue(maxsize=self.pool_size)
+        batch_started = time.time()
+
+        def report(message):
+            if not progress_callback:
+                return
+            count = done["count"]
+            if 0 < count < total:
+                eta = (time.time() - batch_started) / count * (total - count)
+                message = f"{message} · ETA {format_eta(eta)}"
+            progress_callback(count, total, message)
+
+        def pool_loop():
+            while True:
+                item = ready.get()
+                if item is None:
+                    return
+                index, src, decoded, decode_sec, error = item
+                name = os.path.basename(src)
+                record = {"file": src, "decode_sec": round(decode_sec, 2)}
+                started = time.time()
+                try:
+                    if error:
+                        raise error
+                    report(f"▶️ {name}")
+                    worker = self._thread_worker()
+                    worker.last_stats = None
+                    record["output"] = song_fn(src, decoded, worker)
+                    record["status"] = "ok"
+                    # 캐시 적중이면 분리를 건너뛰므로 None
+                    record["separation"] = worker.last_stats
+                except Exception as e:
+                    record["status"] = "error"
+                    record["error"] = str(e)
+                finally:
+                    record["process_sec"] = round(time.time() - started, 2)
+                    record["total_sec"] = round(record["decode_sec"] + record["process_sec"], 2)
+                    results[index] = record
+                    if decoded and os.path.exists(decoded):
+                        try: os.remove(decoded)
+                        except OSError: pass
+                    with done_lock:
+                        done["count"] += 1
+                    report(f"{'✅' if record['status'] == 'ok' else '❌'} {name}")
+
+        os.makedirs(self.work_dir, exist_ok=True)
+        prefetcher = threading.Thread(target=self._prefetch, args=(files, ready), daemon=True)
+        prefetcher.start()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+                for future in [executor.submit(pool_loop) for _ in range(self.pool_size)]:
+                    future.result()
+        finally:
+            prefetcher.join(timeout=1)
+            for worker in self._workers:
+                worker.close()
+            self._workers = []
+
+        summary = {
+            "total_files": total,
+            "succeeded": sum(1 for r in results if r and r["status"] == "ok"),
+            "failed": sum(1 for r in results if r and r["status"] != "ok"),
+            "pool_size": self.pool_size,
+            "wall_sec": round(time.time() - batch_started, 2),
+            "songs": results,
+        }
+        if summary_dir:
+            summary["summary_path"] = self.write_summary(summary, summary_dir)
+        return summary
+
+    @staticmethod
+    def write_summary(summary, summary_dir):
+        """배치 요약(JSON) 저장 후 경로 반환"""
+        os.makedirs(summary_dir, exist_ok=True)
+        path = os.path.join(summary_dir, f"batch_summary_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return path
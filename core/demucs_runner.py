@@ -1,6 +1,603 @@
+# -*- coding: utf-8 -*-
+"""
+🎧 Demucs Runner
+================
+- 기본 모드: Demucs CLI를 그대로 호출 (python -m demucs 와 동일)
+- --json-progress: CLI 모드에서 tqdm 출력 대신 stdout 으로 JSON 진행 이벤트를 출력
+- --serve 모드: 상주 분리 서버
+    모델을 메모리에 올려둔 채 stdin 으로 작업(JSON 한 줄)을 받고,
+    stdout 으로 진행률/완료 이벤트(JSON 한 줄)를 돌려줍니다.
+    곡마다 인터프리터 기동 + torch import + 체크포인트 로딩 비용이 사라집니다.
+
+진행 이벤트 형식 (두 모드 공통):
+    {"event": "progress", "id": ..., "stage": "load|separate|write", "percent": 42,
+     "segment": 12, "segments": 40, "elapsed": 8.1, "samples_per_sec": 512000,
+     "eta": 11.2, "peak_mem_mb": 1830.5}
+    {"event": "done", ..., "stats": {"elapsed": ..., "stages": {...}, "samples": ...,
+     "audio_sec": ..., "samples_per_sec": ..., "peak_mem_mb": ..., "segments": ...}}
+"""
+
+import os
 import sys
-from demucs.__main__ import main
+import json
+import time
+import traceback
+from collections import OrderedDict
+
+from quantized_engine import ENGINE_FLOAT, ENGINE_INT8, load_int8_model
+
+# 상주 서버가 동시에 메모리에 유지하는 최대 모델 수 (GPU VRAM 보호)
+MAX_RESIDENT_MODELS = 2
+
+# int8 엔진 양자화 모델 기본 캐시 폴더 (작업에 engine_cache 가 없을 때)
+DEFAULT_ENGINE_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_cache")
+
+# 긴 입력 구간 분리 설정 (초)
+LONG_FORM_WINDOW_SEC = 60.0
+LONG_FORM_CROSSFADE_SEC = 4.0
+
+
+def load_track(path, audio_channels, samplerate):
+    """
+    분리용 오디오 로딩 (모델 채널 수/샘플레이트로 변환된 torch 텐서 반환)
+    soundfile 로 먼저 읽고, 실패하면 Demucs 의 ffmpeg 기반 AudioFile 을 사용합니다.
+    """
+    import torch
+    from demucs.audio import AudioFile, convert_audio
+    try:
+        import soundfile as sf
+        data, sr = sf.read(path, dtype="float32", always_2d=True)
+        return convert_audio(torch.from_numpy(data.T.copy()), sr, samplerate, audio_channels)
+    except Exception:
+        return AudioFile(path).read(streams=0, samplerate=samplerate, channels=audio_channels)
+
+
+def probe_duration(path):
+    """오디오 길이(초) 조회 (soundfile → ffprobe 순, 실패 시 None)"""
+    try:
+        import soundfile as sf
+        return sf.info(path).duration
+    except Exception:
+        pass
+    try:
+        from demucs.audio import AudioFile
+        return AudioFile(path).duration
+    except Exception:
+        return None
+
+
+def peak_memory_mb(device="cpu"):
+    """현재 프로세스의 최대 메모리 사용량 (MB) - CUDA 는 할당된 VRAM 최대치, 측정 불가 시 None"""
+    if str(device).startswith("cuda"):
+        try:
+            import torch
+            return round(torch.cuda.max_memory_allocated() / (1024 ** 2), 1)
+        except Exception:
+            return None
+    if os.name == "nt":
+        # Windows: 작업 집합 최대치 (peak_wset)
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024 ** 2), 1)
+        except (ImportError, AttributeError):
+            return None
+    # [FIX] POSIX: ru_maxrss = 프로세스 RSS 최대치 (Linux 는 KiB, macOS 는 바이트 단위) - psutil rss 는 현재 값이라 쓰지 않음
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+class ProgressReporter:
+    """
+    작업 1개의 JSON 진행 이벤트 생성기
+    단계(stage) 별 소요 시간, 세그먼트 위치, 처리 속도(samples/sec), ETA, 최대 메모리를 함께 보고합니다.
+    """
+
+    def __init__(self, emit, job_id=None, device="cpu"):
+        self.emit = emit
+        self.job_id = job_id
+        self.device = device
+        self.started = time.time()
+        self.stage = None
+        self.stage_started = self.started
+        self.stage_times = {}
+        self.samples = 0  # 분리 대상 샘플 수 (모델 샘플레이트 기준, 채널당)
+        self.samplerate = None
+        self.segment = 0
+        self.segments = 0
+        self.percent = 0
+        if str(device).startswith("cuda"):
+            try:
+                import torch
+                torch.cuda.reset_peak_memory_stats()
+            except Exception:
+                pass
+
+    def _close_stage(self):
+        if self.stage:
+            elapsed = time.time() - self.stage_started
+            self.stage_times[self.stage] = round(self.stage_times.get(self.stage, 0.0) + elapsed, 3)
+
+    def set_stage(self, stage):
+        self._close_stage()
+        self.stage = stage
+        self.stage_started = time.time()
+        self._emit_progress()
+
+    def step(self, fraction, segment=None, segments=None):
+        """separate 단계의 진행률 (0~1) 갱신"""
+        if segment is not None:
+            self.segment, self.segments = segment, segments
+        self.percent = int(min(max(fraction, 0.0), 1.0) * 100)
+        stage_elapsed = time.time() - self.stage_started
+        eta = stage_elapsed * (1 - fraction) / fraction if fraction > 0 else None
+        rate = self.samples * fraction / stage_elapsed if stage_elapsed > 0 else None
+        self._emit_progress(eta=eta, samples_per_sec=rate)
+
+    def _emit_progress(self, eta=None, samples_per_sec=None):
+        self.emit("progress", id=self.job_id, stage=self.stage, percent=self.percent,
+                  segment=self.segment, segments=self.segments,
+                  elapsed=round(time.time() - self.started, 3),
+                  samples_per_sec=int(samples_per_sec) if samples_per_sec else None,
+                  eta=round(eta, 1) if eta is not None else None,
+                  peak_mem_mb=peak_memory_mb(self.device))
+
+    def summary(self):
+        """완료 시점 성능 기록 (done 이벤트의 stats)"""
+        self._close_stage()
+        self.stage = None
+        separate_sec = self.stage_times.get("separate") or 0.0
+        return {
+            "elapsed": round(time.time() - self.started, 3),
+            "stages": dict(self.stage_times),
+            "samples": self.samples,
+            "audio_sec": round(self.samples / self.samplerate, 3) if self.samplerate else None,
+            "samples_per_sec": int(self.samples / separate_sec) if separate_sec > 0 else None,
+            "peak_mem_mb": peak_memory_mb(self.device),
+            "segments": self.segments,
+        }
+
+
+class _ProgressShim:
+    """
+    demucs.apply 모듈의 tqdm 을 대체하여 세그먼트 단위 진행률을 콜백으로 전달합니다.
+    apply_model 은 (서브모델 수 x shifts) 번의 패스마다 tqdm.tqdm(futures) 를 호출합니다.
+    on_step(fraction, segment, segments)
+    """
+
+    def __init__(self, total_passes, on_step):
+        self.total_passes = max(1, total_passes)
+        self.on_step = on_step
+        self.pass_index = 0
+
+    def tqdm(self, iterable, **kwargs):
+        items = list(iterable)
+        pass_index = self.pass_index
+        self.pass_index += 1
+        per_pass = max(1, len(items))
+        for i, item in enumerate(items):
+            yield item
+            done = (pass_index + (i + 1) / per_pass) / self.total_passes
+            self.on_step(min(done, 1.0), pass_index * per_pass + i + 1, self.total_passes * per_pass)
+
+
+class SeparationServer:
+    """
+    상주 Demucs 분리 서버 (demucs_runner --serve)
+
+    요청 (stdin, 한 줄당 하나):
+        {"id": "...", "input": "song.wav", "out": "stem_dir", "model": "htdemucs_6s",
+         "device": "cuda", "shifts": 2, "overlap": 0.25, "two_stems": "vocals", "threads": 4,
+         "long_form_sec": 1200, "window_sec": 60, "crossfade_sec": 4, "return": "shm",
+         "norm_mean": 0.0, "norm_std": 0.1, "rescale": false,
+         "engine": "int8", "engine_cache": "model_cache", "ffmpeg": "ffmpeg"}
+        (norm_mean/norm_std: 곡 일부(샤드)를 분리할 때 곡 전체 기준 정규화 값, rescale=false: 피크 조정 생략)
+        (engine: "float"(기본) / "int8" - CPU 동적 양자화 엔진, engine_cache: 양자화 모델 캐시 폴더)
+        (ffmpeg: 긴 입력을 WAV 로 변환할 때 쓸 ffmpeg 실행 파일, 기본 "ffmpeg")
+        {"cmd": "release", "name": "<shm 이름>"}   # 클라이언트가 공유 메모리 스템 사용을 마침
+        {"cmd": "shutdown"}
+    응답 (stdout, 한 줄당 하나):
+        {"event": "ready"} / {"event": "progress", "id": ..., "stage": ..., "percent": ..., ...}
+        {"event": "done", "id": ..., "out": ..., "stems": [...], "stats": {...}}
+        "return": "shm" 이면 WAV 대신 공유 메모리에 float32 배열 (스템, 채널, 샘플)을 두고
+        done 이벤트에 "shm": {"name", "shape", "dtype", "stems", "samplerate"} 를 담습니다.
+        (긴 입력은 메모리 상한을 위해 항상 WAV 로 저장)
+        {"event": "error", "id": ..., "message": ...}
+    """
+
+    def __init__(self, channel, max_models=MAX_RESIDENT_MODELS):
+        self.channel = channel
+        self.max_models = max_models
+        self.models = OrderedDict()  # (model_name, device, engine) -> model (LRU)
+        self.shared = {}  # shm 이름 -> SharedMemory (클라이언트가 release 할 때까지 유지)
+
+    def emit(self, event, **fields):
+        fields["event"] = event
+        self.channel.write(json.dumps(fields) + "\n")
+        self.channel.flush()
+
+    def get_model(self, name, device, engine=ENGINE_FLOAT, engine_cache=None):
+        """모델 캐시 조회 (없으면 로딩, 초과 시 가장 오래 쓰지 않은 모델 해제)"""
+        if str(device).startswith("cuda"):
+            engine = ENGINE_FLOAT  # 양자화 연산은 CPU 전용
+        key = (name, device, engine)
+        if key in self.models:
+            self.models.move_to_end(key)
+            return self.models[key]
+
+        import torch
+        from demucs.pretrained import get_model
+
+        if engine == ENGINE_INT8:
+            model, built = load_int8_model(name, engine_cache or DEFAULT_ENGINE_CACHE, get_model)
+            print(f"[int8] {'built' if built else 'loaded'} quantized {name}")
+        else:
+            model = get_model(name)
+        model.eval()
+        # [중요] 미리 대상 장치로 옮겨두면 apply_model 이 작업 후 CPU로 되돌리지 않습니다.
+        model.to(device)
+        self.models[key] = model
+
+        while len(self.models) > self.max_models:
+            _, old = self.models.popitem(last=False)
+            del old
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return model
+
+    @staticmethod
+    def split_outputs(model_sources, sources, two_stems):
+        """모델 출력 → {스템명: 데이터} (two_stems 면 해당 스템 + no_<스템> 2개로 합침)"""
+        stems = dict(zip(model_sources, sources))
+        if not two_stems:
+            return stems
+        main = stems.pop(two_stems)
+        return {two_stems: main, f"no_{two_stems}": sum(stems.values())}
+
+    def separate(self, job, reporter):
+        import torch
+        import demucs.apply
+        from demucs.apply import apply_model, BagOfModels
+        from demucs.audio import save_audio
+
+        device = job.get("device", "cpu")
+        shifts = int(job.get("shifts", 2))
+        overlap = float(job.get("overlap", 0.25))
+        two_stems = job.get("two_stems")
+        out_dir = job["out"]
+
+        if job.get("threads"):
+            torch.set_num_threads(int(job["threads"]))
+
+        reporter.set_stage("load")
+        model = self.get_model(job["model"], device, job.get("engine", ENGINE_FLOAT), job.get("engine_cache"))
+        reporter.samplerate = model.samplerate
+
+        sub_models = len(model.models) if isinstance(model, BagOfModels) else 1
+
+        def run_model(wav, shim):
+            original_tqdm = demucs.apply.tqdm
+            demucs.apply.tqdm = shim
+            try:
+                with torch.no_grad():
+                    return apply_model(model, wav[None], device=device, shifts=shifts,
+                                       split=True, overlap=overlap, progress=True)[0]
+            finally:
+                demucs.apply.tqdm = original_tqdm
+
+        os.makedirs(out_dir, exist_ok=True)
+
+        # [NEW] 긴 입력(DJ 믹스/라이브 녹음)은 구간 단위로 분리하여 메모리를 일정하게 유지
+        long_form_sec = job.get("long_form_sec")
+        if long_form_sec:
+            duration = probe_duration(job["input"])
+            if duration and duration > float(long_form_sec):
+                return {"stems": self.separate_long_form(job, model, run_model, sub_models * max(1, shifts), reporter)}
+
+        wav = load_track(job["input"], model.audio_channels, model.samplerate)
+        reporter.samples = wav.shape[-1]
+        if job.get("norm_std"):
+            mean, std = float(job.get("norm_mean", 0.0)), float(job["norm_std"])
+        else:
+            ref = wav.mean(0)
+            mean, std = ref.mean(), ref.std()
+        wav = (wav - mean) / std
+
+        reporter.set_stage("separate")
+        sources = run_model(wav, _ProgressShim(sub_models * max(1, shifts), reporter.step))
+        sources = sources * std + mean
+
+        reporter.set_stage("write")
+        rescale = job.get("rescale", True)
+        outputs = self.split_outputs(model.sources, sources, two_stems)
+        if job.get("return") == "shm":
+            return {"stems": list(outputs.keys()),
+                    "shm": self.share_outputs(outputs, model.samplerate, rescale)}
+
+        for name, source in outputs.items():
+            save_audio(source.cpu(), os.path.join(out_dir, f"{name}.wav"),
+                       samplerate=model.samplerate, clip="rescale" if rescale else "none")
+
+        return {"stems": list(outputs.keys())}
+
+    def share_outputs(self, outputs, samplerate, rescale=True):
+        """
+        스템들을 공유 메모리 1블록 (스템, 채널, 샘플) float32 로 복사하고 접속 정보를 반환합니다.
+        WAV 저장 경로와 같은 결과가 되도록 save_audio(clip="rescale") 와 동일하게 스템별 피크를 조정합니다.
+        """
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        names = list(outputs.keys())
+        first = outputs[names[0]]
+        shape = (len(names), first.shape[0], first.shape[-1])
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+        data = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        for i, name in enumerate(names):
+            source = outputs[name].detach().cpu()
+            if rescale:
+                source = source / max(1.01 * source.abs().max().item(), 1)
+            data[i] = source.numpy()
+        del data
+        self.shared[shm.name] = shm
+        return {"name": shm.name, "shape": list(shape), "dtype": "float32",
+                "stems": names, "samplerate": samplerate}
+
+    def release(self, name=None):
+        """공유 메모리 해제 (name 이 없으면 전부)"""
+        for key in ([name] if name else list(self.shared)):
+            shm = self.shared.pop(key, None)
+            if shm is None:
+                continue
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def separate_long_form(self, job, model, run_model, passes_per_window, reporter):
+        """
+        고정 길이 구간(window)으로 나눠 분리하고 겹치는 부분은 크로스페이드(overlap-add)로 이어 붙입니다.
+        각 스템은 구간이 끝날 때마다 float WAV 에 이어 쓰므로 최대 메모리는 곡 길이와 무관합니다.
+        끝까지 이어 붙인 뒤 스템별 피크로 save_audio(clip="rescale") 와 같은 조정을 하며 16-bit WAV 로 변환합니다.
+        """
+        import numpy as np
+        import torch
+        import soundfile as sf
+        from demucs.audio import convert_audio
+
+        window_sec = float(job.get("window_sec", LONG_FORM_WINDOW_SEC))
+        crossfade_sec = float(job.get("crossfade_sec", LONG_FORM_CROSSFADE_SEC))
+        out_dir = job["out"]
+        sr = model.samplerate
+
+        src_path = job["input"]
+        temp_input = None
+        try:
+            sf.info(src_path)
+        except Exception:
+            # libsndfile 로 열 수 없는 포맷(mp3 등)은 ffmpeg 로 WAV 스트리밍 변환
+            import subprocess
+            temp_input = os.path.join(out_dir, "_long_form_input.wav")
+            subprocess.run([job.get("ffmpeg", "ffmpeg"), "-y", "-v", "error", "-i", src_path, "-vn",
+                            "-acodec", "pcm_s16le", temp_input], check=True)
+            src_path = temp_input
+
+        writers, peaks = {}, {}
+        float_path = lambda name: os.path.join(out_dir, f"_{name}.float.wav")
+        try:
+            with sf.SoundFile(src_path) as src:
+                in_sr = src.samplerate
+                total_in = src.frames
+
+                # 1차 패스: 전체 곡의 평균/표준편차 (Demucs 정규화 기준을 곡 전체와 동일하게 유지)
+                s1, s2, n = 0.0, 0.0, 0
+                for block in src.blocks(blocksize=in_sr * 30, dtype="float32", always_2d=True):
+                    mono = block.mean(axis=1).astype(np.float64)
+                    s1 += mono.sum()
+                    s2 += (mono ** 2).sum()
+                    n += len(mono)
+                mean = s1 / max(n, 1)
+                std = max((s2 / max(n, 1) - mean ** 2) ** 0.5, 1e-8)
+
+                reporter.samples = int(round(total_in * sr / in_sr))
+                win_in = int(window_sec * in_sr)
+                hop_in = max(1, win_in - int(crossfade_sec * in_sr))
+                starts = list(range(0, total_in, hop_in))
+                # 마지막 구간이 이전 구간에 완전히 포함되면 생략
+                while len(starts) > 1 and starts[-2] + win_in >= total_in:
+                    starts.pop()
+
+                reporter.set_stage("separate")
+                shim = _ProgressShim(passes_per_window * len(starts), reporter.step)
+                to_out = lambda frame: int(round(frame * sr / in_sr))
+                pending = None
+
+                def flush(block):
+                    outputs = self.split_outputs(model.sources, block, job.get("two_stems"))
+                    for name, data in outputs.items():
+                        if name not in writers:
+                            writers[name] = sf.SoundFile(float_path(name), "w", samplerate=sr,
+                                                         channels=data.shape[0], subtype="FLOAT")
+                            peaks[name] = 0.0
+                        # [FIX] 구간마다 자르지 않고 float 그대로 기록 - 피크 조정은 곡 전체 피크로 마지막에 한 번
+                        if data.size:
+                            peaks[name] = max(peaks[name], float(np.abs(data).max()))
+                        writers[name].write(data.T)
+
+                for k, start_in in enumerate(starts):
+                    end_in = min(start_in + win_in, total_in)
+                    src.seek(start_in)
+                    chunk = src.read(end_in - start_in, dtype="float32", always_2d=True)
+                    wav = convert_audio(torch.from_numpy(chunk.T.copy()), in_sr, sr, model.audio_channels)
+                    wav = (wav - mean) / std
+
+                    out_start, out_end = to_out(start_in), to_out(end_in)
+                    length = out_end - out_start
+                    cur = run_model(wav, shim) * std + mean
+                    cur = cur.cpu().numpy()
+                    if cur.shape[-1] < length:
+                        cur = np.pad(cur, ((0, 0), (0, 0), (0, length - cur.shape[-1])))
+                    cur = cur[..., :length]
+
+                    # 이전 구간 꼬리와 선형 크로스페이드
+                    if pending is not None:
+                        ov = min(pending.shape[-1], length)
+                        ramp = np.linspace(0.0, 1.0, ov, dtype=np.float32)
+                        cur[..., :ov] = pending[..., :ov] * (1.0 - ramp) + cur[..., :ov] * ramp
+
+                    if k == len(starts) - 1:
+                        flush(cur)
+                        pending = None
+                    else:
+                        keep = out_end - to_out(starts[k + 1])
+                        flush(cur[..., :length - keep])
+                        pending = cur[..., length - keep:]
+
+            for writer in writers.values():
+                writer.close()
+
+            # 일반 경로 save_audio(clip="rescale") 와 같은 기준: 피크가 1 을 넘는 스템만 1 / (1.01 x 피크) 로 조정
+            reporter.set_stage("write")
+            rescale = job.get("rescale", True)
+            for name, peak in peaks.items():
+                scale = 1.0 / max(1.01 * peak, 1.0) if rescale else 1.0
+                with sf.SoundFile(float_path(name)) as f, \
+                        sf.SoundFile(os.path.join(out_dir, f"{name}.wav"), "w", samplerate=sr,
+                                     channels=f.channels, subtype="PCM_16") as out:
+                    for block in f.blocks(blocksize=sr * 30, dtype="float32", always_2d=True):
+                        out.write(block * np.float32(scale))
+                os.remove(float_path(name))
+        finally:
+            for writer in writers.values():
+                writer.close()
+            for name in writers:
+                if os.path.exists(float_path(name)):
+                    os.remove(float_path(name))
+            if temp_input and os.path.exists(temp_input):
+                os.remove(temp_input)
+
+        return list(writers.keys())
+
+    def serve(self, requests):
+        self.emit("ready", pid=os.getpid())
+        for line in requests:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError:
+                self.emit("error", id=None, message=f"Invalid request: {line[:200]}")
+                continue
+
+            if job.get("cmd") == "shutdown":
+                break
+            if job.get("cmd") == "release":
+                self.release(job.get("name"))
+                continue
+
+            reporter = ProgressReporter(self.emit, job.get("id"), job.get("device", "cpu"))
+            try:
+                result = self.separate(job, reporter)
+                stats = reporter.summary()
+                self.emit("done", id=job.get("id"), out=job["out"], elapsed=stats["elapsed"],
+                          stats=stats, **result)
+            except BaseException as e:
+                # 라이브러리 내부의 sys.exit 도 서버를 죽이지 않고 작업 오류로 처리
+                if isinstance(e, KeyboardInterrupt):
+                    raise
+                traceback.print_exc()
+                self.emit("error", id=job.get("id"), message=f"{type(e).__name__}: {e}")
+
+
+def serve():
+    """--serve 진입점: stdout 을 프로토콜 전용으로 확보하고 일반 print 는 stderr 로 돌립니다."""
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+    os.environ.setdefault("TORCHAUDIO_BACKEND", "soundfile")
+    server = SeparationServer(channel)
+    try:
+        server.serve(sys.stdin)
+    finally:
+        server.release()
+    return 0
+
+
+def run_cli_with_json_progress(argv):
+    """
+    --json-progress 진입점: Demucs CLI 를 그대로 실행하되 tqdm 대신 JSON 진행 이벤트를 stdout 으로 출력
+    (곡 1개 기준, 종료 시 done 또는 error 이벤트 1개)
+    """
+    import demucs.apply
+    from demucs.apply import BagOfModels
+
+    channel = sys.stdout
+
+    def emit(event, **fields):
+        fields["event"] = event
+        channel.write(json.dumps(fields) + "\n")
+        channel.flush()
+
+    device = "cuda" if "cuda" in argv else "cpu"
+    reporter = ProgressReporter(emit, device=device)
+    reporter.set_stage("load")
+    original_apply = demucs.apply.apply_model
+    state = {"depth": 0}
+
+    def apply_with_progress(model, mix, *args, **kwargs):
+        # apply_model 은 내부에서 자기 자신을 재귀 호출하므로 최상위 호출에서만 패스 수를 설정
+        if state["depth"] == 0:
+            sub_models = len(model.models) if isinstance(model, BagOfModels) else 1
+            reporter.samples = mix.shape[-1]
+            reporter.samplerate = getattr(model, "samplerate", None)
+            reporter.set_stage("separate")
+            demucs.apply.tqdm = _ProgressShim(sub_models * max(1, int(kwargs.get("shifts", 1))), reporter.step)
+        state["depth"] += 1
+        try:
+            return original_apply(model, mix, *args, **kwargs)
+        finally:
+            state["depth"] -= 1
+            if state["depth"] == 0:
+                reporter.set_stage("write")
+
+    # 버전에 따라 apply_model 을 가져다 쓰는 모듈이 다름 (4.0: separate, 4.1: api)
+    demucs.apply.apply_model = apply_with_progress
+    for module_name in ("demucs.separate", "demucs.api"):
+        try:
+            module = __import__(module_name, fromlist=["apply_model"])
+            if hasattr(module, "apply_model"):
+                module.apply_model = apply_with_progress
+        except ImportError:
+            pass
+
+    from demucs.separate import main
+    sys.stdout = sys.stderr
+    try:
+        main(argv)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            emit("error", message=f"Demucs exited with code {e.code}")
+            return e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        traceback.print_exc()
+        emit("error", message=f"{type(e).__name__}: {e}")
+        return 1
+    finally:
+        sys.stdout = channel
+    stats = reporter.summary()
+    emit("done", elapsed=stats["elapsed"], stats=stats)
+    return 0
+
 
 if __name__ == '__main__':
+    if "--serve" in sys.argv[1:]:
+        sys.exit(serve())
+
+    if "--json-progress" in sys.argv[1:]:
+        os.environ.setdefault("TORCHAUDIO_BACKEND", "soundfile")
+        sys.exit(run_cli_with_json_progress([a for a in sys.argv[1:] if a != "--json-progress"]))
+
+    from demucs.__main__ import main
     # Demucs의 메인 진입점을 그대로 호출하여 CLI처럼 동작하게 만듦
     sys.exit(main())
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+🗜️ Vectorized Dynamics
+======================
+pydub effects.compress_dynamic_range 를 대체하는 NumPy 컴프레서.
+- 같은 인자/의미: threshold(dBFS), ratio, attack(ms), release(ms)
+- 검출기: 직전 attack 구간의 RMS (모든 채널 합산) - pydub 와 같은 창, 누적합으로 한 번에 계산
+- 목표 감쇠량: (1 - 1/ratio) x 임계값 초과 dB  (pydub 와 같은 식)
+- 엔벨로프: 목표 감쇠량을 attack / release 길이의 이동 평균으로 선형 램프 → 빠른 쪽으로 올라가고 느린 쪽으로 내려감
+  (pydub 는 임계값 아래로 내려가면 감쇠가 풀리지 않고 유지되는 문제가 있어, 여기서는 release 시간 동안 풀림)
+- pydub 파이썬 루프 대비 약 40배 빠름 (30초 스테레오 기준, utils/benchmark_compressor.py)
+- StreamCompressor: 같은 계산을 블록 단위로 (긴 믹스 스트리밍 마스터링용)
+- sidechain_segment: 보컬 프레임 RMS → 샘플 단위 게인 곡선 → 반주에 곱셈 1회 (audio_merger 사이드체인 덕킹)
+"""
+
+import numpy as np
+
+
+def _moving_average(values, frames, history=0):
+    """
+    인과(causal) 이동 평균 - 창이 시작 전을 넘으면 0 으로 채운 것으로 계산 (선형 램프)
+    values 의 앞 history 개는 이전 블록에서 넘겨받은 값 (결과에서 제외)
+    """
+    if frames <= 1:
+        return values[history:]
+    csum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    idx = np.arange(history + 1, len(values) + 1)
+    return (csum[idx] - csum[np.maximum(idx - frames, 0)]) / frames
+
+
+class StreamCompressor:
+    """
+    compress() 와 같은 결과를 블록 단위로 계산 (검출기/엔벨로프 상태를 다음 블록으로 넘김 → 메모리 일정)
+
+    사용법:
+        comp = StreamCompressor(44100, threshold=-12.0, ratio=2.5)
+        for block in blocks:                 # float32 (채널, 샘플)
+            out = comp.process(block)
+    """
+
+    def __init__(self, samplerate, threshold=-20.0, ratio=4.0, attack=5.0, release=50.0):
+        self.threshold = threshold
+        self.ratio = ratio
+        self.attack_frames = max(int(samplerate * attack / 1000.0), 1)
+        self.release_frames = max(int(samplerate * release / 1000.0), 1)
+        self.reset()
+
+    def reset(self):
+        self._power = np.zeros(0)   # 직전 attack 구간의 채널 평균 파워
+        self._target = np.zeros(0)  # 직전 (창 길이 - 1) 구간의 목표 감쇠량
+
+    def gain_reduction_db(self, block):
+        """블록의 샘플별 감쇠량(dB, 0 이상) - 상태를 다음 블록으로 넘김"""
+        frames = block.shape[-1]
+        history = len(self._power)
+
+        # RMS 검출: 프레임 i 는 [i - attack, i) 구간 (pydub rms_at 와 같은 창)
+        power = np.concatenate((self._power, np.mean(np.square(block, dtype=np.float64), axis=0)))
+        csum = np.concatenate(([0.0], np.cumsum(power)))
+        end = np.arange(history, history + frames)
+        start = np.maximum(end - self.attack_frames, 0)
+        count = end - start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rms = np.where(count > 0, np.sqrt(np.maximum(csum[end] - csum[start], 0) / np.maximum(count, 1)), 0.0)
+            over_db = np.where(rms > 0, 20.0 * np.log10(rms / 10 ** (self.threshold / 20.0)), 0.0)
+        target = np.concatenate((self._target, (1.0 - 1.0 / self.ratio) * np.maximum(over_db, 0.0)))
+
+        # 빠른 쪽 램프로 올라가고, 느린 쪽 램프로 내려감
+        rise = _moving_average(target, self.attack_frames, len(self._target))
+        fall = _moving_average(target, self.release_frames, len(self._target))
+
+        self._power = power[-self.attack_frames:]
+        window = max(self.attack_frames, self.release_frames) - 1
+        self._target = target[max(len(target) - window, 0):] if window else np.zeros(0)
+        return np.maximum(rise, fall) if self.release_frames >= self.attack_frames else np.minimum(rise, fall)
+
+    def process(self, block):
+        """float (채널, 샘플) 블록 압축 → float32"""
+        block = np.asarray(block, dtype=np.float32)
+        if block.shape[-1] == 0:
+            return block
+        gain = np.power(10.0, -self.gain_reduction_db(block) / 20.0).astype(np.float32)
+        return block * gain
+
+
+def gain_reduction_db(array, samplerate, threshold=-20.0, ratio=4.0, attack=5.0, release=50.0):
+    """
+    샘플별 감쇠량(dB, 0 이상)
+
+    Args:
+        array: float (채널, 샘플), 풀스케일 = 1.0
+    """
+    return StreamCompressor(samplerate, threshold, ratio, attack, release).gain_reduction_db(array)
+
+
+def compress(array, samplerate, threshold=-20.0, ratio=4.0, attack=5.0, release=50.0):
+    """float (채널, 샘플) 배열 압축 → float32 (채널, 샘플)"""
+    array = np.asarray(array, dtype=np.float32)
+    if array.shape[-1] == 0:
+        return array
+    reduction = gain_reduction_db(array, samplerate, threshold, ratio, attack, release)
+    gain = np.power(10.0, -reduction / 20.0).astype(np.float32)
+    return array * gain
+
+
+def _segment_ints(seg):
+    """AudioSegment → 정수 PCM (채널, 샘플) 뷰 (복사 없음), 풀스케일 값 (샘플 폭 2/4 전용)"""
+    dtype = "<i2" if seg.sample_width == 2 else "<i4"
+    return np.frombuffer(seg.raw_data, dtype=dtype).reshape(-1, seg.channels).T, float(1 << (8 * seg.sample_width - 1))
+
+
+def _to_ints(array, scale, dtype):
+    return np.clip(np.round(np.asarray(array).T.astype(np.float64) * scale), -scale, scale - 1).astype(dtype)
+
+
+def compress_segment(seg, threshold=-20.0, ratio=4.0, attack=5.0, release=50.0):
+    """
+    effects.compress_dynamic_range 와 같은 호출 형태 (AudioSegment → AudioSegment, 샘플 폭/채널 유지)
+    8-bit 등 지원하지 않는 샘플 폭은 pydub 구현으로 처리합니다.
+    """
+    if seg.sample_width not in (2, 4):
+        from pydub import effects
+        return effects.compress_dynamic_range(seg, threshold=threshold, ratio=ratio, attack=attack, release=release)
+
+    samples, scale = _segment_ints(seg)
+    out = compress(samples / scale, seg.frame_rate, threshold, ratio, attack, release)
+    return seg._spawn(data=_to_ints(out, scale, samples.dtype).tobytes())
+
+
+# --- 사이드체인 덕킹 (보컬 레벨로 반주를 눌러 줌) ---
+# 한 번에 처리하는 샘플 수 (60분 곡도 임시 배열이 이 크기를 넘지 않음)
+SIDECHAIN_BLOCK_FRAMES = 1 << 20
+
+
+def frame_rms_db(array, samplerate, frame_ms=50.0):
+    """
+    겹치지 않는 frame_ms 프레임별 RMS (dBFS, 모든 채널 합산 - pydub dBFS 와 같은 기준)
+    프레임은 stride 뷰로 나누고, 마지막의 짧은 프레임은 실제 샘플 수로 평균
+
+    Returns:
+        (프레임별 dB 배열, 프레임 길이(샘플))
+    """
+    frame = max(int(samplerate * frame_ms / 1000.0), 1)
+    power = np.mean(np.square(array, dtype=np.float64), axis=0)
+    count = -(-len(power) // frame)
+    padded = np.zeros(count * frame)
+    padded[:len(power)] = power
+    windows = np.lib.stride_tricks.as_strided(padded, shape=(count, frame),
+                                              strides=(frame * padded.strides[0], padded.strides[0]))
+    sizes = np.minimum(frame, len(power) - np.arange(count) * frame)
+    with np.errstate(divide="ignore"):
+        return 10.0 * np.log10(windows.sum(axis=1) / sizes), frame
+
+
+def sidechain_reduction_db(level_db, threshold_db=-25.0, ratio=2.5, max_reduction_db=6.0):
+    """프레임 레벨 → 프레임별 감쇠 (dB, 0 이하): 임계값 초과분 / ratio, 최대 max_reduction_db"""
+    reduction = np.where(level_db > threshold_db, (threshold_db - level_db) / ratio, 0.0)
+    return np.maximum(reduction, -abs(max_reduction_db))
+
+
+def sidechain_gain_curve(reduction, frame, key_rate, key_frames, start, stop, samplerate):
+    """
+    프레임별 감쇠 → 대상 트랙 [start, stop) 샘플의 게인 (dB)
+    프레임 중심 사이를 시간 기준 선형 보간 (청크 경계 계단/클릭 없음), 키 신호가 끝난 뒤는 0 dB
+    """
+    times = np.arange(start, stop) / float(samplerate)
+    if not len(reduction):
+        return np.zeros(len(times), dtype=np.float32)
+    centers = (np.arange(len(reduction)) * frame + frame / 2.0) / key_rate
+    gain = np.interp(times, centers, reduction)
+    gain[times >= key_frames / float(key_rate)] = 0.0
+    return gain.astype(np.float32)
+
+
+def sidechain_segment(key_seg, seg, threshold_db=-25.0, ratio=2.5, max_reduction_db=6.0, frame_ms=50.0):
+    """
+    키(보컬) AudioSegment 로 seg(반주)를 덕킹 → seg 와 같은 형식의 AudioSegment
+    - 키 프레임 RMS (stride 뷰) → 감쇠 곡선을 샘플 해상도로 보간 → 반주에 곱셈 (블록 단위, 곡 길이에 선형)
+    - 지원하지 않는 샘플 폭이면 None (호출자가 기존 방식으로 처리)
+    """
+    if seg.sample_width not in (2, 4) or key_seg.sample_width not in (2, 4):
+        return None
+
+    key, key_scale = _segment_ints(key_seg)
+    frame = max(int(key_seg.frame_rate * frame_ms / 1000.0), 1)
+    step = max(SIDECHAIN_BLOCK_FRAMES // frame, 1) * frame  # 프레임 경계에 맞춘 블록
+    levels = [frame_rms_db(key[:, i:i + step] / key_scale, key_seg.frame_rate, frame_ms)[0]
+              for i in range(0, key.shape[-1], step)]
+    reduction = sidechain_reduction_db(np.concatenate(levels) if levels else np.zeros(0),
+                                       threshold_db, ratio, max_reduction_db)
+
+    samples, scale = _segment_ints(seg)
+    out = np.empty((samples.shape[-1], samples.shape[0]), dtype=samples.dtype)
+    for i in range(0, samples.shape[-1], SIDECHAIN_BLOCK_FRAMES):
+        block = samples[:, i:i + SIDECHAIN_BLOCK_FRAMES]
+        gain_db = sidechain_gain_curve(reduction, frame, key_seg.frame_rate, key.shape[-1],
+                                       i, i + block.shape[-1], seg.frame_rate)
+        out[i:i + block.shape[-1]] = _to_ints(block * (np.power(np.float32(10.0), gain_db / 20.0) / scale), scale,
+                                              samples.dtype)
+    return seg._spawn(data=out.tobytes())
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+📦 Export Pool
+==============
+최종 믹스 / 스템 백업 파일을 제한된 수의 인코더로 동시에 저장합니다.
+- 작업 1개 = 파일 1개 (MP3 는 ffmpeg 인코더 프로세스, WAV 는 libsndfile - 둘 다 GIL 밖에서 실행)
+- 동시 인코더 수는 MAX_ENCODERS / CPU 코어 수로 제한
+- 파일별 저장 시간 기록 → report()
+- finish_in_background(): 남은 작업(스템 백업)이 끝나면 콜백 - 호출자는 믹스 완료를 먼저 알릴 수 있음
+"""
+
+import os
+import time
+import threading
+import concurrent.futures
+
+# 동시에 실행할 최대 인코더 수
+MAX_ENCODERS = 4
+
+
+class ExportPool:
+    """
+    사용법:
+        pool = ExportPool()
+        mix = pool.submit("mix", "song.mp3", lambda path: session.export_master(params, path))
+        pool.submit("stem", "6S_drums_song.wav", write_drums)
+        mix.result()                                   # 믹스만 기다림
+        pool.finish_in_background(lambda timings, errors: print(pool.report()))
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or max(1, min(MAX_ENCODERS, os.cpu_count() or 1))
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                               thread_name_prefix="export")
+        self._futures = []
+        self._lock = threading.Lock()
+        self.timings = []  # [(라벨, 파일 이름, 초)]
+
+    def submit(self, label, path, write):
+        """write(path) 를 풀에서 실행 → Future (결과: 저장 시간(초))"""
+        def run():
+            started = time.time()
+            write(path)
+            elapsed = time.time() - started
+            with self._lock:
+                self.timings.append((label, os.path.basename(path), elapsed))
+            return elapsed
+
+        future = self._executor.submit(run)
+        self._futures.append(future)
+        return future
+
+    def wait(self):
+        """모든 작업 완료까지 대기 → 실패한 작업의 예외 목록"""
+        errors = []
+        for future in self._futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+        self._executor.shutdown(wait=True)
+        return errors
+
+    def finish_in_background(self, callback=None):
+        """남은 작업을 백그라운드 스레드에서 기다린 뒤 callback(timings, errors) 호출 → 대기 스레드"""
+        def waiter():
+            errors = self.wait()
+            if callback:
+                callback(list(self.timings), errors)
+
+        thread = threading.Thread(target=waiter, daemon=True)
+        thread.start()
+        return thread
+
+    def report(self):
+        """파일별 저장 시간 요약 (저장 순서)"""
+        with self._lock:
+            lines = [f"  {label:<5} {name:<48} {sec:7.2f}s" for label, name, sec in self.timings]
+        return f"Export ({self.max_workers} encoders)\n" + "\n".join(lines)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+🕸️ FX Graph
+===========
+스템별 FX + 믹스 + 마스터 체인을 ffmpeg -filter_complex 한 번으로 처리합니다.
+- 입력: 믹스 버스의 모든 스템을 채널로 이어 붙인 float32 스트림 1개 (stdin, 블록 단위로 전송)
+- 출력: 최종 믹스 float32 (stdout) + 스템별 16-bit WAV (ffmpeg 가 바로 파일로 기록)
+- 효과마다 export → pipe → from_wav 를 반복하던 왕복(최대 5회)을 1회로 줄임
+- 스템 FX 필터 정의는 일반 곡/긴 곡(long_form) 렌더링이 함께 사용
+"""
+
+import subprocess
+import threading
+
+import numpy as np
+
+from subprocess_utils import hidden_startupinfo
+
+# --- 스템 FX (pydub/ffmpeg 왕복 처리와 같은 역할의 ffmpeg 필터) ---
+VOCAL_AIR_AF = "firequalizer=gain='if(gt(f,10000), 4, 0)'"
+DRUM_PUNCH_AF = "acompressor=threshold=-15dB:ratio=3:attack=5:release=100:knee=1"
+BASS_WARMTH_AF = "lowpass=f=500:poles=1,volume=2dB"
+STEREO_WALL_AF = "stereowiden=crossfeed=0.4:drymix=0.6"
+
+# 블록 전송 단위 (샘플)
+BLOCK_FRAMES = 1 << 16
+
+
+class FxGraphError(RuntimeError):
+    pass
+
+
+def stem_fx_filters(pro_fx):
+    """6-Stem Advanced FX 설정 → {스템: 필터}"""
+    fx = {}
+    if pro_fx.get('vocal_air'):
+        fx["vocals"] = VOCAL_AIR_AF
+    if pro_fx.get('drum_punch'):
+        fx["drums"] = DRUM_PUNCH_AF
+    if pro_fx.get('bass_warmth'):
+        fx["bass"] = BASS_WARMTH_AF
+    if pro_fx.get('stereo_wall'):
+        fx["guitar"] = fx["piano"] = STEREO_WALL_AF
+    return fx
+
+
+def build_filter_complex(stem_filters, stem_outputs, master_af=None, channels=2):
+    """
+    -filter_complex 문자열 생성
+
+    Args:
+        stem_filters: 스템 순서대로 필터 문자열 또는 None (입력 스트림의 채널 순서와 같음)
+        stem_outputs: 스템 순서대로 파일 출력 여부 (True 인 스템은 [o<번호>] 라벨로 내보냄)
+        master_af: 합산 뒤 마스터 체인 필터
+    Returns:
+        (filter_complex, 스템 출력 라벨 목록) - 최종 믹스 라벨은 [mix]
+    """
+    count = len(stem_filters)
+    layout = "stereo" if channels == 2 else "mono"
+    parts = [f"[0:a]asplit={count}" + "".join(f"[i{k}]" for k in range(count)) if count > 1 else "[0:a]anull[i0]"]
+    stem_labels, output_labels = [], []
+    for k, af in enumerate(stem_filters):
+        picks = "|".join(f"c{c}=c{k * channels + c}" for c in range(channels))
+        chain = f"[i{k}]pan={layout}|{picks}" + (f",{af}" if af else "")
+        if stem_outputs[k]:
+            parts.append(f"{chain},asplit=2[s{k}][o{k}]")
+            output_labels.append(f"o{k}")
+        else:
+            parts.append(f"{chain}[s{k}]")
+        stem_labels.append(f"s{k}")
+
+    # 합산 (amix 는 입력 수로 나누므로 amerge + pan 으로 정확한 합)
+    if count > 1:
+        sums = "|".join(f"c{c}=" + "+".join(f"c{k * channels + c}" for k in range(count)) for c in range(channels))
+        mixed = "".join(f"[{label}]" for label in stem_labels) + f"amerge=inputs={count},pan={layout}|{sums}"
+    else:
+        mixed = f"[{stem_labels[0]}]anull"
+    parts.append(mixed + (f",{master_af}" if master_af else "") + "[mix]")
+    return ";".join(parts), output_labels
+
+
+def render_fx_graph(stack, samplerate, stem_filters, stem_paths, master_af=None, ffmpeg="ffmpeg"):
+    """
+    스템 배열 → 스템 FX → 합산 → 마스터 체인을 ffmpeg 한 번으로 처리
+
+    Args:
+        stack: (스템, 채널, 샘플) float32 (게인 적용 완료)
+        stem_filters: 스템별 필터 또는 None
+        stem_paths: 스템별 16-bit WAV 저장 경로 또는 None (FX 적용 후 스템)
+    Returns:
+        최종 믹스 float32 (채널, 샘플)
+    """
+    count, channels, frames = stack.shape
+    graph, output_labels = build_filter_complex(stem_filters, [p is not None for p in stem_paths],
+                                                master_af, channels)
+    cmd = [ffmpeg, "-hide_banner", "-v", "error", "-y",
+           "-f", "f32le", "-ar", str(samplerate), "-ac", str(count * channels), "-i", "pipe:0",
+           "-filter_complex", graph]
+    for label, path in zip(output_labels, [p for p in stem_paths if p is not None]):
+        cmd += ["-map", f"[{label}]", "-c:a", "pcm_s16le", path]
+    cmd += ["-map", "[mix]", "-f", "f32le", "-c:a", "pcm_f32le", "pipe:1"]
+
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            startupinfo=hidden_startupinfo())
+    errors = []
+
+    def feed():
+        # (스템, 채널, 샘플) → 인터리브 (샘플, 스템*채널) 블록 단위 전송 (전체 복사본을 만들지 않음)
+        try:
+            for start in range(0, frames, BLOCK_FRAMES):
+                block = stack[:, :, start:start + BLOCK_FRAMES].reshape(count * channels, -1)
+                proc.stdin.write(np.ascontiguousarray(block.T, dtype="<f4").tobytes())
+        except (BrokenPipeError, OSError) as e:
+            errors.append(e)
+        finally:
+            try: proc.stdin.close()
+            except OSError: pass
+
+    def drain_stderr():
+        errors.append(proc.stderr.read())
+
+    writer = threading.Thread(target=feed, daemon=True)
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    writer.start()
+    reader.start()
+    raw = proc.stdout.read()
+    proc.wait()
+    writer.join()
+    reader.join()
+
+    if proc.returncode != 0:
+        message = b"".join(e for e in errors if isinstance(e, bytes)).decode("utf-8", "replace").strip()
+        raise FxGraphError(f"ffmpeg filter graph failed ({proc.returncode}): {message[-500:]}")
+    return np.frombuffer(raw, dtype="<f4").reshape(-1, channels).T
+
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+⏱️ Long-Form Streaming Mixer
+============================
+60분 이상 DJ 믹스/라이브 녹음처럼 긴 곡을 일정한 메모리로 믹싱/마스터링합니다.
+- 스템을 AudioSegment 로 통째로 올리지 않고 soundfile 블록 단위로 읽어 합산
+- 스템 FX 는 ffmpeg 파일→파일 필터 (ffmpeg 내부 스트리밍)
+- 마스터는 일반 곡과 같은 master_bus.stream_master (믹스 파일을 블록 단위로 읽어 피크 분석 → 노멀라이즈 + 리미터 → 인코더)
+"""
+
+import os
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+from master_bus import file_blocks, stream_master
+from subprocess_utils import hidden_startupinfo
+
+# 이 길이(초)를 넘는 입력은 자동으로 구간 분리 + 스트리밍 믹싱
+LONG_FORM_THRESHOLD_SEC = 20 * 60
+# 스트리밍 믹싱 블록 길이 (초)
+BLOCK_SEC = 10
+
+
+def audio_duration(path):
+    """오디오 길이(초), 읽을 수 없으면 None"""
+    try:
+        return sf.info(path).duration
+    except Exception:
+        return None
+
+
+def is_long_form(path, threshold_sec=LONG_FORM_THRESHOLD_SEC):
+    duration = audio_duration(path)
+    return duration is not None and duration > threshold_sec
+
+
+def ffmpeg_filter_file(src, dst, af=None, ffmpeg="ffmpeg", codec_args=("-acodec", "pcm_s16le")):
+    """파일 → 파일 ffmpeg 필터 적용 (ffmpeg 가 내부적으로 스트리밍하므로 메모리 일정)"""
+    cmd = [ffmpeg, "-y", "-v", "error", "-i", src, "-vn"]
+    if af:
+        cmd += ["-af", af]
+    cmd += list(codec_args) + [dst]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            startupinfo=hidden_startupinfo())
+    if result.returncode != 0:
+        err = result.stderr.decode("utf-8", errors="replace").strip()[-500:]
+        raise Exception(f"ffmpeg 처리 실패 ({os.path.basename(dst)}):\n{err}")
+    return dst
+
+
+def stream_mix(tracks, out_path, block_sec=BLOCK_SEC):
+    """
+    여러 트랙을 블록 단위로 더해 32-bit float WAV 로 저장 (합산 결과가 1.0 을 넘어도 잘리지 않음)
+
+    Args:
+        tracks: [(경로, 게인dB), ...] - 결과 길이/샘플레이트/채널은 첫 트랙 기준
+    Returns:
+        float: 믹스 피크 (선형)
+    """
+    handles = [(sf.SoundFile(path), 10 ** (gain_db / 20.0)) for path, gain_db in tracks]
+    try:
+        base = handles[0][0]
+        sr, channels = base.samplerate, base.channels
+        block = int(block_sec * sr)
+        peak = 0.0
+        with sf.SoundFile(out_path, "w", samplerate=sr, channels=channels, subtype="FLOAT") as out:
+            for start in range(0, base.frames, block):
+                n = min(block, base.frames - start)
+                mix = np.zeros((n, channels), dtype=np.float32)
+                for handle, gain in handles:
+                    data = handle.read(n, dtype="float32", always_2d=True)
+                    if data.shape[1] != channels:
+                        data = np.repeat(data.mean(axis=1, keepdims=True), channels, axis=1)
+                    mix[:len(data)] += data * gain
+                peak = max(peak, float(np.abs(mix).max()) if n else 0.0)
+                out.write(mix)
+        return peak
+    finally:
+        for handle, _ in handles:
+            handle.close()
+
+
+def render_stems_long_form(stem_chains, work_dir, out_file, glue_ratio=2.0, dolby=False, hifi=False, ffmpeg="ffmpeg",
+                           progress_callback=None):
+    """
+    긴 곡 믹싱 파이프라인 (메모리 사용량이 곡 길이와 무관)
+
+    Args:
+        stem_chains: [(원본 스템 경로, 처리된 스템 저장 경로, ffmpeg 필터 문자열 또는 None), ...]
+                     처리된 스템(게인+FX 적용)은 백업 파일로도 그대로 남습니다.
+        out_file: 최종 결과 (.mp3 또는 .wav)
+        glue_ratio / dolby / hifi: 마스터 체인 설정 (master_bus.MasterChain)
+    """
+    processed = []
+    for i, (src, dst, af) in enumerate(stem_chains):
+        if progress_callback:
+            progress_callback(f"Long-Form Stem {i + 1}/{len(stem_chains)}...", 0.6 + 0.2 * i / max(1, len(stem_chains)))
+        ffmpeg_filter_file(src, dst, af, ffmpeg)
+        processed.append((dst, 0.0))
+
+    if progress_callback:
+        progress_callback("Long-Form Streaming Mix...", 0.85)
+    os.makedirs(work_dir, exist_ok=True)
+    mix_path = os.path.join(work_dir, "_long_form_mix.wav")
+    stream_mix(processed, mix_path)
+
+    if progress_callback:
+        progress_callback("Long-Form Mastering...", 0.92)
+    try:
+        info = sf.info(mix_path)
+        stream_master(file_blocks(mix_path), info.samplerate, out_file, info.channels, glue_ratio, dolby, hifi,
+                      ffmpeg=ffmpeg)
+        return out_file
+    finally:
+        if os.path.exists(mix_path):
+            os.remove(mix_path)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+🎚️ Streaming Master Bus
+=======================
+마스터 체인(글루 컴프레서 → Dolby/Hi-Fi EQ → 노멀라이즈 → 리미터)을 고정 크기 블록으로 처리합니다.
+- 전체 곡 AudioSegment 를 만들지 않음 → 마스터 단계의 메모리 사용량이 곡 길이와 무관 (블록 몇 개 분량)
+- 컴프레서: dynamics.StreamCompressor (compress_dynamic_range 와 같은 파라미터, 블록 경계에서 상태 유지)
+- EQ: ffmpeg stereotools / bass / treble 과 같은 계수의 M/S 게인 + 바이쿼드 셸프 (필터 상태를 블록마다 넘김)
+- 1차 패스: 체인 출력의 피크만 측정 → 노멀라이즈 게인 계산 (effects.normalize(headroom) 와 같은 기준)
+- 2차 패스: 같은 체인을 처음 상태부터 다시 실행하며 게인 + 리미터(천장 클립)를 적용하고 바로 인코더로 전송
+  (WAV 는 soundfile 로 블록 기록, MP3 는 ffmpeg stdin 으로 블록 전송)
+"""
+
+import os
+import math
+import subprocess
+import threading
+
+import numpy as np
+
+from dynamics import StreamCompressor
+from subprocess_utils import hidden_startupinfo
+
+# 블록 길이 (샘플) - 약 1.5초 @ 44.1 kHz
+MASTER_BLOCK_FRAMES = 1 << 16
+# 마스터 글루 컴프레서 (pydub compress_dynamic_range(threshold=-12) 와 같은 값)
+GLUE_THRESHOLD_DB = -12.0
+# 노멀라이즈 목표 (피크 -0.1 dBFS) / 리미터 천장
+HEADROOM_DB = 0.1
+
+
+def _shelf_coefficients(kind, gain_db, freq, samplerate, slope=1.0):
+    """ffmpeg bass/treble 기본값(width_type=slope, width=1)과 같은 RBJ 셸프 바이쿼드 계수 (b, a)"""
+    a_gain = 10 ** (gain_db / 40.0)
+    w0 = 2 * math.pi * freq / samplerate
+    alpha = math.sin(w0) / 2 * math.sqrt((a_gain + 1 / a_gain) * (1 / slope - 1) + 2)
+    cos_w0, root = math.cos(w0), 2 * math.sqrt(a_gain) * alpha
+    if kind == "low":
+        b = [a_gain * ((a_gain + 1) - (a_gain - 1) * cos_w0 + root),
+             2 * a_gain * ((a_gain - 1) - (a_gain + 1) * cos_w0),
+             a_gain * ((a_gain + 1) - (a_gain - 1) * cos_w0 - root)]
+        a = [(a_gain + 1) + (a_gain - 1) * cos_w0 + root,
+             -2 * ((a_gain - 1) + (a_gain + 1) * cos_w0),
+             (a_gain + 1) + (a_gain - 1) * cos_w0 - root]
+    else:
+        b = [a_gain * ((a_gain + 1) + (a_gain - 1) * cos_w0 + root),
+             -2 * a_gain * ((a_gain - 1) + (a_gain + 1) * cos_w0),
+             a_gain * ((a_gain + 1) + (a_gain - 1) * cos_w0 - root)]
+        a = [(a_gain + 1) - (a_gain - 1) * cos_w0 + root,
+             2 * ((a_gain - 1) - (a_gain + 1) * cos_w0),
+             (a_gain + 1) - (a_gain - 1) * cos_w0 - root]
+    return np.array(b) / a[0], np.array(a) / a[0]
+
+
+def _mid_side(block, mid_level=1.0, side_level=1.4):
+    """ffmpeg stereotools=mlev:slev (LR→LR) 와 같은 M/S 레벨 조정"""
+    if block.shape[0] != 2:
+        return block
+    mid = (block[0] + block[1]) * (0.5 * mid_level)
+    side = (block[0] - block[1]) * (0.5 * side_level)
+    return np.stack((mid + side, mid - side))
+
+
+class MasterChain:
+    """
+    마스터 체인 1개 (상태 포함) - reset() 후 같은 블록을 넣으면 같은 결과
+
+    사용법:
+        chain = MasterChain(44100, glue_ratio=2.5, dolby=True, hifi=False)
+        out = chain.process(block)          # float32 (채널, 샘플)
+    """
+
+    def __init__(self, samplerate, channels=2, glue_ratio=2.0, dolby=False, hifi=False):
+        self.samplerate = int(samplerate)
+        self.channels = channels
+        self.dolby = dolby
+        self.compressor = StreamCompressor(samplerate, threshold=GLUE_THRESHOLD_DB, ratio=glue_ratio)
+        # ffmpeg Dolby(stereotools + bass/treble) / Hi-Fi(treble) 필터와 같은 구성 - 셸프들을 2차 섹션(SOS) 하나로 이어 sosfilt 1회로 처리
+        shelves = []
+        if dolby:
+            shelves += [("low", 3.0, 100), ("high", 3.0, 10000)]
+        if hifi:
+            shelves.append(("high", 4.0, 14000))
+        self.sos = np.array([np.concatenate(_shelf_coefficients(kind, gain_db, freq, samplerate))
+                             for kind, gain_db, freq in shelves]).reshape(-1, 6)
+        self.reset()
+
+    def reset(self):
+        """처음 상태로 (분석 패스와 저장 패스가 같은 결과를 내도록)"""
+        self.compressor.reset()
+        self.zi = np.zeros((len(self.sos), self.channels, 2))
+
+    def process(self, block):
+        out = self.compressor.process(block)
+        if self.dolby:
+            out = _mid_side(out)
+        if len(self.sos):
+            from scipy.signal import sosfilt
+            out, self.zi = sosfilt(self.sos, out, axis=-1, zi=self.zi)
+            out = out.astype(np.float32)
+        return out
+
+
+def array_blocks(array, block_frames=MASTER_BLOCK_FRAMES):
+    """(채널, 샘플) 배열 → 블록 반복자를 만드는 함수 (패스마다 새로 호출)"""
+    return lambda: (array[:, start:start + block_frames] for start in range(0, array.shape[-1], block_frames))
+
+
+def file_blocks(path, block_frames=MASTER_BLOCK_FRAMES):
+    """오디오 파일 → float32 (채널, 샘플) 블록 반복자를 만드는 함수 (패스마다 파일을 다시 엶)"""
+    import soundfile as sf
+
+    def blocks():
+        with sf.SoundFile(path) as f:
+            for block in f.blocks(blocksize=block_frames, dtype="float32", always_2d=True):
+                yield block.T
+    return blocks
+
+
+def analyze_peak(chain, blocks):
+    """1차 패스: 체인 출력의 피크 (선형) - 출력은 보관하지 않음"""
+    chain.reset()
+    peak = 0.0
+    for block in blocks():
+        if block.shape[-1]:
+            peak = max(peak, float(np.abs(chain.process(block)).max()))
+    return peak
+
+
+def normalize_gain(peak, headroom_db=HEADROOM_DB):
+    """피크가 -headroom dBFS 가 되는 선형 게인 (무음이면 1.0)"""
+    return np.float32(10 ** (-headroom_db / 20.0) / peak) if peak > 0 else np.float32(1.0)
+
+
+def master_blocks(chain, blocks, gain, ceiling_db=HEADROOM_DB):
+    """2차 패스: 체인 → 노멀라이즈 게인 → 리미터(천장 클립) 블록 반복자"""
+    ceiling = np.float32(10 ** (-ceiling_db / 20.0))
+    chain.reset()
+    for block in blocks():
+        out = chain.process(block) * gain
+        yield np.clip(out, -ceiling, ceiling, out=out)
+
+
+class BlockEncoder:
+    """
+    블록을 받아 바로 최종 파일로 인코딩 (.wav: soundfile 16-bit, 그 외: ffmpeg stdin → mp3 320k)
+
+    사용법:
+        with BlockEncoder("out.mp3", 44100, 2, ffmpeg=FFMPEG_CMD) as enc:
+            for block in blocks:
+                enc.write(block)
+    """
+
+    def __init__(self, path, samplerate, channels=2, ffmpeg="ffmpeg", bitrate="320k"):
+        self.path = path
+        self.samplerate = int(samplerate)
+        self.channels = channels
+        self.ffmpeg = ffmpeg
+        self.bitrate = bitrate
+        self._file = None
+        self._proc = None
+        self._stderr = []
+
+    def __enter__(self):
+        if self.path.lower().endswith(".wav"):
+            import soundfile as sf
+            self._file = sf.SoundFile(self.path, "w", samplerate=self.samplerate, channels=self.channels,
+                                      subtype="PCM_16")
+        else:
+            cmd = [self.ffmpeg, "-y", "-v", "error", "-f", "f32le", "-ar", str(self.samplerate),
+                   "-ac", str(self.channels), "-i", "pipe:0", "-vn", "-acodec", "libmp3lame", "-b:a", self.bitrate,
+                   self.path]
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                          stderr=subprocess.PIPE, startupinfo=hidden_startupinfo())
+            drain = threading.Thread(target=lambda: self._stderr.append(self._proc.stderr.read()), daemon=True)
+            drain.start()
+            self._drain = drain
+        return self
+
+    def write(self, block):
+        if self._file is not None:
+            self._file.write(block.T)
+        else:
+            self._proc.stdin.write(np.ascontiguousarray(block.T, dtype="<f4").tobytes())
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            self._file.close()
+            return False
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        returncode = self._proc.wait()
+        self._drain.join()
+        if returncode != 0 and exc_type is None:
+            err = b"".join(self._stderr).decode("utf-8", errors="replace").strip()[-500:]
+            raise Exception(f"ffmpeg 인코딩 실패 ({os.path.basename(self.path)}):\n{err}")
+        return False
+
+
+def stream_master(blocks, samplerate, out_path, channels=2, glue_ratio=2.0, dolby=False, hifi=False,
+                  headroom_db=HEADROOM_DB, ffmpeg="ffmpeg"):
+    """
+    블록 입력 → 스트리밍 마스터링 → 최종 파일 (메모리 사용량이 곡 길이와 무관)
+
+    Args:
+        blocks: 호출할 때마다 새 블록 반복자를 돌려주는 함수 (array_blocks / file_blocks)
+    Returns:
+        float: 적용한 노멀라이즈 게인 (dB)
+    """
+    chain = MasterChain(samplerate, channels, glue_ratio, dolby, hifi)
+    gain = normalize_gain(analyze_peak(chain, blocks), headroom_db)
+    with BlockEncoder(out_path, samplerate, channels, ffmpeg=ffmpeg) as encoder:
+        for block in master_blocks(chain, blocks, gain, headroom_db):
+            encoder.write(block)
+    return 20 * math.log10(float(gain))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+🎼 Batch MIDI & Score Converter
+===============================
+"Convert All to MIDI & Scores" 용 스템 병렬 변환 풀.
+- 워커 수는 CPU 코어 수와 가용 메모리로 결정 (워커 1개 = 상주 변환 서버 1개 + 악보 생성 프로세스)
+- 스템을 워커 수만큼 그룹으로 나누고, 그룹마다 자신의 변환 서버에 배치 작업 1개 (transcribe_batch)
+  → 그룹 안에서는 basic-pitch 추론 배치를 계속 공유, 그룹끼리는 서로 다른 프로세스에서 동시에 실행
+- 스템마다 MIDI → 악보 순서 보장 (MIDI 가 성공한 스템만 score_fn 실행, 악보가 실패한 스템도 실패로 집계)
+- 악보 생성이 끝난 스템 수로 진행 보고 progress_callback(done_count, total, message)
+- 첫 번째 그룹은 프로그램 공유 서버(이미 모델이 올라와 있는 서버)를 사용할 수 있습니다.
+"""
+
+import os
+import time
+import threading
+import concurrent.futures
+
+from batch_separator import available_memory_gb
+from perf_records import format_eta
+from transcription_worker import TranscriptionWorker, TranscriptionWorkerError
+
+# 변환 서버 1개(TensorFlow + basic-pitch 모델) + LilyPond 1개가 차지하는 대략적인 메모리
+MEMORY_PER_JOB_GB = 1.5
+# 워커 1개에 배정할 CPU 코어 수 (TensorFlow 추론 스레드 + 악보 생성 프로세스)
+CORES_PER_JOB = 2
+
+
+def recommended_midi_pool_size(stem_count=None):
+    """min(코어 / CORES_PER_JOB, 가용RAM / MEMORY_PER_JOB_GB, 스템 수)"""
+    size = max(1, (os.cpu_count() or 1) // CORES_PER_JOB)
+    mem_gb = available_memory_gb()
+    if mem_gb is not None:
+        size = min(size, max(1, int(mem_gb // MEMORY_PER_JOB_GB)))
+    if stem_count:
+        size = min(size, stem_count)
+    return max(1, size)
+
+
+class MidiBatchConverter:
+    """
+    사용법:
+        converter = MidiBatchConverter(server_cmd, pool_size=2, shared_worker=worker)
+        summary = converter.run(jobs, score_fn, progress_callback, midi_fallback)
+
+    jobs: [(스템 이름, 오디오 경로, 출력 MIDI 경로, 엔진 이름)]
+    score_fn(stem, midi_path)      -> 악보 생성 (None 이면 MIDI 만)
+    midi_fallback(stem, audio, midi_path) -> 변환 서버를 쓸 수 없을 때 스템 1개 변환, 성공 여부 반환
+    """
+
+    def __init__(self, server_cmd, pool_size=1, shared_worker=None):
+        self.server_cmd = server_cmd
+        self.pool_size = max(1, pool_size)
+        self.shared_worker = shared_worker
+        self._workers = []
+
+    def _group_worker(self, group_index):
+        """그룹 0 은 공유 서버(있으면), 나머지는 이 배치 전용 서버"""
+        if group_index == 0 and self.shared_worker is not None:
+            return self.shared_worker
+        worker = TranscriptionWorker(self.server_cmd)
+        self._workers.append(worker)
+        return worker
+
+    def run(self, jobs, score_fn=None, progress_callback=None, midi_fallback=None):
+        jobs = list(jobs)
+        total = len(jobs)
+        pool_size = min(self.pool_size, total) or 1
+        records = [{"stem": stem, "midi": midi_path} for stem, _, midi_path, _ in jobs]
+        done = {"count": 0}
+        done_lock = threading.Lock()
+        batch_started = time.time()
+
+        def report(message):
+            if not progress_callback:
+                return
+            count = done["count"]
+            if 0 < count < total:
+                eta = (time.time() - batch_started) / count * (total - count)
+                message = f"{message} · ETA {format_eta(eta)}"
+            progress_callback(count, total, message)
+
+        def finish(index, status):
+            records[index]["status"] = status
+            with done_lock:
+                done["count"] += 1
+            report(f"{'✅' if status == 'ok' else '❌'} {records[index]['stem'].upper()}")
+
+        def transcribe_group(group_index, indices):
+            """그룹 스템 MIDI 변환 (배치 작업 1개) → 성공 여부 목록"""
+            started = time.time()
+            try:
+                worker = self._group_worker(group_index)
+                results = worker.transcribe_batch([(jobs[i][1], jobs[i][2], jobs[i][3]) for i in indices])
+            except (TranscriptionWorkerError, OSError) as e:
+                if not midi_fallback:
+                    raise
+                print(f"Batched transcription unavailable, converting stems one by one: {e}")
+                ok = []
+                for i in indices:
+                    stem, audio_path, midi_path, _ = jobs[i]
+                    stem_started = time.time()
+                    ok.append(bool(midi_fallback(stem, audio_path, midi_path)))
+                    records[i]["midi_sec"] = round(time.time() - stem_started, 2)
+                return ok
+            ok = []
+            for i, stats in zip(indices, results):
+                records[i]["midi_stats"] = stats
+                records[i]["midi_sec"] = round(time.time() - started, 2)
+                if "error" in stats:
+                    records[i]["error"] = stats["error"]
+                    print(f"MIDI Engine Failed for {jobs[i][0]}: {stats['error']}")
+                else:
+                    print(f"MIDI Success ({jobs[i][0]}): {jobs[i][2]}")
+                ok.append("error" not in stats)
+            return ok
+
+        def group_loop(group_index, indices):
+            """그룹 1개: MIDI(배치) → 스템별 악보 (스템마다 MIDI 다음에 악보)"""
+            names = ", ".join(jobs[i][0].upper() for i in indices)
+            report(f"🎹 Converting MIDI: {names}")
+            try:
+                ok = transcribe_group(group_index, indices)
+            except Exception as e:
+                for i in indices:
+                    records[i]["error"] = str(e)
+                    finish(i, "error")
+                return
+            for i, midi_ok in zip(indices, ok):
+                if not midi_ok:
+                    finish(i, "error")
+                    continue
+                status = "ok"
+                if score_fn:
+                    report(f"📄 Generating Score: {jobs[i][0].upper()}...")
+                    started = time.time()
+                    try:
+                        score_fn(jobs[i][0], jobs[i][2])
+                    except Exception as e:
+                        # [FIX] 악보 실패도 실패로 집계 (MIDI 파일은 남아 있음 → records 의 score_error 로 구분)
+                        records[i]["score_error"] = str(e)
+                        status = "error"
+                    records[i]["score_sec"] = round(time.time() - started, 2)
+                finish(i, status)
+
+        # 스템을 번갈아 나눠 그룹마다 비슷한 양이 되도록
+        groups = [list(range(g, total, pool_size)) for g in range(pool_size)]
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=pool_size,
+                                                       thread_name_prefix="midi") as executor:
+                futures = [executor.submit(group_loop, g, indices) for g, indices in enumerate(groups) if indices]
+                for future in futures:
+                    future.result()
+        finally:
+            for worker in self._workers:
+                worker.close()
+            self._workers = []
+
+        return {
+            "total_stems": total,
+            "succeeded": sum(1 for r in records if r.get("status") == "ok"),
+            "failed": sum(1 for r in records if r.get("status") != "ok"),
+            "pool_size": pool_size,
+            "wall_sec": round(time.time() - batch_started, 2),
+            "stems": records,
+        }
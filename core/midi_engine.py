@@ -1,125 +1,476 @@
 # -*- coding: utf-8 -*-
+"""
+🎹 MIDI Engine
+==============
+오디오 → MIDI 변환 (basic-pitch 우선, 실패 시 librosa piptrack 예비 경로)
+- 변환 엔진은 BACKENDS 레지스트리에 등록 (TranscriptionBackend 상속 + register_backend)
+    "auto" 는 AUTO_ORDER 순서로 예비 경로, 엔진 이름을 지정하면 그 엔진만 사용 (스템별 선택 가능)
+- 기본 모드: python midi_engine.py <input_audio> <output_midi> [--backend auto|basic-pitch|librosa]
+  (곡/스템 1개, 종료 코드로 결과 보고)
+- --serve 모드: 상주 변환 서버
+    TensorFlow import + ICASSP_2022_MODEL_PATH 로딩을 한 번만 하고, stdin 으로 작업(JSON 한 줄)을 받아
+    stdout 으로 완료/오류 이벤트(JSON 한 줄)를 돌려줍니다. (GUI 프로세스와 TensorFlow 환경은 계속 분리)
+- transcribe_batch(): 여러 스템을 한 번에 변환
+    basic-pitch 와 같은 고정 길이 창(AUDIO_N_SAMPLES, 30 프레임 겹침)으로 모든 스템을 자른 뒤
+    스템 구분 없이 BATCH_WINDOWS 개씩 model.predict 배치를 채우고, 출력은 스템별로 다시 나눠 노트 생성
+
+요청 (stdin, 한 줄당 하나):
+    {"id": "...", "input": "6S_piano_song.wav", "output": "song_piano.mid", "backend": "auto",
+     "options": {"onset_threshold": 0.5, "frame_threshold": 0.3, "minimum_note_length": 127.7, ...}}
+    {"cmd": "batch", "id": "...", "jobs": [{"input": ..., "output": ..., "backend": ...}, ...], "options": {...}}
+    {"cmd": "shutdown"}
+응답 (stdout, 한 줄당 하나):
+    {"event": "ready", "pid": ..., "backends": ["basic-pitch", "librosa"]}  (설치된 엔진)
+    {"event": "done", "id": ..., "output": ..., "stats": {"engine": "basic-pitch", "elapsed": ..,
+     "model_load_sec": .., "predict_sec": .., "write_sec": .., "notes": .., "warm": true}}
+    {"event": "done", "id": ..., "results": [스템별 stats 또는 {"error": ...}], "stats": {배치 전체}}  (batch)
+    {"event": "error", "id": ..., "message": ...}
+"""
 import os
 import sys
+import json
+import time
+import traceback
+import importlib.util
 
 # [CRITICAL] TensorFlow legacy Keras setting for TF 2.16+
 os.environ["TF_USE_LEGACY_KERAS"] = "1"
 
-# [NEW] Keras 3 Compatibility fix: Force use of tf-keras if available
-try:
-    import tf_keras as keras
-    import sys
-    sys.modules['keras'] = keras
-except ImportError:
-    pass
-
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python midi_engine.py <input_audio> <output_midi>")
-        sys.exit(1)
+# basic-pitch predict() 에 그대로 넘기는 작업 옵션
+BASIC_PITCH_OPTIONS = ("onset_threshold", "frame_threshold", "minimum_note_length", "minimum_frequency",
+                       "maximum_frequency", "multiple_pitch_bends", "melodia_trick", "midi_tempo")
+
+# 배치 1회에 넣는 창 수 (창 1개 = 약 2초, 스템 구분 없이 채움)
+BATCH_WINDOWS = 16
+# basic-pitch run_inference 와 같은 창 겹침 (출력 프레임 기준)
+OVERLAP_FRAMES = 30
 
-    audio_path = sys.argv[1]
-    output_midi = sys.argv[2]
+_basic_pitch_model = None
 
-    # Try basic-pitch first
+
+def _use_tf_keras():
+    """[NEW] Keras 3 Compatibility fix: Force use of tf-keras if available
+    (basic-pitch 를 쓸 때만 실행 - librosa 엔진만 쓰는 프로세스는 TensorFlow 를 올리지 않음)"""
     try:
-        from basic_pitch.inference import predict
-        from basic_pitch import ICASSP_2022_MODEL_PATH
-        
-        print(f"Predicting MIDI with basic-pitch for {audio_path}...")
-        model_output, midi_data, note_events = predict(
-            audio_path, 
-            model_or_model_path=ICASSP_2022_MODEL_PATH
-        )
-        
-        os.makedirs(os.path.dirname(output_midi), exist_ok=True)
-        midi_data.write(output_midi)
-        print(f"MIDI Saved successfully: {output_midi}")
-        sys.exit(0)
+        import tf_keras as keras
+        sys.modules['keras'] = keras
     except ImportError:
-        print("basic-pitch not available, using librosa fallback...")
-    except Exception as e:
-        print(f"basic-pitch failed: {e}, using librosa fallback...")
-    
-    # Fallback to librosa + pretty_midi
+        pass
+
+
+def load_basic_pitch_model():
+    """basic-pitch 모델 (프로세스당 1회 로딩) → (모델, 이번 호출의 로딩 시간)"""
+    global _basic_pitch_model
+    if _basic_pitch_model is not None:
+        return _basic_pitch_model, 0.0
+    started = time.time()
+    _use_tf_keras()
+    from basic_pitch import ICASSP_2022_MODEL_PATH
+    try:
+        from basic_pitch.inference import Model
+        _basic_pitch_model = Model(ICASSP_2022_MODEL_PATH)
+    except ImportError:
+        # Model 클래스가 없는 버전은 경로를 넘기면 predict 가 매번 로딩 (예전 동작과 동일)
+        _basic_pitch_model = ICASSP_2022_MODEL_PATH
+    return _basic_pitch_model, time.time() - started
+
+
+def transcribe_basic_pitch(audio_path, output_midi, options=None):
+    """basic-pitch 변환 → 성능 기록 dict (ImportError/모델 오류는 호출자에게 전달)"""
+    model, load_sec = load_basic_pitch_model()
+    from basic_pitch.inference import predict
+
+    kwargs = {k: v for k, v in (options or {}).items() if k in BASIC_PITCH_OPTIONS}
+    print(f"Predicting MIDI with basic-pitch for {audio_path}...")
+    started = time.time()
+    model_output, midi_data, note_events = predict(audio_path, model_or_model_path=model, **kwargs)
+    predict_sec = time.time() - started
+
+    started = time.time()
+    os.makedirs(os.path.dirname(output_midi), exist_ok=True)
+    midi_data.write(output_midi)
+    print(f"MIDI Saved successfully: {output_midi}")
+    return {"engine": "basic-pitch", "model_load_sec": round(load_sec, 3), "predict_sec": round(predict_sec, 3),
+            "write_sec": round(time.time() - started, 3), "notes": len(note_events), "warm": load_sec == 0.0}
+
+
+def _note_kwargs(options):
+    """predict() 옵션 → note_creation.model_output_to_notes 인자 (basic-pitch predict 와 같은 기본값/변환)"""
+    from basic_pitch.constants import AUDIO_SAMPLE_RATE, FFT_HOP
+    options = options or {}
+    minimum_note_length = options.get("minimum_note_length", 127.70)
+    return dict(onset_thresh=options.get("onset_threshold", 0.5),
+                frame_thresh=options.get("frame_threshold", 0.3),
+                min_note_len=int(round(minimum_note_length / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP))),
+                min_freq=options.get("minimum_frequency"),
+                max_freq=options.get("maximum_frequency"),
+                multiple_pitch_bends=options.get("multiple_pitch_bends", False),
+                melodia_trick=options.get("melodia_trick", True),
+                midi_tempo=options.get("midi_tempo", 120))
+
+
+def _window_audio(audio, n_samples, hop_size, overlap_len):
+    """basic-pitch get_audio_input 과 같은 창 나누기 → float32 (창 수, n_samples, 1)"""
+    import numpy as np
+    audio = np.concatenate([np.zeros(overlap_len // 2, dtype=np.float32), audio])
+    starts = range(0, len(audio), hop_size)
+    windows = np.zeros((len(starts), n_samples, 1), dtype=np.float32)
+    for i, start in enumerate(starts):
+        chunk = audio[start:start + n_samples]
+        windows[i, :len(chunk), 0] = chunk
+    return windows
+
+
+def _predict_windows(model, windows, batch_windows):
+    """창 배열 → 모델 출력 {note/onset/contour: (창 수, 프레임, 빈)} (배치가 안 되는 모델은 창 1개씩)"""
+    import numpy as np
+    outputs = {}
+    batched = batch_windows > 1
+    for start in range(0, len(windows), batch_windows if batched else 1):
+        chunk = windows[start:start + batch_windows] if batched else windows[start:start + 1]
+        try:
+            result = model.predict(chunk)
+        except Exception:
+            if not batched or len(chunk) == 1:
+                raise
+            # 배치 차원이 고정된 모델(TFLite 등) → 남은 창은 1개씩
+            batched = False
+            result = {}
+            for i in range(len(chunk)):
+                for k, v in model.predict(chunk[i:i + 1]).items():
+                    result.setdefault(k, []).append(v)
+            result = {k: np.concatenate(v) for k, v in result.items()}
+        for k, v in result.items():
+            outputs.setdefault(k, []).append(np.asarray(v))
+    return {k: np.concatenate(v) for k, v in outputs.items()}, batched
+
+
+def transcribe_batch(jobs, options=None, batch_windows=BATCH_WINDOWS):
+    """
+    여러 스템 → MIDI 파일 (basic-pitch 추론 배치를 스템 사이에서 공유)
+
+    Args:
+        jobs: [(오디오 경로, 출력 MIDI 경로[, 엔진 이름]), ...]
+              엔진이 없거나 "auto"/"basic-pitch" 인 스템만 배치로 묶고, 나머지는 지정한 엔진으로 1개씩 변환
+        options: basic-pitch predict 옵션 (모든 스템 공통)
+    Returns:
+        (스템별 stats 또는 {"error": ...} 목록, 배치 전체 stats)
+        basic-pitch 를 쓸 수 없으면 스템마다 transcribe() (auto 스템은 librosa 예비 경로 포함)
+    """
+    import numpy as np
+
+    started = time.time()
+    jobs = [(job[0], job[1], job[2] if len(job) > 2 else None) for job in jobs]
+    results = [None] * len(jobs)
+    batch_indices = []
+    for index, (audio_path, output_midi, backend) in enumerate(jobs):
+        if backend in (None, BACKEND_AUTO, BasicPitchBackend.name):
+            batch_indices.append(index)
+        else:
+            results[index] = _transcribe_job(audio_path, output_midi, options, backend)
+    if not batch_indices:
+        return results, {"engine": "per-stem", "stems": len(jobs), "elapsed": round(time.time() - started, 3)}
+
     try:
+        model, load_sec = load_basic_pitch_model()
         import librosa
-        import pretty_midi
-        import numpy as np
-        
-        print(f"Loading audio: {audio_path}...")
-        y, sr = librosa.load(audio_path, sr=22050, mono=True)
-        
-        print("Extracting pitch information...")
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
-        
-        midi = pretty_midi.PrettyMIDI()
-        instrument = pretty_midi.Instrument(program=0)
-        
-        hop_length = 512
-        frame_duration = hop_length / sr
-        
-        current_note = None
-        note_start = 0
-        
-        for i in range(pitches.shape[1]):
-            index = magnitudes[:, i].argmax()
-            pitch_hz = pitches[index, i]
-            
-            if pitch_hz > 0:
-                midi_note = int(librosa.hz_to_midi(pitch_hz))
-                
-                if current_note is None:
-                    current_note = midi_note
-                    note_start = i * frame_duration
-                elif midi_note != current_note:
-                    note_end = i * frame_duration
-                    if note_end - note_start > 0.1:
-                        note = pretty_midi.Note(
-                            velocity=100,
-                            pitch=current_note,
-                            start=note_start,
-                            end=note_end
-                        )
-                        instrument.notes.append(note)
-                    current_note = midi_note
-                    note_start = i * frame_duration
-            else:
-                if current_note is not None:
-                    note_end = i * frame_duration
-                    if note_end - note_start > 0.1:
-                        note = pretty_midi.Note(
-                            velocity=100,
-                            pitch=current_note,
-                            start=note_start,
-                            end=note_end
-                        )
-                        instrument.notes.append(note)
-                    current_note = None
-        
-        if current_note is not None:
-            note_end = len(y) / sr
-            if note_end - note_start > 0.1:
-                note = pretty_midi.Note(
-                    velocity=100,
-                    pitch=current_note,
-                    start=note_start,
-                    end=note_end
-                )
-                instrument.notes.append(note)
-        
-        midi.instruments.append(instrument)
-        os.makedirs(os.path.dirname(output_midi), exist_ok=True)
-        midi.write(output_midi)
-        print(f"MIDI saved successfully: {output_midi} ({len(instrument.notes)} notes)")
+        from basic_pitch.constants import AUDIO_SAMPLE_RATE, AUDIO_N_SAMPLES, FFT_HOP
+        from basic_pitch.inference import unwrap_output
+        from basic_pitch import note_creation
+        if isinstance(model, str):
+            raise ImportError("basic-pitch Model class unavailable")
+    except Exception as e:
+        print(f"Batched basic-pitch unavailable ({e}), transcribing stems one by one...")
+        for index in batch_indices:
+            audio_path, output_midi, backend = jobs[index]
+            results[index] = _transcribe_job(audio_path, output_midi, options, backend)
+        return results, {"engine": "sequential", "stems": len(jobs), "elapsed": round(time.time() - started, 3)}
+
+    overlap_len = OVERLAP_FRAMES * FFT_HOP
+    hop_size = AUDIO_N_SAMPLES - overlap_len
+
+    # [1] 스템별 로딩 + 창 나누기 (로딩 실패 스템은 건너뜀)
+    loaded = []  # (작업 번호, 원본 길이, 창 수)
+    windows = []
+    for index in batch_indices:
+        audio_path = jobs[index][0]
+        load_started = time.time()
+        try:
+            audio, _ = librosa.load(str(audio_path), sr=AUDIO_SAMPLE_RATE, mono=True)
+        except Exception as e:
+            results[index] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        stem_windows = _window_audio(audio, AUDIO_N_SAMPLES, hop_size, overlap_len)
+        windows.append(stem_windows)
+        loaded.append((index, len(audio), len(stem_windows)))
+        results[index] = {"engine": "basic-pitch", "load_sec": round(time.time() - load_started, 3),
+                          "windows": len(stem_windows)}
+
+    # [2] 모든 스템의 창을 이어 붙여 배치 추론
+    predict_started = time.time()
+    outputs, batched = _predict_windows(model, np.concatenate(windows), batch_windows) if windows else ({}, False)
+    predict_sec = time.time() - predict_started
+    total_windows = sum(count for _, _, count in loaded)
+
+    # [3] 스템별로 출력을 나눠 노트 생성 + 저장
+    note_kwargs = _note_kwargs(options)
+    offset = 0
+    for index, original_length, count in loaded:
+        output_midi = jobs[index][1]
+        stats = results[index]
+        stem_output = {k: unwrap_output(v[offset:offset + count], original_length, OVERLAP_FRAMES)
+                       for k, v in outputs.items()}
+        offset += count
+        try:
+            notes_started = time.time()
+            midi_data, note_events = note_creation.model_output_to_notes(stem_output, **note_kwargs)
+            os.makedirs(os.path.dirname(output_midi), exist_ok=True)
+            midi_data.write(output_midi)
+            stats.update(notes=len(note_events), notes_sec=round(time.time() - notes_started, 3),
+                         predict_sec=round(predict_sec * count / total_windows, 3))
+            print(f"MIDI Saved successfully: {output_midi}")
+        except Exception as e:
+            results[index] = {"error": f"{type(e).__name__}: {e}"}
+
+    batch_stats = {"engine": "basic-pitch", "stems": len(jobs), "windows": total_windows, "batched": batched,
+                   "batch_windows": batch_windows, "model_load_sec": round(load_sec, 3),
+                   "predict_sec": round(predict_sec, 3), "elapsed": round(time.time() - started, 3),
+                   "warm": load_sec == 0.0}
+    return results, batch_stats
+
+
+def piptrack_notes(pitches, magnitudes, frame_duration, total_duration, min_duration=0.1):
+    """
+    piptrack 결과 → [(MIDI 음높이, 시작, 끝)] (프레임 루프 없이 배열 연산으로 처리)
+    - 프레임마다 크기가 가장 큰 빈의 음높이 → MIDI 번호 (소수점 버림)
+    - 같은 음높이가 이어지는 구간(run-length)이 노트 1개, 무음 프레임이나 음높이 변화에서 끝남
+    - 마지막 노트는 오디오 끝(total_duration)까지, min_duration 이하인 노트는 버림
+    """
+    import librosa
+    import numpy as np
+
+    n_frames = pitches.shape[1]
+    if n_frames == 0:
+        return []
+    frame_hz = pitches[magnitudes.argmax(axis=0), np.arange(n_frames)]
+    voiced = frame_hz > 0
+    midi_notes = np.zeros(n_frames, dtype=int)
+    midi_notes[voiced] = librosa.hz_to_midi(frame_hz[voiced]).astype(int)
+
+    # 유성/무성 전환 또는 음높이 변화가 있는 프레임이 구간 경계
+    changes = np.flatnonzero((voiced[1:] != voiced[:-1]) | (midi_notes[1:] != midi_notes[:-1])) + 1
+    run_starts = np.concatenate(([0], changes))
+    run_ends = np.concatenate((changes, [n_frames]))
+    keep = voiced[run_starts]
+    run_starts, run_ends = run_starts[keep], run_ends[keep]
+
+    starts = run_starts * frame_duration
+    ends = run_ends * frame_duration
+    if len(run_ends) and run_ends[-1] == n_frames:
+        ends[-1] = total_duration
+    keep = ends - starts > min_duration
+    return [(int(p), float(s), float(e))
+            for p, s, e in zip(midi_notes[run_starts[keep]], starts[keep], ends[keep])]
+
+
+def transcribe_librosa(audio_path, output_midi):
+    """librosa piptrack + pretty_midi 예비 경로 → 성능 기록 dict"""
+    import librosa
+    import pretty_midi
+
+    started = time.time()
+    print(f"Loading audio: {audio_path}...")
+    y, sr = librosa.load(audio_path, sr=22050, mono=True)
+
+    print("Extracting pitch information...")
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
+
+    midi = pretty_midi.PrettyMIDI()
+    instrument = pretty_midi.Instrument(program=0)
+
+    hop_length = 512
+    frame_duration = hop_length / sr
+
+    for pitch, note_start, note_end in piptrack_notes(pitches, magnitudes, frame_duration, len(y) / sr):
+        instrument.notes.append(pretty_midi.Note(velocity=100, pitch=pitch, start=note_start, end=note_end))
+
+    midi.instruments.append(instrument)
+    os.makedirs(os.path.dirname(output_midi), exist_ok=True)
+    midi.write(output_midi)
+    print(f"MIDI saved successfully: {output_midi} ({len(instrument.notes)} notes)")
+    return {"engine": "librosa", "predict_sec": round(time.time() - started, 3), "notes": len(instrument.notes)}
+
+
+class TranscriptionBackend:
+    """
+    변환 엔진 인터페이스 - 새 엔진은 상속 후 register_backend() 로 등록하면
+    CLI(--backend), 상주 서버 작업("backend"), transcribe_batch 스템별 선택에서 바로 쓸 수 있습니다.
+    """
+    name = None
+
+    def is_available(self):
+        """의존 패키지가 설치되어 있는지 (import 하지 않고 확인)"""
+        return True
+
+    def transcribe(self, audio_path, output_midi, options=None):
+        """오디오 1개 → MIDI 파일 1개, 성능 기록 dict 반환 (실패 시 예외)"""
+        raise NotImplementedError
+
+
+class BasicPitchBackend(TranscriptionBackend):
+    """Spotify basic-pitch (다성, TensorFlow/ONNX 모델)"""
+    name = "basic-pitch"
+
+    def is_available(self):
+        return importlib.util.find_spec("basic_pitch") is not None
+
+    def transcribe(self, audio_path, output_midi, options=None):
+        return transcribe_basic_pitch(audio_path, output_midi, options)
+
+
+class LibrosaBackend(TranscriptionBackend):
+    """librosa piptrack (단선율, 모델 없음)"""
+    name = "librosa"
+
+    def is_available(self):
+        return all(importlib.util.find_spec(m) is not None for m in ("librosa", "pretty_midi"))
+
+    def transcribe(self, audio_path, output_midi, options=None):
+        return transcribe_librosa(audio_path, output_midi)
+
+
+BACKENDS = {}
+# auto: 앞 엔진이 실패하면 다음 엔진으로 (기존 basic-pitch → librosa 예비 경로)
+BACKEND_AUTO = "auto"
+AUTO_ORDER = ("basic-pitch", "librosa")
+
+
+def register_backend(backend):
+    """엔진 등록 (같은 이름이면 교체)"""
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name} (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+register_backend(BasicPitchBackend())
+register_backend(LibrosaBackend())
+
+
+def transcribe(audio_path, output_midi, options=None, backend=None):
+    """
+    오디오 1개 → MIDI 파일 1개 → 성능 기록 dict
+    backend 를 지정하면 그 엔진만 사용 (실패하면 예외), 없거나 "auto" 면 AUTO_ORDER 순서로 예비 경로
+    """
+    started = time.time()
+    if backend and backend != BACKEND_AUTO:
+        stats = get_backend(backend).transcribe(audio_path, output_midi, options)
+    else:
+        order = [name for name in AUTO_ORDER if name in BACKENDS]
+        for position, name in enumerate(order):
+            try:
+                stats = BACKENDS[name].transcribe(audio_path, output_midi, options)
+                break
+            except Exception as e:
+                if position == len(order) - 1:
+                    raise
+                reason = "not available" if isinstance(e, ImportError) else f"failed: {e}"
+                print(f"{name} {reason}, using {order[position + 1]} fallback...")
+    stats["elapsed"] = round(time.time() - started, 3)
+    return stats
+
+
+def _transcribe_job(audio_path, output_midi, options, backend):
+    """transcribe() 결과 또는 {"error": ...} (배치 안의 스템 1개 실패가 나머지를 막지 않도록)"""
+    try:
+        return transcribe(audio_path, output_midi, options, backend)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+class TranscriptionServer:
+    """상주 변환 서버 (midi_engine --serve) - 프로토콜은 모듈 설명 참고"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def emit(self, event, **fields):
+        fields["event"] = event
+        self.channel.write(json.dumps(fields) + "\n")
+        self.channel.flush()
+
+    def serve(self, requests):
+        self.emit("ready", pid=os.getpid(), backends=available_backends())
+        for line in requests:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError:
+                self.emit("error", id=None, message=f"Invalid request: {line[:200]}")
+                continue
+
+            if job.get("cmd") == "shutdown":
+                break
+
+            if job.get("cmd") == "batch":
+                try:
+                    results, stats = transcribe_batch([(j["input"], j["output"], j.get("backend"))
+                                                       for j in job["jobs"]], job.get("options"))
+                    self.emit("done", id=job.get("id"), results=results, stats=stats)
+                except BaseException as e:
+                    if isinstance(e, KeyboardInterrupt):
+                        raise
+                    traceback.print_exc()
+                    self.emit("error", id=job.get("id"), message=f"{type(e).__name__}: {e}")
+                continue
+
+            try:
+                stats = transcribe(job["input"], job["output"], job.get("options"), job.get("backend"))
+                self.emit("done", id=job.get("id"), output=job["output"], stats=stats)
+            except BaseException as e:
+                # 라이브러리 내부의 sys.exit 도 서버를 죽이지 않고 작업 오류로 처리
+                if isinstance(e, KeyboardInterrupt):
+                    raise
+                traceback.print_exc()
+                self.emit("error", id=job.get("id"), message=f"{type(e).__name__}: {e}")
+
+
+def serve():
+    """--serve 진입점: stdout 을 프로토콜 전용으로 확보하고 일반 print 는 stderr 로 돌립니다."""
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+    TranscriptionServer(channel).serve(sys.stdin)
+    return 0
+
+
+def main(default_backend=BACKEND_AUTO):
+    import argparse
+    parser = argparse.ArgumentParser(description="Audio → MIDI transcription")
+    parser.add_argument("input_audio")
+    parser.add_argument("output_midi")
+    parser.add_argument("--backend", default=default_backend, choices=[BACKEND_AUTO] + list(BACKENDS),
+                        help=f"변환 엔진 (기본: {default_backend})")
+    args = parser.parse_args()
+
+    try:
+        transcribe(args.input_audio, args.output_midi, backend=args.backend)
         sys.exit(0)
-        
     except Exception as e:
         print(f"MIDI Engine Error: {str(e)}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
 if __name__ == "__main__":
+    if "--serve" in sys.argv[1:]:
+        sys.exit(serve())
     main()
-
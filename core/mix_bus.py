@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+🎚️ NumPy Mix Bus
+================
+AudioSegment.overlay / "+ gain" 반복 대신 float32 배열 하나로 스템을 믹싱합니다.
+- 스템을 (스템, 채널, 샘플) 배열 하나에 쌓고, 스템별 게인은 브로드캐스트 곱셈 한 번으로 적용
+- 합산도 한 번 (overlay 처럼 스템마다 int16 버퍼를 다시 만들지 않음)
+- 정수 PCM(int16) 변환은 마스터 체인/파일 저장 직전에 한 번만
+- pydub 의 1차 high/low pass 필터와 같은 계산을 scipy 로 벡터화하여 제공
+"""
+
+import numpy as np
+
+from stem_arrays import to_int16, to_audio_segment
+
+
+def db_to_gain(db):
+    return np.float32(10.0 ** (float(db) / 20.0))
+
+
+def segment_to_array(segment):
+    """pydub AudioSegment → float32 (채널, 샘플), 풀스케일 = 1.0"""
+    samples = np.asarray(segment.get_array_of_samples(), dtype=np.float32)
+    scale = float(1 << (8 * segment.sample_width - 1))
+    return (samples.reshape(-1, segment.channels).T / scale).astype(np.float32, copy=False)
+
+
+def fit_length(array, length):
+    """(채널, 샘플) 배열을 length 샘플로 자르거나 0 으로 채움"""
+    if array.shape[-1] >= length:
+        return array[..., :length]
+    return np.pad(array, ((0, 0), (0, length - array.shape[-1])))
+
+
+def high_pass(array, cutoff, samplerate):
+    """pydub high_pass_filter 와 같은 1차 RC 하이패스 (채널별)"""
+    from scipy.signal import lfilter
+    rc = 1.0 / (cutoff * 2 * np.pi)
+    alpha = rc / (rc + 1.0 / samplerate)
+    out = np.empty_like(array)
+    out[:, :1] = array[:, :1]
+    # y[i] = alpha * (y[i-1] + x[i] - x[i-1]),  y[0] = x[0]  (첫 샘플 이후의 초기 상태는 0)
+    out[:, 1:] = lfilter([alpha, -alpha], [1.0, -alpha], array[:, 1:], axis=-1)
+    return out
+
+
+def low_pass(array, cutoff, samplerate):
+    """pydub low_pass_filter 와 같은 1차 RC 로우패스 (채널별)"""
+    from scipy.signal import lfilter
+    rc = 1.0 / (cutoff * 2 * np.pi)
+    dt = 1.0 / samplerate
+    alpha = dt / (rc + dt)
+    out = np.empty_like(array)
+    out[:, :1] = array[:, :1]
+    if array.shape[-1] > 1:
+        # y[i] = y[i-1] + alpha * (x[i] - y[i-1]),  y[0] = x[0]
+        zi = ((1.0 - alpha) * array[:, :1]).astype(np.float64)
+        out[:, 1:] = lfilter([alpha], [1.0, -(1.0 - alpha)], array[:, 1:], axis=-1, zi=zi)[0]
+    return out
+
+
+class MixBus:
+    """
+    사용법:
+        bus = MixBus(44100)
+        bus.add("vocals", vocals_array)              # float32 (채널, 샘플), 길이는 첫 스템 기준
+        bus.add("drums", drums_array)
+        bus.apply_gains({"vocals": 2.0, "drums": -1.5})   # dB, 한 번의 브로드캐스트 곱셈
+        bus["drums"] = some_fx(bus["drums"])         # 스템별 후처리 (배열 교체)
+        final = bus.to_segment()                     # 합산 1회 → int16 AudioSegment
+    """
+
+    def __init__(self, samplerate, channels=2):
+        self.samplerate = int(samplerate)
+        self.channels = channels
+        self.names = []
+        self._pending = []
+        self._stack = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    @property
+    def length(self):
+        if self._stack is not None:
+            return self._stack.shape[-1]
+        return self._pending[0].shape[-1] if self._pending else 0
+
+    def add(self, name, array):
+        """스템 추가 (모노는 버스 채널 수로 복제, 길이는 첫 스템에 맞춤 - overlay 와 같은 규칙)"""
+        array = np.asarray(array, dtype=np.float32)
+        if array.ndim == 1:
+            array = array[None, :]
+        if array.shape[0] != self.channels:
+            array = np.repeat(array[:1], self.channels, axis=0)
+        if self.names:
+            array = fit_length(array, self.length)
+        self.names.append(name)
+        self._pending.append(array)
+
+    @property
+    def stack(self):
+        """(스템, 채널, 샘플) float32 배열"""
+        if self._pending:
+            parts = [] if self._stack is None else [self._stack]
+            self._stack = np.concatenate(parts + [p[None] for p in self._pending], axis=0)
+            self._pending = []
+        if self._stack is None:
+            self._stack = np.zeros((0, self.channels, 0), dtype=np.float32)
+        return self._stack
+
+    def __getitem__(self, name):
+        return self.stack[self.names.index(name)]
+
+    def __setitem__(self, name, array):
+        array = np.asarray(array, dtype=np.float32)
+        if array.shape[0] != self.channels:
+            array = np.repeat(array[:1], self.channels, axis=0)
+        self.stack[self.names.index(name)] = fit_length(array, self.length)
+
+    def apply_gains(self, gains_db):
+        """{이름: dB} 게인을 모든 스템에 한 번에 적용 (없는 이름은 0 dB)"""
+        gains = np.array([db_to_gain(gains_db.get(name, 0)) for name in self.names], dtype=np.float32)
+        stack = self.stack
+        stack *= gains[:, None, None]
+
+    def segment(self, name):
+        """스템 1개를 AudioSegment 로 (pydub/ffmpeg 기반 개별 FX 용)"""
+        return to_audio_segment(self[name], self.samplerate)
+
+    def replace_from_segment(self, name, segment):
+        self[name] = segment_to_array(segment.set_frame_rate(self.samplerate))
+
+    def mix(self):
+        """모든 스템 합산 (채널, 샘플) float32"""
+        stack = self.stack
+        if not len(stack):
+            return np.zeros((self.channels, 0), dtype=np.float32)
+        return stack.sum(axis=0, dtype=np.float32)
+
+    def to_segment(self):
+        """합산 결과 → int16 AudioSegment (마스터 체인 입력)"""
+        return to_audio_segment(self.mix(), self.samplerate)
+
+    def export_stem(self, name, path):
+        """게인/FX 가 적용된 스템 1개를 16-bit WAV 로 저장"""
+        import soundfile as sf
+        sf.write(path, to_int16(self[name]), self.samplerate, subtype="PCM_16")
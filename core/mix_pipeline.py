@@ -0,0 +1,798 @@
+# -*- coding: utf-8 -*-
+"""
+🏭 Mix Pipeline
+===============
+분리 → 스템 FX → 마스터 → 저장 흐름 전체 (2-Stem / 6-Stem) - GUI 없이 실행 가능
+- GUI(AudioStudioApp)와 헤드리스 CLI 가 같은 MixPipeline 을 호출 → 최적화할 경로가 하나
+- 파라미터는 GUI collect_params() 와 같은 dict (v_val/m_val/e_val, mode, gpu, engine, dolby, hifi,
+  pro_mixer, pro_fx, preset_name, effect_path)
+- 곡마다 단계별 시간(separate / load / fx_mix / master / stems)을 report dict 에 기록
+- CLI: 파일/폴더 입력 → 결과 파일 + JSON 리포트
+
+사용법 (CLI):
+    python core/mix_pipeline.py song.mp3 --mode 6-Stem --gain drums=2 --fx drum_punch --dolby --report report.json
+    python core/mix_pipeline.py "C:/Music/Album" --mode 2-Stem --vocal 3 --mr -1 --hifi
+    python core/mix_pipeline.py song.mp3 --params params.json          (GUI 와 같은 파라미터 dict)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+import contextlib
+import subprocess
+from collections import deque
+
+import soundfile as sf
+
+from separation_worker import get_shared_worker, SeparationWorkerError
+from sharded_separator import get_shared_sharded_separator, recommended_shard_workers, MIN_SHARD_SEC
+from stem_cache import StemCache
+from stem_derivation import lookup_derived
+from quantized_engine import ENGINE_FLOAT, ENGINE_INT8
+from batch_separator import BatchSeparator, discover_audio_files, recommended_pool_size
+from long_form import LONG_FORM_THRESHOLD_SEC, audio_duration, is_long_form, render_stems_long_form
+from perf_records import PERF_LOG_NAME, append_record, format_eta
+from subprocess_utils import hidden_startupinfo
+from workspace import JobWorkspace, purge_stale
+from mix_bus import MixBus, segment_to_array, high_pass
+from fx_graph import stem_fx_filters
+from stem_fx import STEM_FX_FLAGS
+from remix_session import RemixSession
+from export_pool import ExportPool
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIX_STEMS = ["vocals", "drums", "bass", "guitar", "piano", "other"]
+
+
+def clean_name(name):
+    # [수정] 한글 및 공백 등을 보존하면서 윈도우 예약 문자만 제거
+    name = os.path.splitext(os.path.basename(name))[0]
+    # 윈도우에서 금지된 문자들: \ / : * ? " < > |
+    name = re.sub(r'[\\/:*?"<>|]', '', name)
+    # 양끝 공백 제거 및 마침표 제거 (시스템 예약어 방지용)
+    return name.strip().rstrip('.') or "song"
+
+
+def find_runner_exe():
+    """EXE 배포 상태에서 별도로 빌드된 'demucs_runner.exe' 위치 탐색"""
+    executable_dir = os.path.dirname(sys.executable)
+    runner_path = os.path.join(executable_dir, "demucs_runner.exe")
+
+    # 만약 runner가 없으면 내부(_internal)에 있을 수도 있음 (onedir 구조에 따라 다름)
+    if not os.path.exists(runner_path):
+        runner_path = os.path.join(sys._MEIPASS, "demucs_runner.exe") if hasattr(sys, '_MEIPASS') else runner_path
+
+    # [추가] 여전히 못찾으면 현재 작업 디렉토리에서도 확인
+    if not os.path.exists(runner_path):
+        runner_path = os.path.join(os.getcwd(), "demucs_runner.exe")
+    return runner_path
+
+
+def demucs_server_cmd():
+    """상주 분리 서버 실행 명령 (모델을 메모리에 유지)"""
+    if getattr(sys, 'frozen', False):
+        return [find_runner_exe(), "--serve"]
+    return [sys.executable, os.path.join(ROOT_DIR, "core", "demucs_runner.py"), "--serve"]
+
+
+def progress_text(event):
+    """분리 진행 이벤트 → 진행바 문구 (세그먼트/ETA/처리 속도 포함)"""
+    stage = event.get("stage")
+    if stage == "load":
+        return "Loading AI Model..."
+    if stage == "write":
+        return "Writing Stems..."
+    text = f"Analyzing... {event.get('percent', 0)}%"
+    if event.get("segments"):
+        text += f" (seg {event.get('segment', 0)}/{event['segments']})"
+    if event.get("eta") is not None:
+        text += f" ETA {format_eta(event['eta'])}"
+    if event.get("samples_per_sec") and event.get("elapsed"):
+        text += f" · {event['samples_per_sec'] / 44100:.1f}x"
+    return text
+
+
+def separate_cli(file_path, use_gpu, mode, model_name, progress_callback, out_root):
+    """
+    Demucs CLI를 곡마다 새 프로세스로 실행 (상주 서버를 쓸 수 없을 때의 예비 경로)
+    demucs_runner --json-progress 의 JSON 이벤트로 진행률/오류를 받습니다.
+
+    out_root: 이 작업 전용 출력 폴더 (결과는 항상 out_root/<모델>/<입력 파일명>)
+
+    Returns:
+        (결과 폴더, 성능 기록 dict 또는 None)
+    """
+    # [수정] 실행 환경에 따른 명령어 분기 처리 (Frozen vs Script)
+    if getattr(sys, 'frozen', False):
+        # ■ EXE 배포 상태: 별도로 빌드된 'demucs_runner.exe'를 호출
+        cmd = [find_runner_exe(), "--json-progress"]
+    else:
+        # ■ 개발/스크립트 상태: core/demucs_runner.py (Demucs CLI + JSON 진행 이벤트)
+        cmd = [sys.executable, os.path.join(ROOT_DIR, "core", "demucs_runner.py"), "--json-progress"]
+    cmd += ["-n", model_name, "--shifts=2", "--overlap=0.25", "--mp3-bitrate", "320", "--out", out_root, file_path]
+    # [중요] 2-Stem 모드일 때만 반주를 하나로 뭉침 (no_vocals 생성)
+    if mode == "2-Stem":
+        cmd.append("--two-stems=vocals")
+    cmd += ["-d", "cuda" if use_gpu else "cpu"]
+
+    # [FIX] torchcodec 이슈 해결을 위한 환경 변수 설정
+    env = os.environ.copy()
+    env["TORCHAUDIO_BACKEND"] = "soundfile"
+    env["PYTHONIOENCODING"] = "utf-8"
+
+    # [핵심] 실시간 이벤트 수신 (stdout: JSON 이벤트, stderr: 일반 로그)
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        startupinfo=hidden_startupinfo(),
+        env=env,
+        bufsize=1,
+    )
+
+    log_tail = deque(maxlen=20) # JSON 이 아닌 최근 로그 (오류 보고용)
+    stats, error_msg = None, None
+
+    for line in process.stdout:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line) if line.startswith("{") else None
+        except ValueError:
+            event = None
+        if not isinstance(event, dict) or "event" not in event:
+            log_tail.append(line)
+            continue
+
+        if event["event"] == "progress":
+            normalized_p = 0.1 + (event.get("percent", 0) * 0.8 / 100)
+            progress_callback(progress_text(event), normalized_p)
+        elif event["event"] == "done":
+            stats = event.get("stats")
+        elif event["event"] == "error":
+            error_msg = event.get("message")
+
+    process.wait()
+
+    if process.returncode != 0:
+        err_msg = error_msg or "\n".join(list(log_tail)[-5:])
+        raise Exception(f"AI 엔진 오류 발생 (코드 {process.returncode}):\n{err_msg}")
+
+    # [수정] 작업 전용 출력 폴더이므로 결과 위치가 정해져 있음 (최근 폴더 추측 불필요)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(out_root, model_name, base_name), stats
+
+
+def _no_progress(msg, p):
+    pass
+
+
+class MixPipeline:
+    """
+    사용법:
+        pipeline = MixPipeline(OUTPUT_DIR, TEMP_DIR, stem_cache, ffmpeg=FFMPEG_CMD)
+        report = {}
+        song_folder = pipeline.process_file("song.mp3", params, cb, report=report)
+        report["stages"]                      # {"separate": 초, "load": 초, "fx_mix": 초, "master": 초, "stems": 초}
+        summary = pipeline.process_batch(files, params, on_progress)   # 폴더(앨범) 단위
+
+    status_callback(msg, color): 백그라운드 스템 백업 완료 알림 (GUI 상태바, 없으면 생략)
+    """
+
+    def __init__(self, output_dir, temp_dir, stem_cache, ffmpeg="ffmpeg", engine_cache_dir=None,
+                 shard_workers=1, derive_from_cache=True, perf_log_path=None, status_callback=None):
+        self.output_dir = output_dir
+        self.temp_dir = temp_dir
+        self.stem_cache = stem_cache
+        self.ffmpeg = ffmpeg
+        self.engine_cache_dir = engine_cache_dir
+        self.shard_workers = shard_workers
+        self.derive_from_cache = derive_from_cache
+        self.perf_log_path = perf_log_path
+        self.status_callback = status_callback
+        self.remix_session = None # (원본 경로, 모드, 엔진, 효과음 경로, RemixSession) - 같은 곡 재실행 시 분리 생략
+        self.background_export = None # 믹스 완료 후 백그라운드에서 저장 중인 스템 백업 (대기 스레드)
+        self.last_output_dir = None
+        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(temp_dir, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # 분리
+    # ------------------------------------------------------------
+    def separate(self, file_path, use_gpu, mode, progress_callback, workspace, source_path=None, worker=None,
+                 in_memory=False, engine=ENGINE_FLOAT, report=None):
+        """
+        Demucs AI 분리 실행 (실시간 진행률 파싱 포함)
+        - 상주 분리 서버를 우선 사용하여 곡마다 반복되는 모델 로딩을 생략합니다.
+        - 같은 소리 + 같은 설정이면 스템 캐시에서 즉시 반환합니다.
+          workspace: 이 작업 전용 JobWorkspace (분리 결과는 workspace/separated 아래에 생성)
+          source_path: 캐시 키 계산용 원본 파일 (기본값: file_path)
+          worker: 사용할 상주 분리 서버 (기본값: 프로그램 공용 서버, 배치 모드는 워커별 전용 서버)
+        - in_memory=True 이면 스템을 공유 메모리 배열(SharedStems)로 받아 WAV 기록/디코딩을 생략합니다.
+          (캐시 기록은 백그라운드 스레드가 배열에서 직접 수행)
+        - engine="int8" 이면 CPU 동적 양자화 엔진으로 분리합니다 (GPU 모드에서는 무시).
+        - 2-Stem 요청은 같은 곡의 6-Stem 캐시가 있으면 스템을 합쳐 바로 만듭니다 (derive_from_cache).
+        - report: 있으면 분리 경로를 기록 ("cache" / "derived" / "server" / "sharded" / "cli")
+
+        Returns:
+            (스템 폴더, 모델명, SharedStems 또는 None) - SharedStems 는 호출자가 사용 후 close()
+        """
+        report = {} if report is None else report
+        model_name = "htdemucs_ft" if mode == "2-Stem" else "htdemucs_6s"
+        shifts, overlap = 2, 0.25
+        stem_files = ["vocals.wav", "no_vocals.wav"] if mode == "2-Stem" else [f"{s}.wav" for s in SIX_STEMS]
+
+        if use_gpu:
+            engine = ENGINE_FLOAT
+        engine_options = {"engine": engine, "engine_cache": self.engine_cache_dir} if engine != ENGINE_FLOAT else None
+        progress_callback(f"AI Engine Starting... ({mode}{', INT8' if engine_options else ''})", 0.05)
+
+        cache_key = None
+        try:
+            audio_hash = self.stem_cache.audio_fingerprint(source_path or file_path)
+            cache_model = model_name if engine == ENGINE_FLOAT else f"{model_name}+{engine}"
+            cache_key = self.stem_cache.make_key(audio_hash, cache_model, shifts, overlap, mode)
+            cached_dir = self.stem_cache.lookup(cache_key, stem_files)
+            if cached_dir:
+                progress_callback("Stem Cache Hit! (분리 생략)", 0.9)
+                report["separation"] = "cache"
+                return cached_dir, model_name, None
+            if self.derive_from_cache:
+                # float 결과 우선, int8 요청이면 int8 결과도 허용
+                suffixes = ("",) if engine == ENGINE_FLOAT else ("", f"+{engine}")
+                derived_dir = lookup_derived(self.stem_cache, audio_hash, mode, shifts, overlap, suffixes)
+                if derived_dir:
+                    progress_callback("Derived from cached 6-Stem! (분리 생략)", 0.9)
+                    report["separation"] = "derived"
+                    return derived_dir, "htdemucs_6s", None
+        except Exception as e:
+            print(f"Stem cache lookup skipped: {e}")
+
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        out_root = workspace.sub("separated")
+        final_path = os.path.join(out_root, model_name, base_name)
+
+        def on_progress(event):
+            normalized_p = 0.1 + (event.get("percent", 0) * 0.8 / 100)
+            progress_callback(progress_text(event), normalized_p)
+
+        backend = "server"
+        shared = None
+        # 긴 입력은 서버가 직접 WAV 로 변환하므로 설정된 ffmpeg 경로도 함께 전달
+        job_args = dict(device="cuda" if use_gpu else "cpu", shifts=shifts, overlap=overlap,
+                        two_stems="vocals" if mode == "2-Stem" else None,
+                        progress_callback=on_progress, long_form_sec=LONG_FORM_THRESHOLD_SEC,
+                        options=dict(engine_options or {}, ffmpeg=self.ffmpeg))
+        # 단일 곡 CPU 작업은 코어를 다 쓰도록 샤드 분리 (배치는 이미 곡 단위로 병렬이므로 제외)
+        duration = audio_duration(file_path)
+        use_shards = (not use_gpu and worker is None and self.shard_workers > 1 and duration is not None
+                      and 2 * MIN_SHARD_SEC <= duration <= LONG_FORM_THRESHOLD_SEC)
+        try:
+            if use_shards:
+                backend = "sharded"
+                sharded = get_shared_sharded_separator(demucs_server_cmd(), self.shard_workers)
+                sharded.separate(file_path, final_path, model_name, shifts=shifts, overlap=overlap,
+                                 two_stems=job_args["two_stems"], progress_callback=on_progress,
+                                 work_dir=workspace.sub("shards"), options=engine_options)
+                stats = sharded.last_stats
+            else:
+                worker = worker or get_shared_worker(demucs_server_cmd())
+                if in_memory:
+                    shared = worker.separate_to_memory(file_path, final_path, model_name, **job_args)
+                else:
+                    worker.separate(file_path, final_path, model_name, **job_args)
+                stats = worker.last_stats
+        except (SeparationWorkerError, OSError) as e:
+            # 서버 기동 실패/비정상 종료 시 기존 CLI 방식으로 재시도
+            print(f"Separation server unavailable, falling back to CLI: {e}")
+            backend = "cli"
+            final_path, stats = separate_cli(file_path, use_gpu, mode, model_name, progress_callback, out_root)
+        report["separation"] = backend
+
+        # [최종 검증]
+        check_file = "vocals" if mode == "2-Stem" else "drums"
+        if shared is not None:
+            if check_file not in shared:
+                shared.close()
+                raise Exception(f"분리 결과에 {check_file} 스템이 없습니다.")
+        elif not os.path.exists(os.path.join(final_path, f"{check_file}.wav")):
+            raise Exception(f"결과 파일을 찾을 수 없습니다.\n경로: {final_path}")
+
+        # 실행별 성능 기록 누적 (output_result/perf_records.jsonl)
+        if stats and self.perf_log_path:
+            try:
+                append_record(self.perf_log_path, {
+                    "source": os.path.basename(source_path or file_path), "model": model_name, "mode": mode,
+                    "device": "cuda" if use_gpu else "cpu", "backend": backend, "in_memory": shared is not None,
+                    "engine": engine if backend != "cli" else ENGINE_FLOAT,
+                    **stats,
+                })
+            except OSError as e:
+                print(f"Perf record skipped: {e}")
+
+        # 결과를 캐시로 이동 (작업 폴더 정리와 무관하게 보존)
+        if cache_key:
+            meta = {
+                "source": os.path.basename(source_path or file_path),
+                "model": model_name, "shifts": shifts, "overlap": overlap, "mode": mode, "engine": engine,
+            }
+            if backend == "cli" and engine != ENGINE_FLOAT:
+                # CLI 예비 경로는 항상 float 모델 → int8 키로 저장하지 않음
+                cache_key = self.stem_cache.make_key(audio_hash, model_name, shifts, overlap, mode)
+                meta["engine"] = ENGINE_FLOAT
+            if shared is not None:
+                # 믹싱과 동시에 배열에서 바로 캐시 기록 (공유 메모리는 두 쪽이 모두 끝나야 해제)
+                threading.Thread(target=self._store_shared_in_cache, args=(cache_key, shared.acquire(), meta),
+                                 daemon=True).start()
+            else:
+                try:
+                    final_path = self.stem_cache.store(cache_key, final_path, meta)
+                except Exception as e:
+                    print(f"Stem cache store failed: {e}")
+
+        return final_path, model_name, shared
+
+    def _store_shared_in_cache(self, cache_key, shared, meta):
+        """공유 메모리 스템 → 스템 캐시 (백그라운드)"""
+        try:
+            self.stem_cache.store_arrays(cache_key, shared.items(), shared.samplerate, meta)
+        except Exception as e:
+            print(f"Stem cache store failed: {e}")
+        finally:
+            shared.close()
+
+    # ------------------------------------------------------------
+    # 곡 단위
+    # ------------------------------------------------------------
+    def process_file(self, source_path, params, cb=None, keep_session=False, report=None):
+        """
+        곡 1개 전체 처리 (작업 폴더 생성/정리 포함)
+        keep_session=True (GUI 단일 곡 모드) 이면 같은 곡/모드/엔진 재실행 시 분리 없이 리믹스 세션에서
+        바뀐 단계만 다시 렌더링하고, 스템 백업은 백그라운드에서 마저 저장합니다.
+
+        Returns:
+            str: 곡 결과 폴더
+        """
+        cb = cb or _no_progress
+        report = {} if report is None else report
+        started = time.time()
+        report.update(file=source_path, mode=params['mode'])
+        session = self.remix_session
+        # 2-Stem 효과음 트랙은 세션 버스에 들어가 있으므로 효과음이 바뀌면 재사용하지 않음
+        if keep_session and session and session[:4] == (source_path, params['mode'],
+                                                        params.get('engine', ENGINE_FLOAT), params.get('effect_path')):
+            cb("Remix (separation reused)...", 0.6)
+            report["separation"] = "session"
+            song_folder = self.render_session(session[4], source_path, params, cb, background=True, report=report)
+        else:
+            self.remix_session = None
+            # 안전해제: 복잡한 파일명 에러 방지를 위해 작업 전용 폴더로 복사
+            # 작업이 끝나면(실패 포함) 이 작업의 폴더만 삭제 (output_result/다른 작업은 건드리지 않음)
+            with JobWorkspace(self.temp_dir, "song") as ws:
+                safe_input = ws.stage_input(source_path)
+                song_folder = self.render_song(source_path, safe_input, params, cb, ws,
+                                               keep_session=keep_session, report=report)
+        report["total_sec"] = round(time.time() - started, 2)
+        return song_folder
+
+    def render_song(self, source_path, input_path, params, cb, workspace, worker=None, keep_session=False,
+                    report=None):
+        """
+        곡 1개 분리 → 믹싱 → 마스터링 → 저장 (단일/배치 공용)
+
+        Args:
+            source_path: 원본 파일 (출력 이름/캐시 키 기준)
+            input_path: 실제로 분리할 안전한 경로의 파일
+            workspace: 이 곡 전용 JobWorkspace (중간 파일은 모두 이 안에 생성)
+            worker: 배치 모드에서 사용할 전용 분리 서버
+            keep_session: True 이면 리믹스 세션을 self.remix_session 에 보관 (단일 곡 모드)
+            report: 단계별 시간 기록용 dict
+        Returns:
+            str: 곡 결과 폴더
+        """
+        report = {} if report is None else report
+        stages = report.setdefault("stages", {})
+        # separate 는 폴더 경로, 모델명, (메모리 전달 시) 공유 메모리 스템을 반환함
+        started = time.time()
+        res_dir, model_name, shared = self.separate(input_path, params['gpu'], params['mode'], cb, workspace,
+                                                    source_path=source_path, worker=worker,
+                                                    in_memory=params.get('in_memory', True),
+                                                    engine=params.get('engine', ENGINE_FLOAT), report=report)
+        stages["separate"] = round(time.time() - started, 3)
+        report["model"] = model_name
+        try:
+            return self.mix_song(source_path, res_dir, shared, params, cb, workspace, keep_session=keep_session,
+                                 report=report)
+        finally:
+            if shared is not None:
+                shared.close()
+
+    def mix_song(self, source_path, res_dir, shared, params, cb, workspace, keep_session=False, report=None):
+        """
+        분리된 스템 → 믹싱 → 마스터링 → 저장
+        - shared(SharedStems)가 있으면 스템 WAV 를 읽지 않고 메모리 배열에서 바로 믹싱합니다.
+        - 스템 믹싱은 float32 MixBus 에서 (게인 곱셈/합산 1회, int16 변환은 마스터 체인 직전 1회)
+        - keep_session=True 이면 RemixSession 을 보관하여 다음 실행에서 분리 없이 바뀐 단계만 다시 렌더링
+        """
+        from pydub import AudioSegment
+
+        report = {} if report is None else report
+        stages = report.setdefault("stages", {})
+
+        def load_stem(name):
+            """스템 1개를 float32 (채널, 샘플) 배열로 (메모리 스템 우선, 없으면 WAV 파일), samplerate 함께 반환"""
+            if shared is not None:
+                return (shared[name], shared.samplerate) if name in shared else (None, None)
+            path = os.path.join(res_dir, f"{name}.wav")
+            if not os.path.exists(path):
+                return None, None
+            data, sr = sf.read(path, dtype="float32", always_2d=True)
+            return data.T, sr
+
+        def new_bus(names):
+            """스템들을 float32 믹스 버스 하나에 적재 (없는 스템은 제외)"""
+            bus = None
+            for name in names:
+                array, sr = load_stem(name)
+                if array is None:
+                    continue
+                bus = bus or MixBus(sr)
+                bus.add(name, array)
+            return bus
+
+        base_filename = clean_name(source_path)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # 긴 곡은 스템을 메모리에 올리지 않는 스트리밍 믹싱 경로로 처리
+        if shared is None and is_long_form(os.path.join(res_dir, "vocals.wav")):
+            started = time.time()
+            song_folder = self.render_long_form_song(res_dir, params, base_filename, cb, workspace.sub("long_form"))
+            stages["long_form"] = round(time.time() - started, 3)
+            return song_folder
+
+        started = time.time()
+        # --- 6-Stem 혁명적 믹싱 모드 처리 ---
+        if params['mode'] == "6-Stem":
+            cb("Loading 6-Stem Channels...", 0.6)
+            bus = new_bus(SIX_STEMS) or MixBus(44100)
+
+        # --- 2-Stem 모드 처리 ---
+        else:
+            bus = new_bus(["vocals", "no_vocals"])
+
+            if bus is None or len(bus) < 2:
+                raise Exception(f"결과 파일 없음: {os.path.join(res_dir, 'vocals.wav')}")
+
+            cb("Mixing Vocals & Inst...", 0.7)
+            bus['vocals'] = high_pass(bus['vocals'], 80, bus.samplerate)
+
+            effect_path = params.get('effect_path')
+            if effect_path:
+                try:
+                    effect = AudioSegment.from_file(effect_path).set_frame_rate(bus.samplerate).set_channels(bus.channels)
+                    bus.add('effect', segment_to_array(effect))
+                except: pass
+        stages["load"] = round(time.time() - started, 3)
+
+        session = RemixSession(bus, params['mode'], ffmpeg=self.ffmpeg)
+        song_folder = self.render_session(session, source_path, params, cb, background=keep_session, report=report)
+        if keep_session:
+            self.remix_session = (source_path, params['mode'], params.get('engine', ENGINE_FLOAT),
+                                  params.get('effect_path'), session)
+        return song_folder
+
+    def output_paths(self, base_filename, params, names):
+        """곡 결과 폴더 / 최종 믹스 파일 / 스템 백업 파일 경로 (음원분리·미디분리 폴더 생성)"""
+        # 노래 제목 폴더 내부에 '음원분리' 및 '미디분리' 서브 폴더 생성
+        song_folder = os.path.join(self.output_dir, base_filename)
+        audio_dir = os.path.join(song_folder, "음원분리")
+        os.makedirs(audio_dir, exist_ok=True)
+        os.makedirs(os.path.join(song_folder, "미디분리"), exist_ok=True)
+
+        if params['mode'] == "6-Stem":
+            preset_suffix = params.get('preset_name', 'Revolution').replace("Pro:", "")
+            final_name = f"{base_filename}_{preset_suffix}"
+            hifi_ext = ".wav"
+            stem_paths = {name: os.path.join(audio_dir, f"6S_{name}_{base_filename}.wav") for name in names}
+        else:
+            final_name = f"{base_filename}_{params.get('preset_name', 'Custom')}"
+            hifi_ext = "_HiFi.wav"
+            stem_paths = {'vocals': os.path.join(audio_dir, f"Vocals_{base_filename}.wav"),
+                          'no_vocals': os.path.join(audio_dir, f"Inst_{base_filename}.wav")}
+        final_output_file = os.path.join(audio_dir, final_name + (hifi_ext if params.get('hifi', False) else ".mp3"))
+        return song_folder, final_output_file, stem_paths
+
+    def render_session(self, session, source_path, params, cb, background=False, report=None):
+        """
+        RemixSession → 스템 FX / 합산 / 마스터 (바뀐 단계만) → 최종 파일 + 스템 파일 저장
+        - 최종 믹스와 스템 백업을 ExportPool 로 동시에 저장
+          background=True (단일 곡 모드) 이면 믹스만 기다리고, 스템 백업은 백그라운드에서 마저 저장
+
+        Returns:
+            str: 곡 결과 폴더
+        """
+        report = {} if report is None else report
+        stages = report.setdefault("stages", {})
+        song_folder, final_output_file, stem_paths = self.output_paths(clean_name(source_path), params,
+                                                                         session.names)
+
+        # 이전 실행의 스템 백업이 같은 파일에 쓰는 중일 수 있으므로 먼저 끝나기를 기다림
+        self.wait_background_export()
+
+        # [1] 개별 줄기 FX (Pedalboard, 스템별 병렬) + [2] 게인 합산
+        cb("Master Fusion in Progress...", 0.8)
+        started = time.time()
+        prepared = session.prepare(params)
+        stages["fx_mix"] = round(time.time() - started, 3)
+
+        # [3] 글루 컴프레션 / Dolby / Hi-Fi (블록 단위 스트리밍 → 인코더) + [4] 개별 줄기 백업 (바뀐 줄기만) - 동시 저장
+        pool = ExportPool()
+        mix_job = pool.submit("mix", final_output_file, lambda path: session.export_master(params, path))
+        session.export_stems(params, stem_paths, pool=pool)
+        cb("Exporting...", 0.92)
+        try:
+            stages["master"] = round(mix_job.result(), 3)
+        except Exception:
+            pool.wait()
+            raise
+        report["remix"] = dict(session.last_stages, **prepared)
+        report["final"] = final_output_file
+        print(f"Remix stages: {report['remix']}")
+
+        def on_exported(timings, errors):
+            print(pool.report())
+            stages["stems"] = round(sum(sec for label, name, sec in timings if label == "stem"), 3)
+            for e in errors:
+                print(f"Stem Export Error: {e}")
+            if errors:
+                report["stem_errors"] = [str(e) for e in errors]
+            if background and self.status_callback:
+                color = "#FF5555" if errors else "#00FFAA"
+                self.status_callback(f"💾 Stem backups saved ({len(timings)} files, {len(errors)} errors)", color)
+
+        if background:
+            self.background_export = pool.finish_in_background(on_exported)
+        else:
+            errors = pool.wait()
+            on_exported(pool.timings, errors)
+
+        report["output"] = song_folder
+        self.last_output_dir = song_folder # MIDI 변환을 위해 경로 저장
+        return song_folder
+
+    def wait_background_export(self):
+        """백그라운드 스템 백업 저장이 남아 있으면 끝날 때까지 대기"""
+        waiter, self.background_export = self.background_export, None
+        if waiter is not None:
+            waiter.join()
+
+    def render_long_form_song(self, res_dir, params, base_filename, cb, work_dir):
+        """
+        긴 곡(LONG_FORM_THRESHOLD_SEC 초과) 믹싱/마스터링
+        render_song 과 같은 결과 파일 구성이지만 스템을 블록 단위로 처리하여 메모리 사용량이 곡 길이와 무관합니다.
+        (스템 FX 는 같은 역할의 ffmpeg 필터, 마스터는 master_bus 스트리밍 체인)
+        """
+        names = [n for n in SIX_STEMS if os.path.exists(os.path.join(res_dir, f"{n}.wav"))]
+        song_folder, final_output_file, stem_paths = self.output_paths(base_filename, params, names)
+
+        if params['mode'] == "6-Stem":
+            pro_fx = params.get('pro_fx', {})
+            stem_fx = stem_fx_filters(pro_fx)
+
+            stem_chains = []
+            for name in names:
+                chain = [f"volume={params['pro_mixer'].get(name, 0)}dB"]
+                if stem_fx.get(name): chain.append(stem_fx[name])
+                stem_chains.append((os.path.join(res_dir, f"{name}.wav"), stem_paths[name], ",".join(chain)))
+            glue_ratio = 2.5
+        else:
+            stem_chains = [
+                (os.path.join(res_dir, "vocals.wav"), stem_paths['vocals'],
+                 f"highpass=f=80:poles=1,volume={params['v_val']}dB"),
+                (os.path.join(res_dir, "no_vocals.wav"), stem_paths['no_vocals'],
+                 f"volume={params['m_val']}dB"),
+            ]
+            if params.get('effect_path'):
+                stem_chains.append((params['effect_path'], os.path.join(work_dir, "_effect.wav"),
+                                    f"aresample=44100,aformat=channel_layouts=stereo,volume={params['e_val']}dB"))
+            glue_ratio = 2.0
+
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            # 마스터는 일반 곡과 같은 스트리밍 마스터 버스 (믹스 파일 블록 → 분석 패스 → 노멀라이즈 + 리미터 → 인코더)
+            render_stems_long_form(stem_chains, work_dir, final_output_file, glue_ratio,
+                                   params.get('dolby', False), params.get('hifi', False),
+                                   ffmpeg=self.ffmpeg, progress_callback=cb)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        self.last_output_dir = song_folder # MIDI 변환을 위해 경로 저장
+        return song_folder
+
+    # ------------------------------------------------------------
+    # 배치 (앨범 모드)
+    # ------------------------------------------------------------
+    def process_batch(self, files, params, progress_callback=None, summary_dir=None):
+        """
+        여러 곡을 워커 풀로 처리하고 마지막에 요약 파일 1개를 기록
+        progress_callback(done, total, msg, pool_size)
+
+        Returns:
+            dict: BatchSeparator 요약 (곡마다 "stages" 단계별 시간 포함)
+        """
+        batch_ws = JobWorkspace(self.temp_dir, "batch").create()
+        reports = {}
+        # 곡마다 병렬로 render_song 이 덮어쓰므로 끝나면 배치 전 값으로 복원 (어느 곡 폴더인지 의미가 없음)
+        previous_output_dir = self.last_output_dir
+        try:
+            pool_size = recommended_pool_size(params['gpu'], len(files))
+            threads = None if params['gpu'] else max(1, (os.cpu_count() or 1) // pool_size)
+            batch = BatchSeparator(demucs_server_cmd(), batch_ws.sub("decoded"), pool_size=pool_size,
+                                   ffmpeg=self.ffmpeg, threads_per_worker=threads)
+
+            def on_progress(done, total, msg):
+                if progress_callback:
+                    progress_callback(done, total, msg, pool_size)
+
+            def song_fn(src, decoded, worker):
+                # 곡별 진행률은 상단 배치 진행률과 겹치지 않도록 생략
+                report = reports.setdefault(src, {"file": src, "mode": params['mode']})
+                with JobWorkspace(batch_ws.path, "song") as ws:
+                    return self.render_song(src, decoded, params, _no_progress, ws, worker=worker, report=report)
+
+            summary = batch.run(files, song_fn, on_progress)
+            for record in summary["songs"]:
+                song_report = reports.get(record["file"], {})
+                record["stages"] = song_report.get("stages", {})
+                for key in ("separation", "model", "final", "remix", "stem_errors"):
+                    if key in song_report:
+                        record.setdefault("pipeline", {})[key] = song_report[key]
+            if summary_dir:
+                summary["summary_path"] = BatchSeparator.write_summary(summary, summary_dir)
+            return summary
+        finally:
+            self.last_output_dir = previous_output_dir
+            batch_ws.cleanup()
+
+
+# =================================================================
+# 헤드리스 CLI
+# =================================================================
+def _parse_gains(pairs):
+    """["drums=2", "bass=-1.5"] → {"drums": 2.0, "bass": -1.5}"""
+    gains = {}
+    for pair in pairs or []:
+        name, sep, value = pair.partition("=")
+        if not sep or name not in SIX_STEMS:
+            raise argparse.ArgumentTypeError(f"--gain 형식: <{'|'.join(SIX_STEMS)}>=<dB> (입력: {pair})")
+        gains[name] = float(value)
+    return gains
+
+
+def build_params(args):
+    """CLI 인자 → GUI collect_params() 와 같은 파라미터 dict (--params JSON 이 기본값)"""
+    params = {}
+    if args.params:
+        with open(args.params, encoding="utf-8") as f:
+            params.update(json.load(f))
+    params.setdefault('v_val', 0)
+    params.setdefault('m_val', 0)
+    params.setdefault('e_val', -10)
+    params.setdefault('in_memory', True)
+    params.setdefault('pro_mixer', {})
+    params.setdefault('pro_fx', {})
+    for key, value in (('mode', args.mode), ('v_val', args.vocal), ('m_val', args.mr), ('e_val', args.sfx),
+                       ('effect_path', args.effect), ('preset_name', args.preset)):
+        if value is not None:
+            params[key] = value
+    params.setdefault('mode', "2-Stem")
+    # 기본값 → JSON → CLI 순서로 덮어씀 (같은 키가 JSON 과 CLI 에 모두 있으면 CLI 우선)
+    mixer = {name: 0 for name in SIX_STEMS}
+    mixer.update(params['pro_mixer'])
+    mixer.update(_parse_gains(args.gain))
+    params['pro_mixer'] = mixer
+    fx = {flag: False for flag in sorted(set(STEM_FX_FLAGS.values()))}
+    fx.update(params['pro_fx'])
+    fx.update({flag: True for flag in args.fx or []})
+    params['pro_fx'] = fx
+    for key in ('gpu', 'dolby', 'hifi'):
+        params[key] = getattr(args, key) or params.get(key, False)
+    if args.int8:
+        params['engine'] = ENGINE_INT8
+    params.setdefault('engine', ENGINE_FLOAT)
+    if args.file_handoff:
+        params['in_memory'] = False
+    return params
+
+
+def _run(pipeline, files, params):
+    """파일 목록 처리 → 리포트 dict (BatchSeparator 요약과 같은 형식)"""
+    if len(files) == 1:
+        # 단일 곡: 샤드 분리(CPU 전체 사용) 경로
+        record = {}
+        try:
+            pipeline.process_file(files[0], params, lambda msg, p: print(f"[{p:4.0%}] {msg}"), report=record)
+            record["status"] = "ok"
+        except Exception as e:
+            record.update(file=files[0], status="error", error=str(e))
+        return {"total_files": 1, "succeeded": int(record["status"] == "ok"),
+                "failed": int(record["status"] != "ok"), "songs": [record]}
+    # 여러 곡: 곡 단위 워커 풀 (BatchSeparator)
+    return pipeline.process_batch(files, params, lambda done, total, msg, size: print(f"[{done}/{total}] {msg}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless 2-Stem / 6-Stem mix pipeline")
+    parser.add_argument("inputs", nargs="+", help="오디오 파일 또는 폴더 (mp3/wav/flac)")
+    parser.add_argument("--params", help="GUI collect_params() 형식의 JSON 파일 (아래 옵션이 덮어씀)")
+    parser.add_argument("--mode", choices=["2-Stem", "6-Stem"])
+    parser.add_argument("--vocal", type=float, help="2-Stem 보컬 게인 (dB)")
+    parser.add_argument("--mr", type=float, help="2-Stem 반주 게인 (dB)")
+    parser.add_argument("--sfx", type=float, help="2-Stem 효과음 게인 (dB)")
+    parser.add_argument("--effect", help="2-Stem 효과음 파일")
+    parser.add_argument("--gain", action="append", metavar="STEM=DB", help="6-Stem 페이더 (반복 가능)")
+    parser.add_argument("--fx", action="append", choices=sorted(set(STEM_FX_FLAGS.values())),
+                        help="6-Stem Advanced FX (반복 가능)")
+    parser.add_argument("--dolby", action="store_true")
+    parser.add_argument("--hifi", action="store_true")
+    parser.add_argument("--preset", help="출력 파일 이름에 붙는 프리셋 이름")
+    parser.add_argument("--gpu", action="store_true")
+    parser.add_argument("--int8", action="store_true", help="CPU int8 양자화 엔진")
+    parser.add_argument("--file-handoff", action="store_true", help="스템을 공유 메모리 대신 WAV 로 전달")
+    parser.add_argument("--output", default=os.path.join(ROOT_DIR, "output_result"))
+    parser.add_argument("--temp", default=os.path.join(ROOT_DIR, "temp_work"))
+    parser.add_argument("--stem-cache", default=os.path.join(ROOT_DIR, "stem_cache"))
+    parser.add_argument("--stem-cache-gb", type=float, default=8)
+    parser.add_argument("--engine-cache", default=os.path.join(ROOT_DIR, "model_cache"))
+    parser.add_argument("--shard-workers", type=int, default=None, help="CPU 샤드 분리 워커 수 (기본: 자동)")
+    parser.add_argument("--no-derive", action="store_true", help="6-Stem 캐시로 2-Stem 합성하지 않음")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    parser.add_argument("--report", help="JSON 리포트 경로 (기본: 표준 출력)")
+    args = parser.parse_args()
+
+    params = build_params(args)
+    files = []
+    for path in args.inputs:
+        files += discover_audio_files(path) if os.path.isdir(path) else discover_audio_files([path])
+    if not files:
+        parser.error("처리할 오디오 파일(mp3/wav/flac)이 없습니다.")
+
+    from pydub import AudioSegment
+    AudioSegment.converter = args.ffmpeg
+
+    os.makedirs(args.temp, exist_ok=True)
+    purge_stale(args.temp)
+    stem_cache = StemCache(args.stem_cache, max_bytes=int(args.stem_cache_gb * 1024 ** 3), ffmpeg=args.ffmpeg)
+    pipeline = MixPipeline(args.output, args.temp, stem_cache, ffmpeg=args.ffmpeg,
+                           engine_cache_dir=args.engine_cache,
+                           shard_workers=recommended_shard_workers() if args.shard_workers is None else args.shard_workers,
+                           derive_from_cache=not args.no_derive,
+                           perf_log_path=os.path.join(args.output, PERF_LOG_NAME))
+
+    started = time.time()
+    # 진행 로그는 stderr 로 (리포트를 표준 출력으로 받을 때 JSON 만 남도록)
+    with contextlib.redirect_stdout(sys.stderr):
+        report = _run(pipeline, files, params)
+    report["wall_sec"] = round(time.time() - started, 2)
+    report["params"] = params
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    sys.exit(0 if report["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+📈 Performance Records
+======================
+분리 작업 1회마다 성능 기록(소요 시간, 처리 속도, 최대 메모리 등)을 JSON-lines 파일에 누적합니다.
+- 한 줄 = 한 번의 실행 (append 전용, 여러 스레드에서 동시에 기록해도 안전)
+- ETA 표시용 시간 포맷 도우미 포함
+"""
+
+import os
+import json
+import time
+import threading
+
+PERF_LOG_NAME = "perf_records.jsonl"
+
+_write_lock = threading.Lock()
+
+
+def append_record(log_path, record):
+    """성능 기록 1건 추가 (timestamp 자동 기입)"""
+    entry = {"timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
+    entry.update(record)
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    with _write_lock:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+
+def format_eta(seconds):
+    """ETA 초 → 'm:ss' / 'h:mm:ss' (값이 없으면 '--:--')"""
+    if seconds is None or seconds < 0:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+🧮 INT8 CPU Inference Engine
+============================
+GPU 가 없는 환경용 Demucs 가속 엔진 (분리 서버 내부에서 사용).
+- 모델의 Linear/LSTM 층을 동적 int8 양자화 (torch.ao.quantization.quantize_dynamic)
+- 양자화된 모델은 한 번만 만들어 model_cache 폴더에 저장 → 이후에는 바로 로딩
+- 캐시 파일명에 엔진 버전 + torch 버전을 넣어 torch 업그레이드 시 자동으로 다시 생성
+
+[참고] HTDemucs 는 복소수 STFT 경로 때문에 TorchScript/ONNX 변환이 안정적이지 않아
+       원본 모듈 구조를 그대로 둔 채 양자화합니다 (apply_model / BagOfModels 와 그대로 호환).
+"""
+
+import os
+
+ENGINE_FLOAT = "float"
+ENGINE_INT8 = "int8"
+ENGINES = (ENGINE_FLOAT, ENGINE_INT8)
+
+# 양자화 방식이 바뀌면 올려서 기존 캐시를 무효화
+ENGINE_VERSION = 1
+
+
+def artifact_path(cache_dir, model_name):
+    import torch
+    torch_version = torch.__version__.split("+")[0]
+    return os.path.join(cache_dir, f"{model_name}_int8_v{ENGINE_VERSION}_torch{torch_version}.pt")
+
+
+def quantize_model(model):
+    """float 모델 → 동적 int8 양자화 모델 (CPU 전용)"""
+    import torch
+    from torch import nn
+    model = model.cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+
+
+def load_int8_model(model_name, cache_dir, loader):
+    """
+    캐시된 int8 모델을 로딩 (없으면 loader(model_name) 로 float 모델을 받아 양자화 후 저장)
+
+    Returns:
+        (model, built) - built 는 이번 호출에서 새로 만들었는지 여부
+    """
+    import torch
+    path = artifact_path(cache_dir, model_name)
+    if os.path.exists(path):
+        try:
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            return model.eval(), False
+        except Exception as e:
+            print(f"[int8] cached artifact unreadable, rebuilding: {e}")
+
+    model = quantize_model(loader(model_name))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    torch.save(model, tmp)
+    os.replace(tmp, path)
+    return model, True
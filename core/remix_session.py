@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+🔁 Remix Session
+================
+분리된 스템을 메모리에 유지한 채 파라미터가 바뀐 단계만 다시 렌더링합니다 (Demucs 재실행 없음).
+- 단계: 스템 FX → 합산(게인) → 마스터(글루 컴프레서/Dolby/Hi-Fi + 정규화, master_bus 블록 처리)
+- 단계마다 "그 단계가 쓰는 파라미터 + 앞 단계 키" 로 캐시 → 게인만 바꾸면 FX 는 재사용, 합산/마스터만 다시 계산
+- 선형 FX(EQ/필터/와이드너)는 게인과 순서를 바꿔도 결과가 같으므로 FX 캐시 키에 게인을 넣지 않음
+  (비선형인 Drum Punch 컴프레서만 게인을 FX 앞에서 적용하고 키에 포함)
+- 스템 파일 저장도 마지막으로 저장한 키와 다를 때만 다시 기록
+- preview(): 커서 주변 구간(기본 10초)만 현재 슬라이더/FX 로 렌더링 (목표 200 ms 이하)
+  구간 앞에 필터/컴프레서가 안정될 여유(PREVIEW_WARMUP_SEC)만 더 처리하고 잘라냄, 캐시된 스템 FX 는 잘라서 재사용
+- export_master(): 마스터 결과를 배열로 만들지 않고 블록 단위로 인코더에 바로 전송
+"""
+
+import time
+
+import numpy as np
+
+from mix_bus import db_to_gain
+from fx_graph import render_fx_graph, stem_fx_filters
+from stem_fx import PEDALBOARD_AVAILABLE, STEM_FX_FLAGS, NONLINEAR_STEMS, build_stem_chains, run_stem_chains
+from master_bus import MasterChain, BlockEncoder, array_blocks, analyze_peak, normalize_gain, master_blocks
+
+# 모드별 마스터 글루 컴프레서 비율
+GLUE_RATIOS = {"6-Stem": 2.5, "2-Stem": 2.0}
+
+# 미리듣기 기본 길이 / 구간 앞 워밍업 여유 (컴프레서 release 100 ms, 와이드너 지연 20 ms 보다 충분히 길게)
+PREVIEW_SECONDS = 10.0
+PREVIEW_WARMUP_SEC = 0.5
+
+
+def stem_gains(mode, params):
+    """모드별 페이더 게인 {스템: dB}"""
+    if mode == "6-Stem":
+        return dict(params.get('pro_mixer', {}))
+    return {"vocals": params.get('v_val', 0), "no_vocals": params.get('m_val', 0), "effect": params.get('e_val', 0)}
+
+
+class RemixSession:
+    """
+    사용법:
+        session = RemixSession(bus, "6-Stem", ffmpeg=FFMPEG_CMD)   # bus: 게인 적용 전 스템 (MixBus)
+        session.export_master(params, "song.mp3")      # 처음: 모든 단계 계산
+        session.export_master(new_params, "song.mp3")  # 바뀐 단계만 다시 계산
+        session.last_stages                      # {"fx": [다시 계산한 스템], "mix": "cached"/"rendered", ...}
+        session.export_stems(params, {"drums": "6S_drums.wav", ...})
+    """
+
+    def __init__(self, bus, mode, ffmpeg="ffmpeg"):
+        self.mode = mode
+        self.ffmpeg = ffmpeg
+        self.samplerate = bus.samplerate
+        self.names = list(bus.names)
+        self._dry = {name: bus[name] for name in self.names}
+        self._fx = {}        # 스템 -> (키, 배열)
+        self._mix = None     # (키, 배열)
+        self._master = None  # (키, 노멀라이즈 게인)
+        self._exported = {}  # 경로 -> 키
+        self.last_stages = {}
+
+    @property
+    def length(self):
+        """스템 길이 (샘플)"""
+        return next(iter(self._dry.values())).shape[-1] if self._dry else 0
+
+    # --- [1] 스템 FX ---
+    def _fx_key(self, name, params, gains):
+        if self.mode != "6-Stem" or name not in STEM_FX_FLAGS:
+            return None
+        enabled = bool(params.get('pro_fx', {}).get(STEM_FX_FLAGS[name]))
+        if not enabled:
+            return None
+        return (True, float(gains.get(name, 0))) if name in NONLINEAR_STEMS else (True,)
+
+    def _fx_chain(self, name):
+        flags = {STEM_FX_FLAGS[name]: True}
+        if PEDALBOARD_AVAILABLE:
+            return build_stem_chains(flags)[name]
+        af = stem_fx_filters(flags)[name]
+        return lambda array, sr: render_fx_graph(array[None], sr, [af], [None], None, ffmpeg=self.ffmpeg)
+
+    def _render_fx(self, params, gains):
+        jobs, keys = {}, {}
+        for name in self.names:
+            key = self._fx_key(name, params, gains)
+            keys[name] = key
+            if key is None or (name in self._fx and self._fx[name][0] == key):
+                continue
+            source = self._dry[name]
+            if name in NONLINEAR_STEMS:
+                source = source * db_to_gain(gains.get(name, 0))
+            jobs[name] = (self._fx_chain(name), source)
+        for name, array in run_stem_chains(jobs, self.samplerate).items():
+            self._fx[name] = (keys[name], np.asarray(array, dtype=np.float32))
+        self.last_stages.setdefault("fx", []).extend(jobs)
+        return keys
+
+    def stem(self, name, params):
+        """게인 + FX 가 적용된 스템 (스템 파일 저장용)"""
+        gains = stem_gains(self.mode, params)
+        key = self._render_fx(params, gains)[name]
+        if key is None:
+            return self._dry[name] * db_to_gain(gains.get(name, 0))
+        array = self._fx[name][1]
+        return array if name in NONLINEAR_STEMS else array * db_to_gain(gains.get(name, 0))
+
+    # --- [2] 합산 ---
+    def _mix_keys(self, params):
+        """(합산 키, 스템별 FX 키, 합산 단계 게인 dB) - 렌더링 없이 키만 계산"""
+        gains = stem_gains(self.mode, params)
+        fx_keys = {name: self._fx_key(name, params, gains) for name in self.names}
+        mix_gains = {name: 0.0 if fx_keys[name] and name in NONLINEAR_STEMS else float(gains.get(name, 0))
+                     for name in self.names}
+        key = (tuple(fx_keys[name] for name in self.names), tuple(mix_gains[name] for name in self.names))
+        return key, fx_keys, mix_gains
+
+    def _sum(self, sources, mix_gains):
+        mix = None
+        for name in self.names:
+            scaled = sources[name] * db_to_gain(mix_gains[name])
+            mix = scaled if mix is None else np.add(mix, scaled, out=mix)
+        return mix if mix is not None else np.zeros((2, 0), dtype=np.float32)
+
+    def _render_mix(self, params):
+        key, fx_keys, mix_gains = self._mix_keys(params)
+        if self._mix and self._mix[0] == key:
+            self.last_stages["mix"] = "cached"
+            return key, self._mix[1]
+
+        self._render_fx(params, stem_gains(self.mode, params))
+        mix = self._sum({name: self._fx[name][1] if fx_keys[name] else self._dry[name] for name in self.names},
+                        mix_gains)
+        self._mix = (key, mix)
+        self.last_stages["mix"] = "rendered"
+        return key, mix
+
+    # --- [3] 마스터 ---
+    def _master_key(self, params, mix_key):
+        ratio = GLUE_RATIOS.get(self.mode, 2.0)
+        return (mix_key, ratio, bool(params.get('dolby', False)), bool(params.get('hifi', False)))
+
+    def _master_gain(self, params, mix_key, mix):
+        """노멀라이즈 게인 (1차 분석 패스, 같은 설정이면 캐시) → (MasterChain, 게인)"""
+        key = self._master_key(params, mix_key)
+        _, ratio, dolby, hifi = key
+        chain = MasterChain(self.samplerate, mix.shape[0], ratio, dolby, hifi)
+        if self._master and self._master[0] == key:
+            self.last_stages["master"] = "cached"
+        else:
+            self._master = (key, normalize_gain(analyze_peak(chain, array_blocks(mix))))
+            self.last_stages["master"] = "analyzed"
+        return chain, self._master[1]
+
+    def render(self, params):
+        """최종 믹스 float32 (채널, 샘플), 피크 -0.1 dB 정규화 (파일 저장은 메모리 일정한 export_master 사용)"""
+        started = time.time()
+        self.last_stages = {}
+        mix_key, mix = self._render_mix(params)
+        chain, gain = self._master_gain(params, mix_key, mix)
+        blocks = list(master_blocks(chain, array_blocks(mix), gain))
+        self.last_stages["elapsed"] = round(time.time() - started, 3)
+        return np.concatenate(blocks, axis=1) if blocks else mix
+
+    def export_master(self, params, path):
+        """최종 믹스를 블록 단위 마스터링 → 인코더로 바로 저장 (.wav 16-bit / .mp3 320k)"""
+        started = time.time()
+        self.last_stages = {}
+        mix_key, mix = self._render_mix(params)
+        chain, gain = self._master_gain(params, mix_key, mix)
+        with BlockEncoder(path, self.samplerate, mix.shape[0], ffmpeg=self.ffmpeg) as encoder:
+            for block in master_blocks(chain, array_blocks(mix), gain):
+                encoder.write(block)
+        self.last_stages["elapsed"] = round(time.time() - started, 3)
+        return path
+
+    # --- 미리듣기 ---
+    def preview(self, params, start, seconds=PREVIEW_SECONDS):
+        """
+        [start, start + seconds) 초 구간만 현재 설정으로 렌더링 → float32 (채널, 샘플)
+        - 구간 + 앞 워밍업만 FX(캐시된 스템 FX 는 잘라서 재사용) → 합산 → 마스터 후 워밍업을 잘라냄
+        - 정규화: 같은 설정의 전체 곡 게인이 있으면 그 값 (저장 결과와 같은 레벨),
+          없으면 마지막으로 분석한 전체 곡 게인 (구간 피크로 맞추면 페이더 변화가 상쇄되므로 사용하지 않음)
+        - 저장과 같은 master_blocks(블록 처리 + 천장 클립)로 마스터링
+        """
+        started = time.time()
+        sr = self.samplerate
+        end = min(max(int((start + seconds) * sr), 0), self.length)
+        begin = min(max(int(start * sr), 0), end)
+        mix_key, fx_keys, mix_gains = self._mix_keys(params)
+        warmup = min(begin, int(PREVIEW_WARMUP_SEC * sr))
+        lo = begin - warmup
+        gains = stem_gains(self.mode, params)
+        sources, jobs = {}, {}
+        for name in self.names:
+            if not fx_keys[name]:
+                sources[name] = self._dry[name][:, lo:end]
+            elif name in self._fx and self._fx[name][0] == fx_keys[name]:
+                sources[name] = self._fx[name][1][:, lo:end]
+            else:
+                source = self._dry[name][:, lo:end]
+                if name in NONLINEAR_STEMS:
+                    source = source * db_to_gain(gains.get(name, 0))
+                jobs[name] = (self._fx_chain(name), source)
+        sources.update(run_stem_chains(jobs, sr))
+
+        key = self._master_key(params, mix_key)
+        _, ratio, dolby, hifi = key
+        mix = self._sum(sources, mix_gains)
+        if self._master:
+            gain, gain_source = self._master[1], "song" if self._master[0] == key else "last_song"
+        else:
+            gain, gain_source = np.float32(1.0), "ceiling"
+        chain = MasterChain(sr, mix.shape[0], ratio, dolby, hifi)
+        blocks = list(master_blocks(chain, array_blocks(mix), gain))
+        mix = np.concatenate(blocks, axis=1)[:, warmup:] if blocks else mix
+        self.last_stages = {"preview": "rendered", "fx": list(jobs), "gain": gain_source,
+                            "elapsed": round(time.time() - started, 3)}
+        return mix
+
+    def prepare(self, params):
+        """스템 FX + 합산 캐시를 미리 계산 (이후 export_master / 스템 저장 작업은 캐시만 읽음 → 동시에 실행 가능)"""
+        self.last_stages = {}
+        self._render_mix(params)
+        return dict(self.last_stages)
+
+    def export_stems(self, params, paths, pool=None):
+        """
+        {스템: 경로} 16-bit WAV 저장 (마지막 저장 이후 바뀐 스템만)
+        pool(ExportPool)이 있으면 파일마다 풀에 맡기고 바로 반환 (배열은 제출 시점의 캐시를 사용)
+        """
+        import soundfile as sf
+        from stem_arrays import to_int16
+        gains = stem_gains(self.mode, params)
+        fx_keys = self._render_fx(params, gains)
+        for name, path in paths.items():
+            if name not in self._dry or not path:
+                continue
+            key = (fx_keys[name], float(gains.get(name, 0)))
+            if self._exported.get(path) == key:
+                continue
+            source = self._fx[name][1] if fx_keys[name] else self._dry[name]
+            gain = 1.0 if fx_keys[name] and name in NONLINEAR_STEMS else db_to_gain(gains.get(name, 0))
+
+            def write(path, source=source, gain=gain, key=key):
+                sf.write(path, to_int16(source * gain), self.samplerate, subtype="PCM_16")
+                self._exported[path] = key
+
+            if pool is None:
+                write(path)
+            else:
+                pool.submit("stem", path, write)
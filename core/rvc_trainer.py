@@ -268,6 +268,7 @@ class VoiceConverter:
             # [PRO] Diamond Mastering Fallback (Using pydub)
             try:
                 from pydub import AudioSegment, effects
+                from dynamics import compress_segment
                 proc_wav = AudioSegment.from_file(out_path)
                 
                 # 1. High-End Clarity (Air)
@@ -275,7 +276,7 @@ class VoiceConverter:
                 proc_wav = proc_wav.overlay(highs - 3)
                 
                 # 2. Vocal Presence (Compressor)
-                proc_wav = effects.compress_dynamic_range(proc_wav, threshold=-18, ratio=3.0)
+                proc_wav = compress_segment(proc_wav, threshold=-18, ratio=3.0)
                 
                 # 3. Final Normalize
                 proc_wav = effects.normalize(proc_wav, headroom=0.1)
@@ -7,6 +7,8 @@ import shutil
 import re
 import glob
 
+from workspace import JobWorkspace
+
 # [FIX] Force ASCII output for console
 import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='ascii', errors='replace')
@@ -183,13 +185,12 @@ class LilyScoreMaker:
         safe_base = self.clean_filename(base_name_raw)
         if not safe_base: safe_base = "score"
         
-        import time
-        import random
-        # Unique timestamp for threads
-        ts = int(time.time() * 1000) + random.randint(0, 9999) 
+        # [FIX] 파일별 전용 작업 폴더 (동시 실행되는 다른 변환/프로세스와 임시 파일이 섞이지 않음)
+        ws = JobWorkspace(safe_temp_dir, "score").create()
+        work_dir = ws.path
         
-        temp_xml = os.path.join(safe_temp_dir, f"temp_{ts}.musicxml")
-        temp_ly = os.path.join(safe_temp_dir, f"temp_{ts}.ly")
+        temp_xml = os.path.join(work_dir, "temp.musicxml")
+        temp_ly = os.path.join(work_dir, "temp.ly")
         
         final_pdf = os.path.join(midi_folder_path, f"{safe_base}.pdf")
         final_png = os.path.join(midi_folder_path, f"{safe_base}.png")
@@ -256,16 +257,16 @@ class LilyScoreMaker:
             if os.path.exists(temp_xml):
                 # 2. MusicXML -> LilyPond (.ly)
                 cmd_ly = [self.python_exe, self.musicxml2ly, "-o", temp_ly, temp_xml]
-                self.run_command_safe(cmd_ly, safe_temp_dir)
+                self.run_command_safe(cmd_ly, work_dir)
                 
                 if os.path.exists(temp_ly):
                     # [Layout Patch]
                     self.patch_lilypond_layout(temp_ly)
                     
                     # 3. LilyPond -> PDF + PNG
-                    out_prefix = os.path.join(safe_temp_dir, f"temp_{ts}")
+                    out_prefix = os.path.join(work_dir, "temp")
                     cmd_lily = [self.lilypond_exe, "--pdf", "--png", "-dresolution=300", "-o", out_prefix, temp_ly]
-                    self.run_command_safe(cmd_lily, safe_temp_dir)
+                    self.run_command_safe(cmd_lily, work_dir)
                     
                     # Copy Results
                     generated_pdf = out_prefix + ".pdf"
@@ -289,14 +290,11 @@ class LilyScoreMaker:
             else:
                 print(f"      ❌ Failed MIDI->XML: {midi_file}")
             
-            # Cleanup
-            for f in os.listdir(safe_temp_dir):
-                if f.startswith(f"temp_{ts}"):
-                    try: os.remove(os.path.join(safe_temp_dir, f))
-                    except: pass
-                    
         except Exception as e:
             print(f"   🔥 Error {midi_file}: {str(e)}")
+        finally:
+            # Cleanup (이 파일의 작업 폴더만 삭제)
+            ws.cleanup()
 
 if __name__ == "__main__":
     if len(sys.argv) > 2:
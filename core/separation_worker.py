@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+🔌 Separation Worker Client
+===========================
+상주 Demucs 분리 서버(demucs_runner.py --serve)를 띄우고 파이프로 작업을 보내는 클라이언트.
+- 서버 프로세스는 한 번만 기동되고, 모델은 서버 메모리에 남아 있습니다.
+- 진행률은 서버가 보내는 JSON 이벤트(단계/세그먼트/ETA/처리속도/메모리)를 그대로 progress_callback 으로 전달합니다.
+- separate_to_memory: 스템을 WAV 로 쓰지 않고 공유 메모리의 float32 배열로 받습니다 (SharedStems).
+- 이 모듈은 torch 를 import 하지 않습니다 (GUI 프로세스를 가볍게 유지).
+"""
+
+import os
+import json
+import uuid
+import atexit
+import threading
+import subprocess
+from collections import deque
+
+from subprocess_utils import hidden_startupinfo
+
+
+class SeparationWorkerError(Exception):
+    """분리 서버가 작업을 처리하지 못했거나 비정상 종료된 경우"""
+    pass
+
+
+class SeparationWorker:
+    """
+    상주 분리 서버 1개에 대한 핸들
+
+    사용법:
+        worker = SeparationWorker([sys.executable, "core/demucs_runner.py", "--serve"])
+        worker.separate("song.wav", "stems/song", "htdemucs_6s", device="cuda",
+                        progress_callback=lambda event: print(event["percent"], event.get("eta")))
+        worker.last_stats  # 마지막 작업의 성능 기록 (done 이벤트의 stats)
+    """
+
+    def __init__(self, cmd, env=None, threads=None):
+        self.cmd = cmd
+        self.env = env
+        self.threads = threads  # 서버의 torch CPU 스레드 수 (여러 서버를 동시에 돌릴 때 코어 분배)
+        self.process = None
+        self.stderr_tail = deque(maxlen=50)  # 오류 보고용 최근 로그
+        self.last_stats = None  # 마지막으로 완료된 작업의 성능 기록
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.is_alive():
+            return
+        env = dict(self.env or os.environ)
+        env["TORCHAUDIO_BACKEND"] = "soundfile"
+        env["PYTHONIOENCODING"] = "utf-8"
+
+        self.stderr_tail.clear()
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            startupinfo=hidden_startupinfo(),
+            env=env,
+            bufsize=1,
+        )
+        # stderr 를 계속 비워주지 않으면 파이프가 가득 차 서버가 멈춥니다.
+        threading.Thread(target=self._drain_stderr, args=(self.process,), daemon=True).start()
+
+    def _drain_stderr(self, process):
+        for line in process.stderr:
+            line = line.rstrip()
+            if line:
+                self.stderr_tail.append(line)
+
+    def _read_event(self):
+        """서버 stdout 에서 JSON 이벤트 한 개를 읽음 (JSON 이 아닌 줄은 무시)"""
+        while True:
+            line = self.process.stdout.readline()
+            if line == "":
+                tail = "\n".join(list(self.stderr_tail)[-5:])
+                raise SeparationWorkerError(f"분리 서버가 종료되었습니다 (코드 {self.process.poll()}):\n{tail}")
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+
+    def separate(self, input_path, out_dir, model_name, device="cpu", shifts=2, overlap=0.25,
+                 two_stems=None, progress_callback=None, long_form_sec=None, options=None):
+        """
+        곡 하나를 분리하고 스템 폴더 경로를 반환합니다.
+
+        Args:
+            progress_callback: 진행 이벤트(dict: stage, percent, segment, segments, elapsed,
+                               samples_per_sec, eta, peak_mem_mb)를 받는 함수
+            long_form_sec: 이 길이(초)를 넘는 곡은 서버가 구간 단위로 분리 (메모리 상한 유지)
+            options: 추가 작업 필드 (예: norm_mean/norm_std/rescale, demucs_runner 참고)
+        Returns:
+            str: 스템 WAV 들이 저장된 out_dir
+        """
+        job = self._make_job(input_path, out_dir, model_name, device, shifts, overlap, two_stems, long_form_sec, options)
+        event = self._run_job(job, progress_callback)
+        return event.get("out", job["out"])
+
+    def separate_to_memory(self, input_path, out_dir, model_name, device="cpu", shifts=2, overlap=0.25,
+                           two_stems=None, progress_callback=None, long_form_sec=None, options=None):
+        """
+        separate 와 같지만 스템을 공유 메모리 배열로 받습니다 (디스크 기록/디코딩 없음).
+
+        Returns:
+            SharedStems: 사용 후 반드시 close() (서버 쪽 메모리 해제)
+            None: 서버가 WAV 로 저장한 경우 (긴 입력) → out_dir 의 파일을 사용
+        """
+        job = self._make_job(input_path, out_dir, model_name, device, shifts, overlap, two_stems, long_form_sec, options)
+        job["return"] = "shm"
+        event = self._run_job(job, progress_callback)
+        if not event.get("shm"):
+            return None
+        try:
+            return SharedStems(self, event["shm"])
+        except Exception:
+            self.release(event["shm"]["name"])
+            raise
+
+    def _make_job(self, input_path, out_dir, model_name, device, shifts, overlap, two_stems, long_form_sec, options=None):
+        job = {
+            "id": uuid.uuid4().hex,
+            "input": os.path.abspath(input_path),
+            "out": os.path.abspath(out_dir),
+            "model": model_name,
+            "device": device,
+            "shifts": shifts,
+            "overlap": overlap,
+            "two_stems": two_stems,
+        }
+        if self.threads:
+            job["threads"] = self.threads
+        if long_form_sec:
+            job["long_form_sec"] = long_form_sec
+        if options:
+            job.update(options)
+        return job
+
+    def _send(self, message):
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise SeparationWorkerError(f"분리 서버에 작업을 보낼 수 없습니다: {e}")
+
+    def _run_job(self, job, progress_callback):
+        """작업 전송 후 done 이벤트를 반환 (error 이벤트면 SeparationWorkerError)"""
+        with self._lock:
+            self.start()
+            self.last_stats = None
+            job_id = job["id"]
+            self._send(job)
+
+            while True:
+                event = self._read_event()
+                kind = event.get("event")
+                if kind == "ready" or event.get("id") not in (job_id, None):
+                    continue
+                if kind == "progress":
+                    if progress_callback:
+                        progress_callback(event)
+                elif kind == "done":
+                    self.last_stats = event.get("stats")
+                    return event
+                elif kind == "error":
+                    raise SeparationWorkerError(event.get("message", "Unknown separation error"))
+
+    def release(self, shm_name):
+        """서버에 공유 메모리 해제 요청 (응답 없음)"""
+        with self._lock:
+            if self.is_alive():
+                try:
+                    self._send({"cmd": "release", "name": shm_name})
+                except SeparationWorkerError:
+                    pass
+
+    def close(self):
+        """서버에 종료 요청 후 정리 (응답이 없으면 강제 종료)"""
+        if not self.is_alive():
+            return
+        try:
+            self.process.stdin.write(json.dumps({"cmd": "shutdown"}) + "\n")
+            self.process.stdin.flush()
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except Exception:
+            self.process.kill()
+
+
+def _attach_shared_memory(name):
+    """서버가 만든 공유 메모리에 접속 (해제 책임은 서버에 있으므로 이 프로세스에서는 추적하지 않음)"""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name != "nt":
+            # 3.12 이하: 접속만 해도 resource_tracker 가 종료 시 unlink 하므로 등록 해제
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedStems:
+    """
+    서버 공유 메모리에 있는 분리 결과 (복사 없이 numpy view 로 접근)
+
+    사용법:
+        with worker.separate_to_memory(...) as stems:
+            vocals = stems["vocals"]          # float32 (채널, 샘플) view
+            sr = stems.samplerate
+        # 다른 스레드가 계속 써야 하면 acquire() 후 각자 close()
+    """
+
+    def __init__(self, worker, info):
+        import numpy as np
+        self.worker = worker
+        self.name = info["name"]
+        self.names = list(info["stems"])
+        self.samplerate = info["samplerate"]
+        self._shm = _attach_shared_memory(self.name)
+        self._data = np.ndarray(tuple(info["shape"]), dtype=info.get("dtype", "float32"), buffer=self._shm.buf)
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        return self._data[self.names.index(name)]
+
+    def items(self):
+        return [(name, self._data[i]) for i, name in enumerate(self.names)]
+
+    def acquire(self):
+        with self._lock:
+            self._refs += 1
+        return self
+
+    def close(self):
+        """참조가 모두 닫히면 view 를 버리고 서버에 해제 요청"""
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0 or self._data is None:
+                return
+            self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # 밖에서 잡고 있는 view 가 남아 있으면 GC 시점에 닫힘
+            pass
+        self.worker.release(self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+_shared_worker = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_worker(cmd):
+    """프로그램 전체에서 공유하는 상주 서버 (최초 호출 시 생성, 종료 시 자동 정리)"""
+    global _shared_worker
+    with _shared_lock:
+        if _shared_worker is None:
+            _shared_worker = SeparationWorker(cmd)
+            atexit.register(_shared_worker.close)
+        return _shared_worker
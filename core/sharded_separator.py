@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+🧩 Sharded CPU Separation
+=========================
+CPU 전용 환경에서 곡 하나를 여러 분리 서버 프로세스에 나눠 맡겨 코어를 모두 사용합니다.
+- 곡을 겹치는 구간(샤드)으로 나누고, 샤드마다 전용 상주 서버 1개 (torch 스레드 수 고정)
+- 정규화 기준(평균/표준편차)은 곡 전체 값을 모든 샤드에 전달 → 단일 프로세스 결과와 같은 스케일
+- 샤드 결과는 공유 메모리로 받아 겹치는 부분을 선형 크로스페이드로 이어 붙임
+- 피크 조정(rescale)은 이어 붙인 뒤 스템 전체 기준으로 한 번만 적용
+"""
+
+import os
+import time
+import queue
+import threading
+import concurrent.futures
+
+import numpy as np
+import soundfile as sf
+
+from separation_worker import SeparationWorker
+from batch_separator import recommended_pool_size, decode_to_wav
+from stem_arrays import write_stem_files
+
+# 샤드 사이 겹침 길이 (초) - Demucs 세그먼트(약 8초)의 가장자리 품질 저하 구간을 덮을 만큼
+SHARD_CROSSFADE_SEC = 5.0
+# 샤드 최소 길이 (초) - 이보다 짧게 나누면 겹침/모델 기동 비용이 이득보다 큼
+MIN_SHARD_SEC = 30.0
+
+
+def recommended_shard_workers():
+    """CPU 코어/가용 메모리 기준 샤드 워커 수 (batch 모드와 같은 기준)"""
+    return recommended_pool_size(use_gpu=False)
+
+
+def plan_shards(total_frames, samplerate, shard_count, crossfade_sec=SHARD_CROSSFADE_SEC,
+                min_shard_sec=MIN_SHARD_SEC):
+    """
+    [(시작, 끝), ...] 입력 프레임 구간 목록
+    인접 샤드는 crossfade 만큼 겹치고, 샤드 길이는 min_shard_sec 이상이 되도록 개수를 줄입니다.
+    """
+    cross = int(crossfade_sec * samplerate)
+    min_len = int(min_shard_sec * samplerate)
+    count = max(1, int(shard_count))
+    while count > 1 and (total_frames + (count - 1) * cross) / count < max(min_len, 2 * cross):
+        count -= 1
+    if count == 1:
+        return [(0, total_frames)]
+    length = int(np.ceil((total_frames + (count - 1) * cross) / count))
+    hop = length - cross
+    shards = [(k * hop, min(k * hop + length, total_frames)) for k in range(count)]
+    shards[-1] = (shards[-1][0], total_frames)
+    return shards
+
+
+class ShardedSeparator:
+    """
+    사용법:
+        sharded = ShardedSeparator(server_cmd, workers=4)          # 코어 16개 → 서버 4개 x 스레드 4
+        sharded.separate("song.wav", "stems/song", "htdemucs_6s", progress_callback=on_event)
+        sharded.last_stats                                          # 샤드/단계별 성능 기록
+        sharded.close()
+    """
+
+    def __init__(self, server_cmd, workers=None, threads_per_worker=None, crossfade_sec=SHARD_CROSSFADE_SEC,
+                 work_dir=None, ffmpeg="ffmpeg"):
+        self.server_cmd = server_cmd
+        self.workers = max(1, workers or recommended_shard_workers())
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.crossfade_sec = crossfade_sec
+        self.work_dir = work_dir
+        self.ffmpeg = ffmpeg
+        self.last_stats = None
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()  # 한 번에 곡 하나
+
+    def _acquire_worker(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            worker = SeparationWorker(self.server_cmd, threads=self.threads_per_worker)
+            self._all.append(worker)
+            return worker
+
+    def separate(self, input_path, out_dir, model_name, shifts=2, overlap=0.25, two_stems=None,
+                 progress_callback=None, work_dir=None, options=None):
+        """
+        곡 하나를 샤드 단위 병렬 분리 후 out_dir/<스템>.wav 로 저장하고 out_dir 을 반환합니다.
+        progress_callback 은 상주 서버와 같은 형식의 진행 이벤트(dict)를 받습니다.
+        options: 샤드 작업마다 붙일 추가 필드 (예: engine)
+        """
+        with self._lock:
+            return self._separate(input_path, out_dir, model_name, shifts, overlap, two_stems,
+                                  progress_callback, work_dir or self.work_dir or out_dir, options or {})
+
+    def _separate(self, input_path, out_dir, model_name, shifts, overlap, two_stems, progress_callback, work_dir,
+                  options):
+        started = time.time()
+        stages = {}
+        shard_dir = os.path.join(work_dir, "_shards")
+        os.makedirs(shard_dir, exist_ok=True)
+
+        # [1] 입력 로딩 + 곡 전체 정규화 값 + 샤드 파일 작성
+        try:
+            sf.info(input_path)
+        except Exception:
+            input_path = decode_to_wav(input_path, os.path.join(shard_dir, "input.wav"), self.ffmpeg)
+        audio, in_sr = sf.read(input_path, dtype="float32", always_2d=True)
+        if audio.shape[1] == 1:
+            audio = np.repeat(audio, 2, axis=1)
+        mono = audio.mean(axis=1, dtype=np.float64)
+        norm = dict(options, norm_mean=float(mono.mean()), norm_std=max(float(mono.std()), 1e-8), rescale=False)
+        del mono
+
+        shards = plan_shards(len(audio), in_sr, self.workers, self.crossfade_sec)
+        shard_paths = []
+        for k, (start, end) in enumerate(shards):
+            path = os.path.join(shard_dir, f"shard_{k:02d}.wav")
+            sf.write(path, audio[start:end], in_sr, subtype="FLOAT")
+            shard_paths.append(path)
+        total_in = len(audio)
+        del audio
+        stages["split"] = round(time.time() - started, 3)
+
+        # [2] 샤드 병렬 분리 (샤드마다 전용 서버)
+        percents = [0] * len(shards)
+        peaks = [0.0] * len(shards)
+        finished = {"count": 0}
+        progress_lock = threading.Lock()
+        separate_started = time.time()
+
+        def report():
+            if not progress_callback:
+                return
+            fraction = sum(percents) / (100.0 * len(percents))
+            elapsed = time.time() - separate_started
+            progress_callback({
+                "event": "progress", "stage": "separate", "percent": int(fraction * 100),
+                "segment": finished["count"], "segments": len(shards),
+                "elapsed": round(time.time() - started, 3),
+                "samples_per_sec": int(total_in * fraction / elapsed) if elapsed > 0 and fraction > 0 else None,
+                "eta": round(elapsed * (1 - fraction) / fraction, 1) if fraction > 0 else None,
+                "peak_mem_mb": round(sum(peaks), 1) or None,
+            })
+
+        def run_shard(k):
+            worker = self._acquire_worker()
+            try:
+                def on_event(event):
+                    with progress_lock:
+                        percents[k] = event.get("percent", 0) if event.get("stage") == "separate" else percents[k]
+                        peaks[k] = max(peaks[k], event.get("peak_mem_mb") or 0.0)
+                        report()
+
+                shared = worker.separate_to_memory(shard_paths[k], os.path.join(shard_dir, f"out_{k:02d}"),
+                                                   model_name, device="cpu", shifts=shifts, overlap=overlap,
+                                                   two_stems=two_stems, progress_callback=on_event, options=norm)
+                try:
+                    result = (shared.samplerate, {name: np.array(data) for name, data in shared.items()})
+                finally:
+                    shared.close()
+                with progress_lock:
+                    percents[k] = 100
+                    finished["count"] += 1
+                    report()
+                return result
+            finally:
+                self._idle.put(worker)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            results = list(executor.map(run_shard, range(len(shards))))
+        stages["separate"] = round(time.time() - separate_started, 3)
+
+        # [3] 이어 붙이기 (겹치는 구간 선형 크로스페이드) → 스템 전체 기준 피크 조정 → 저장
+        stitch_started = time.time()
+        sr = results[0][0]
+        to_out = lambda frame: int(round(frame * sr / in_sr))
+        total_out = to_out(total_in)
+        names = list(results[0][1].keys())
+        mixed = {name: np.zeros((results[0][1][name].shape[0], total_out), dtype=np.float32) for name in names}
+
+        for k, ((start, end), (_, stems)) in enumerate(zip(shards, results)):
+            out_start, out_end = to_out(start), to_out(end)
+            length = out_end - out_start
+            weight = np.ones(length, dtype=np.float32)
+            if k > 0:
+                fade_in = to_out(shards[k - 1][1]) - out_start
+                weight[:fade_in] = np.linspace(0.0, 1.0, fade_in, dtype=np.float32)
+            if k < len(shards) - 1:
+                fade_out = out_end - to_out(shards[k + 1][0])
+                weight[length - fade_out:] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)
+            for name in names:
+                data = stems[name]
+                if data.shape[-1] < length:
+                    data = np.pad(data, ((0, 0), (0, length - data.shape[-1])))
+                mixed[name][:, out_start:out_end] += data[:, :length] * weight
+
+        for name in names:
+            # Demucs save_audio(clip="rescale") 와 같은 규칙
+            mixed[name] /= max(1.01 * float(np.abs(mixed[name]).max()), 1.0)
+        write_stem_files(out_dir, mixed.items(), sr)
+        stages["stitch"] = round(time.time() - stitch_started, 3)
+
+        for path in shard_paths:
+            try: os.remove(path)
+            except OSError: pass
+
+        separate_sec = stages["separate"]
+        self.last_stats = {
+            "elapsed": round(time.time() - started, 3),
+            "stages": stages,
+            "samples": total_out,
+            "audio_sec": round(total_out / sr, 3),
+            "samples_per_sec": int(total_out / separate_sec) if separate_sec > 0 else None,
+            "peak_mem_mb": round(sum(peaks), 1) or None,
+            "segments": len(shards),
+            "shards": len(shards),
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+        }
+        return out_dir
+
+    def close(self):
+        for worker in self._all:
+            worker.close()
+        self._all = []
+        self._idle = queue.Queue()
+
+
+_shared_sharded = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_sharded_separator(server_cmd, workers=None):
+    """프로그램 전체에서 공유하는 샤드 분리기 (서버들은 곡 사이에도 유지, 종료 시 자동 정리)"""
+    global _shared_sharded
+    with _shared_lock:
+        if _shared_sharded is None:
+            import atexit
+            _shared_sharded = ShardedSeparator(server_cmd, workers=workers)
+            atexit.register(_shared_sharded.close)
+        return _shared_sharded
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+🧮 Stem Arrays
+==============
+float32 스템 배열 (채널, 샘플) ↔ 믹서/파일 변환 도우미.
+- 공유 메모리로 받은 스템을 디스크를 거치지 않고 AudioSegment 로 변환
+- 캐시 저장용 16-bit WAV 기록 (Demucs save_audio 와 같은 포맷)
+"""
+
+import os
+
+import numpy as np
+
+
+def to_int16(array):
+    """float32 (채널, 샘플) → 인터리브된 int16 (샘플, 채널)"""
+    return np.clip(np.asarray(array).T * 32768.0, -32768, 32767).astype("<i2")
+
+
+def to_audio_segment(array, samplerate):
+    """float32 (채널, 샘플) → pydub AudioSegment (임시 파일 없이 메모리에서 변환)"""
+    from pydub import AudioSegment
+    return AudioSegment(data=to_int16(array).tobytes(), sample_width=2,
+                        frame_rate=int(samplerate), channels=int(np.asarray(array).shape[0]))
+
+
+def write_stem_files(out_dir, named_arrays, samplerate):
+    """{이름: float32 (채널, 샘플)} → out_dir/<이름>.wav (16-bit PCM)"""
+    import soundfile as sf
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in named_arrays:
+        sf.write(os.path.join(out_dir, f"{name}.wav"), to_int16(array), int(samplerate), subtype="PCM_16")
+    return out_dir
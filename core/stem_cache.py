@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+🗃️ Stem Cache
+=============
+분리 결과(스템 WAV)를 디스크에 보관하는 내용 기반(content-addressed) 캐시.
+- 키: 디코딩된 오디오(PCM) 해시 + 모델명 + shifts + overlap + 스템 모드
+  (파일명/태그가 달라도 같은 소리면 같은 키)
+- 용량 상한 초과 시 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import subprocess
+
+from subprocess_utils import hidden_startupinfo
+
+DEFAULT_MAX_BYTES = 8 * 1024 ** 3  # 8 GB
+META_FILE = "cache_meta.json"
+
+
+class StemCache:
+    """
+    사용법:
+        cache = StemCache("stem_cache", max_bytes=8 * 1024**3)
+        key = cache.make_key(cache.audio_fingerprint("song.mp3"), "htdemucs_6s", 2, 0.25, "6-Stem")
+        hit = cache.lookup(key, ["drums.wav", ...])   # 있으면 폴더 경로, 없으면 None
+        cache.store(key, separated_dir)               # 분리 직후 결과 폴더를 캐시로 이동
+        cache.store_arrays(key, stems.items(), 44100) # 메모리로 받은 스템을 캐시에 기록
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, ffmpeg="ffmpeg"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ffmpeg = ffmpeg
+        self._fingerprints = {}  # (경로, 크기, 수정시각) -> 해시 (같은 세션 재실행 시 재디코딩 생략)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def audio_fingerprint(self, path):
+        """디코딩된 PCM 스트림의 SHA-256 (ffmpeg 사용 불가 시 파일 바이트 해시)"""
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if memo_key in self._fingerprints:
+            return self._fingerprints[memo_key]
+
+        digest = hashlib.sha256()
+        try:
+            cmd = [self.ffmpeg, "-v", "error", "-i", path, "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"]
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    startupinfo=hidden_startupinfo())
+            for block in iter(lambda: proc.stdout.read(1 << 20), b""):
+                digest.update(block)
+            proc.wait()
+            if proc.returncode != 0:
+                raise RuntimeError(f"ffmpeg exit code {proc.returncode}")
+            fingerprint = "pcm-" + digest.hexdigest()
+        except (OSError, RuntimeError):
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            fingerprint = "file-" + digest.hexdigest()
+
+        self._fingerprints[memo_key] = fingerprint
+        return fingerprint
+
+    @staticmethod
+    def make_key(audio_hash, model_name, shifts, overlap, stem_mode):
+        payload = json.dumps({
+            "audio": audio_hash,
+            "model": model_name,
+            "shifts": int(shifts),
+            "overlap": round(float(overlap), 4),
+            "stems": stem_mode,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def lookup(self, key, required_files=()):
+        """캐시 적중 시 스템 폴더 경로 반환 (LRU 시각 갱신), 없거나 불완전하면 None"""
+        path = self.entry_dir(key)
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        if any(not os.path.exists(os.path.join(path, f)) for f in required_files):
+            return None
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+        return path
+
+    def store(self, key, src_dir, meta=None):
+        """
+        분리 결과 폴더를 캐시 항목으로 이동하고 최종 경로를 반환합니다.
+        (임시 폴더에 먼저 옮긴 뒤 이름을 바꾸므로 중간에 실패해도 반쯤 찬 항목이 남지 않습니다)
+        """
+        dest = self.entry_dir(key)
+        staging = f"{dest}.tmp{os.getpid()}_{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.move(src_dir, staging)
+
+        info = dict(meta or {})
+        info["key"] = key
+        info["created"] = time.time()
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+
+        with self._lock:
+            shutil.rmtree(dest, ignore_errors=True)
+            os.replace(staging, dest)
+            self.evict(keep=key)
+        return dest
+
+    def store_arrays(self, key, named_arrays, samplerate, meta=None):
+        """
+        메모리 스템 배열 [(이름, float32 (채널, 샘플)), ...] 을 캐시 항목으로 기록하고 경로를 반환합니다.
+        (캐시 폴더 옆 임시 폴더에 쓴 뒤 store 로 넘기므로 작업 폴더를 거치지 않습니다)
+        """
+        from stem_arrays import write_stem_files
+        staging = f"{self.entry_dir(key)}.arr{os.getpid()}_{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            write_stem_files(staging, named_arrays, samplerate)
+            return self.store(key, staging, meta)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _entries(self):
+        """(마지막 사용 시각, 크기, 경로) 목록"""
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            meta_path = os.path.join(path, META_FILE)
+            if not os.path.isdir(path) or not os.path.exists(meta_path):
+                continue
+            size = 0
+            for f in os.listdir(path):
+                try:
+                    size += os.path.getsize(os.path.join(path, f))
+                except OSError:
+                    pass
+            entries.append((os.path.getmtime(meta_path), size, path))
+        return entries
+
+    def evict(self, keep=None):
+        """전체 용량이 상한을 넘으면 오래된 항목부터 삭제"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.basename(path) == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        return total
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+🔀 Stem Derivation
+==================
+이미 캐시에 있는 분리 결과로 다른 스템 모드 요청을 분리 없이 만들어 냅니다.
+- 2-Stem 요청 ← 캐시된 6-Stem 결과: vocals 는 그대로 복사, no_vocals = drums+bass+guitar+piano+other
+- 만들어진 결과는 "6-Stem 모델로 만든 2-Stem" 키로 캐시에 저장 → 다음부터는 바로 적중
+- 반대 방향(2-Stem → 6-Stem)은 no_vocals 를 악기별로 나눌 수 없으므로 지원하지 않음
+  (공통인 vocals 만으로는 6-Stem 믹스를 만들 수 없음)
+"""
+
+import os
+import shutil
+import threading
+
+import numpy as np
+
+SIX_STEM_NAMES = ("vocals", "drums", "bass", "guitar", "piano", "other")
+TWO_STEM_NAMES = ("vocals", "no_vocals")
+
+
+def derive_two_stem(six_dir, out_dir):
+    """6-Stem 폴더 → out_dir/vocals.wav + no_vocals.wav (반주는 보컬 외 5개 스템의 합)"""
+    import soundfile as sf
+    no_vocals, samplerate = None, None
+    for name in SIX_STEM_NAMES:
+        if name == "vocals":
+            continue
+        # 16-bit 그대로 읽어 int32 로 누적 (float 변환 비용 생략, 합산 결과는 동일)
+        data, samplerate = sf.read(os.path.join(six_dir, f"{name}.wav"), dtype="int16", always_2d=True)
+        if no_vocals is None:
+            no_vocals = data.astype(np.int32)
+        else:
+            n = min(len(no_vocals), len(data))
+            no_vocals = no_vocals[:n]
+            no_vocals += data[:n]
+
+    peak = int(np.abs(no_vocals).max()) if no_vocals.size else 0
+    if 1.01 * peak > 32768:
+        # Demucs --two-stems 저장 규칙과 같게 (save_audio clip="rescale")
+        no_vocals = no_vocals.astype(np.float32) / (1.01 * peak / 32768.0)
+    os.makedirs(out_dir, exist_ok=True)
+    sf.write(os.path.join(out_dir, "no_vocals.wav"), np.clip(no_vocals, -32768, 32767).astype("<i2"),
+             samplerate, subtype="PCM_16")
+    shutil.copyfile(os.path.join(six_dir, "vocals.wav"), os.path.join(out_dir, "vocals.wav"))
+    return out_dir
+
+
+# 요청 모드 → (원본 모드, 원본 모델, 원본 스템, 결과 스템, 변환 함수)
+DERIVATIONS = {
+    "2-Stem": ("6-Stem", "htdemucs_6s", SIX_STEM_NAMES, TWO_STEM_NAMES, derive_two_stem),
+}
+
+
+def lookup_derived(cache, audio_hash, mode, shifts, overlap, model_suffixes=("",)):
+    """
+    mode 요청을 캐시된 다른 모드 결과로 만들어 캐시 폴더 경로를 반환 (만들 수 없으면 None)
+
+    model_suffixes: 원본 모델 캐시 이름 뒤에 붙일 접미사 후보 (예: "", "+int8"), 앞에 있을수록 우선
+    """
+    rule = DERIVATIONS.get(mode)
+    if rule is None:
+        return None
+    source_mode, source_model, source_names, target_names, derive = rule
+    target_files = [f"{name}.wav" for name in target_names]
+    source_files = [f"{name}.wav" for name in source_names]
+
+    for suffix in model_suffixes:
+        model = f"{source_model}{suffix}"
+        derived_key = cache.make_key(audio_hash, model, shifts, overlap, mode)
+        hit = cache.lookup(derived_key, target_files)
+        if hit:
+            return hit
+        source_dir = cache.lookup(cache.make_key(audio_hash, model, shifts, overlap, source_mode), source_files)
+        if not source_dir:
+            continue
+
+        staging = f"{cache.entry_dir(derived_key)}.drv{os.getpid()}_{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            derive(source_dir, staging)
+            return cache.store(derived_key, staging, {
+                "model": model, "shifts": shifts, "overlap": overlap, "mode": mode,
+                "derived_from": source_mode,
+            })
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+🎛️ Stem FX Engine (Pedalboard)
+==============================
+Pro 6-Stem 개별 FX 를 프로세스 안에서 메모리 배열로 처리합니다 (ffmpeg 왕복/pydub 순수 파이썬 루프 대체).
+- Vocal Air   : 10 kHz 하이 셸프 +4 dB
+- Drum Punch  : 컴프레서 (-15 dB, 3:1, 5/100 ms)
+- Bass Warmth : 500 Hz 1차 로우패스 + 2 dB
+- Stereo Wall : ffmpeg stereowiden 과 같은 지연 크로스피드 와이드너 (NumPy)
+- 스템별 체인은 스레드 풀에서 동시에 실행 (Pedalboard/NumPy 모두 처리 중 GIL 을 놓음)
+- pedalboard 가 없으면 PEDALBOARD_AVAILABLE=False → 호출자는 ffmpeg 필터(fx_graph)로 대체
+"""
+
+import os
+import concurrent.futures
+
+import numpy as np
+
+try:
+    from pedalboard import Pedalboard, Compressor, HighShelfFilter, LowpassFilter, Gain
+    PEDALBOARD_AVAILABLE = True
+except ImportError:
+    PEDALBOARD_AVAILABLE = False
+
+
+def stereo_widen(array, samplerate, delay_ms=20.0, feedback=0.3, crossfeed=0.4, drymix=0.6):
+    """ffmpeg stereowiden 필터와 같은 계산 (반대 채널을 빼고, 지연된 반대 채널을 한 번 더 뺌)"""
+    if array.shape[0] != 2:
+        return array
+    left, right = array[0], array[1]
+    delay = int(samplerate * delay_ms / 1000.0)
+    out = np.empty_like(array)
+    out[0] = drymix * left - crossfeed * right
+    out[1] = drymix * right - crossfeed * left
+    if 0 < delay < array.shape[-1]:
+        out[0, delay:] -= feedback * right[:-delay]
+        out[1, delay:] -= feedback * left[:-delay]
+    return out
+
+
+# 스템 → 그 스템의 FX 를 켜는 pro_fx 키
+STEM_FX_FLAGS = {"vocals": "vocal_air", "drums": "drum_punch", "bass": "bass_warmth",
+                 "guitar": "stereo_wall", "piano": "stereo_wall"}
+# 입력 레벨에 따라 결과가 달라지는(비선형) FX 스템 - 페이더 게인을 FX 앞에서 적용해야 함
+NONLINEAR_STEMS = {"drums"}
+
+
+def build_stem_chains(pro_fx):
+    """6-Stem Advanced FX 설정 → {스템: 처리 함수(array, samplerate) → array} (호출마다 새 Pedalboard 인스턴스)"""
+    chains = {}
+    if pro_fx.get('vocal_air'):
+        chains["vocals"] = Pedalboard([HighShelfFilter(cutoff_frequency_hz=10000, gain_db=4.0)])
+    if pro_fx.get('drum_punch'):
+        chains["drums"] = Pedalboard([Compressor(threshold_db=-15, ratio=3.0, attack_ms=5, release_ms=100)])
+    if pro_fx.get('bass_warmth'):
+        chains["bass"] = Pedalboard([LowpassFilter(cutoff_frequency_hz=500), Gain(gain_db=2.0)])
+    if pro_fx.get('stereo_wall'):
+        chains["guitar"] = chains["piano"] = stereo_widen
+    return chains
+
+
+def run_stem_chains(jobs, samplerate, max_workers=None):
+    """{스템: (처리 함수, 배열)} 을 스레드 풀로 동시에 실행 → {스템: 결과 배열}"""
+    if not jobs:
+        return {}
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(chain, array, samplerate) for name, (chain, array) in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def apply_stem_fx(bus, pro_fx, max_workers=None):
+    """
+    믹스 버스(MixBus)의 스템에 FX 체인을 스레드 풀로 동시에 적용 (버스 배열을 직접 교체)
+
+    Returns:
+        FX 를 적용한 스템 이름 목록
+    """
+    jobs = {name: (chain, bus[name]) for name, chain in build_stem_chains(pro_fx).items() if name in bus}
+    for name, array in run_stem_chains(jobs, bus.samplerate, max_workers).items():
+        bus[name] = array
+    return list(jobs)
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+공용 subprocess 헬퍼 (Windows 콘솔 창 숨김 등)
+"""
+
+import subprocess
+
+
+def hidden_startupinfo():
+    """Windows 에서만 콘솔 창을 숨기는 STARTUPINFO 생성 (다른 OS 에서는 None)"""
+    if not hasattr(subprocess, "STARTUPINFO"):
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+🎼 Transcription Worker Client
+==============================
+상주 MIDI 변환 서버(midi_engine.py --serve)를 띄우고 파이프로 작업을 보내는 클라이언트.
+- 서버 프로세스는 한 번만 기동되고, basic-pitch 모델은 서버 메모리에 남아 있습니다.
+  (스템마다 반복되던 인터프리터 기동 + TensorFlow import + 모델 로딩 비용 제거)
+- TensorFlow 는 서버 프로세스에만 올라감 → GUI 프로세스와의 환경 충돌 차단은 그대로 유지
+- transcribe_batch(): 여러 스템을 작업 1개로 보내 추론 배치를 스템 사이에서 공유 (midi_engine.transcribe_batch)
+- backend: 작업/스템마다 변환 엔진 지정 (midi_engine.BACKENDS 이름, 없으면 "auto" 예비 경로)
+- 작업마다 done 이벤트의 성능 기록(엔진, 모델 로딩/추론/저장 시간, 노트 수)을 last_stats / history 에 보관
+- 서버가 비정상 종료되면 다음 작업에서 자동으로 다시 기동
+"""
+
+import os
+import json
+import uuid
+import atexit
+import threading
+import subprocess
+from collections import deque
+
+from subprocess_utils import hidden_startupinfo
+
+
+class TranscriptionWorkerError(Exception):
+    """변환 서버가 작업을 처리하지 못했거나 비정상 종료된 경우"""
+    pass
+
+
+class TranscriptionWorker:
+    """
+    상주 변환 서버 1개에 대한 핸들
+
+    사용법:
+        worker = TranscriptionWorker([sys.executable, "core/midi_engine.py", "--serve"])
+        stats = worker.transcribe("6S_piano_song.wav", "미디분리/song_piano.mid")
+        stats["elapsed"], stats["warm"]       # 작업 시간, 모델이 이미 올라와 있었는지
+    """
+
+    def __init__(self, cmd, env=None, history_size=100):
+        self.cmd = cmd
+        self.env = env
+        self.process = None
+        self.stderr_tail = deque(maxlen=50)  # 오류 보고용 최근 로그
+        self.last_stats = None  # 마지막으로 완료된 작업의 성능 기록
+        self.history = deque(maxlen=history_size)  # [(입력 파일 이름, 성능 기록)]
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.is_alive():
+            return
+        env = dict(self.env or os.environ)
+        env["PYTHONIOENCODING"] = "utf-8"
+
+        self.stderr_tail.clear()
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            startupinfo=hidden_startupinfo(),
+            env=env,
+            bufsize=1,
+        )
+        # stderr(TensorFlow 로그 포함)를 계속 비워주지 않으면 파이프가 가득 차 서버가 멈춥니다.
+        threading.Thread(target=self._drain_stderr, args=(self.process,), daemon=True).start()
+
+    def _drain_stderr(self, process):
+        for line in process.stderr:
+            line = line.rstrip()
+            if line:
+                self.stderr_tail.append(line)
+
+    def _read_event(self):
+        """서버 stdout 에서 JSON 이벤트 한 개를 읽음 (JSON 이 아닌 줄은 무시)"""
+        while True:
+            line = self.process.stdout.readline()
+            if line == "":
+                tail = "\n".join(list(self.stderr_tail)[-5:])
+                raise TranscriptionWorkerError(f"변환 서버가 종료되었습니다 (코드 {self.process.poll()}):\n{tail}")
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+
+    def _send(self, message):
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise TranscriptionWorkerError(f"변환 서버에 작업을 보낼 수 없습니다: {e}")
+
+    def transcribe(self, audio_path, output_midi, options=None, backend=None):
+        """
+        오디오 1개 → MIDI 파일 1개 (서버가 작업 1개씩 순서대로 처리)
+
+        Args:
+            options: basic-pitch predict 옵션 (onset_threshold, frame_threshold, minimum_note_length, ...)
+            backend: 변환 엔진 이름 (None 이면 auto)
+        Returns:
+            dict: 성능 기록 (engine, elapsed, model_load_sec, predict_sec, write_sec, notes, warm)
+        """
+        job = {"id": uuid.uuid4().hex, "input": os.path.abspath(audio_path),
+               "output": os.path.abspath(output_midi), "options": options or {}, "backend": backend}
+        event = self._run_job(job)
+        self.last_stats = event.get("stats") or {}
+        self.history.append((os.path.basename(audio_path), self.last_stats))
+        return self.last_stats
+
+    def transcribe_batch(self, jobs, options=None):
+        """
+        여러 스템을 작업 1개로 변환 (서버가 모든 스템의 창을 모아 추론 배치를 채움)
+
+        Args:
+            jobs: [(오디오 경로, 출력 MIDI 경로[, 엔진 이름]), ...]
+        Returns:
+            list: 스템별 성능 기록 (실패한 스템은 {"error": 메시지}) - 배치 전체 기록은 last_stats
+        """
+        job = {"id": uuid.uuid4().hex, "cmd": "batch", "options": options or {},
+               "jobs": [{"input": os.path.abspath(job[0]), "output": os.path.abspath(job[1]),
+                         "backend": job[2] if len(job) > 2 else None} for job in jobs]}
+        event = self._run_job(job)
+        self.last_stats = event.get("stats") or {}
+        results = event.get("results") or []
+        for job, stats in zip(jobs, results):
+            self.history.append((os.path.basename(job[0]), stats))
+        return results
+
+    def _run_job(self, job):
+        """작업 전송 후 done 이벤트를 반환 (error 이벤트면 TranscriptionWorkerError)"""
+        with self._lock:
+            self.start()
+            self.last_stats = None
+            self._send(job)
+
+            while True:
+                event = self._read_event()
+                kind = event.get("event")
+                if kind == "ready" or event.get("id") not in (job["id"], None):
+                    continue
+                if kind == "done":
+                    return event
+                if kind == "error":
+                    raise TranscriptionWorkerError(event.get("message", "Unknown transcription error"))
+
+    def report(self):
+        """작업별 시간 요약 (처리 순서)"""
+        lines = []
+        for name, stats in list(self.history):
+            sec = stats.get("elapsed", stats.get("predict_sec", 0))
+            lines.append(f"  {name:<40} {stats.get('engine', 'error'):<12} {sec:7.2f}s")
+        return f"Transcription ({len(lines)} jobs)\n" + "\n".join(lines)
+
+    def close(self):
+        """서버에 종료 요청 후 정리 (응답이 없으면 강제 종료)"""
+        if not self.is_alive():
+            return
+        try:
+            self.process.stdin.write(json.dumps({"cmd": "shutdown"}) + "\n")
+            self.process.stdin.flush()
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except Exception:
+            self.process.kill()
+
+
+_shared_worker = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transcription_worker(cmd):
+    """프로그램 전체에서 공유하는 상주 변환 서버 (최초 호출 시 생성, 종료 시 자동 정리)"""
+    global _shared_worker
+    with _shared_lock:
+        if _shared_worker is None:
+            _shared_worker = TranscriptionWorker(cmd)
+            atexit.register(_shared_worker.close)
+        return _shared_worker
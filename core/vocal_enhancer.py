@@ -12,7 +12,8 @@ Version: 1.0
 import os
 import numpy as np
 from pydub import AudioSegment
-from pydub.effects import normalize, compress_dynamic_range
+from pydub.effects import normalize
+from dynamics import compress_segment  # [NEW] 벡터화 컴프레서 (pydub compress_dynamic_range 대체)
 from scipy import signal
 import soundfile as sf
 
@@ -90,8 +91,8 @@ class VocalEnhancer:
             return audio
         
         print("  🗜️ 컴프레서 적용 중...")
-        # pydub의 compress_dynamic_range 사용
-        audio = compress_dynamic_range(
+        # [수정] pydub compress_dynamic_range 와 같은 인자의 NumPy 컴프레서
+        audio = compress_segment(
             audio,
             threshold=-20.0,  # dB
             ratio=4.0,
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+🧰 Job Workspace
+================
+작업(곡 분리 / 배치 / 악보 변환) 1개 전용 임시 폴더.
+- 작업마다 고유한 폴더 (시각 + 랜덤 ID) → 여러 작업이 동시에 돌아도 파일이 섞이지 않음
+- 정리는 자기 폴더만 삭제 (공용 임시 폴더 전체를 지우지 않음)
+- 결과 경로는 작업이 직접 정하므로 "가장 최근 수정된 폴더" 같은 추측이 필요 없음
+- 비정상 종료로 남은 폴더는 소유 프로세스가 더 이상 없을 때만 purge_stale 로 정리
+"""
+
+import os
+import time
+import uuid
+import shutil
+
+OWNER_FILE = ".owner"
+
+
+class JobWorkspace:
+    """
+    사용법:
+        with JobWorkspace(TEMP_DIR, "song") as ws:
+            safe_input = ws.stage_input("C:/음악/내 노래.mp3")   # ws/input.mp3
+            out_dir = ws.sub("separated", "htdemucs_6s")
+        # with 블록을 벗어나면 ws 폴더만 삭제
+    """
+
+    def __init__(self, root, prefix="job", keep=False):
+        self.root = root
+        self.job_id = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(root, self.job_id)
+        self.keep = keep  # True 면 정리하지 않음 (디버깅용)
+
+    def create(self):
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, OWNER_FILE), "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        return self
+
+    def sub(self, *parts):
+        """작업 폴더 아래 하위 폴더 경로 (없으면 생성)"""
+        path = os.path.join(self.path, *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def file(self, *parts):
+        """작업 폴더 아래 파일 경로 (상위 폴더만 생성)"""
+        path = os.path.join(self.path, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def stage_input(self, src, name="input"):
+        """입력 파일을 ASCII 이름으로 복사 (한글/특수문자 경로로 인한 외부 도구 오류 방지)"""
+        dest = self.file(name + os.path.splitext(src)[1].lower())
+        shutil.copyfile(src, dest)
+        return dest
+
+    def cleanup(self):
+        if not self.keep:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
+
+
+def _pid_alive(pid):
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name == "nt":
+        # psutil 이 없으면 Windows 에서는 안전하게 살아있다고 가정 (os.kill 은 프로세스를 종료시킴)
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def purge_stale(root):
+    """소유 프로세스가 종료된 작업 폴더 삭제 (프로그램 시작 시 1회), 삭제한 개수 반환"""
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        owner = os.path.join(path, OWNER_FILE)
+        if not os.path.isfile(owner):
+            continue
+        try:
+            with open(owner, "r", encoding="utf-8") as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""dynamics.compress_segment - pydub effects.compress_dynamic_range 와 10 ms 창 평균 게인이 같은지 확인"""
+
+import os
+import sys
+import unittest
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", RuntimeWarning)  # ffmpeg 경로 경고 (이 테스트는 ffmpeg 를 쓰지 않음)
+    from pydub import effects
+
+from dynamics import compress_segment
+from stem_arrays import to_audio_segment
+from mix_bus import segment_to_array
+
+SR = 44100
+WINDOW = SR // 100  # 10 ms
+
+
+def tone_burst(loud=0.8, quiet=0.1, seconds=2.0):
+    """quiet → (0.5~1.2초) loud → quiet 스테레오 사인파"""
+    t = np.arange(int(SR * seconds)) / SR
+    env = np.where((t >= 0.5) & (t < 1.2), loud, quiet)
+    return np.stack([np.sin(2 * np.pi * 220 * t) * env, np.sin(2 * np.pi * 330 * t) * env]).astype(np.float32)
+
+
+def windowed_gain_db(processed, original):
+    n = min(processed.shape[-1], original.shape[-1]) // WINDOW * WINDOW
+
+    def level(x):
+        return np.sqrt(np.mean(x[:, :n].astype(np.float64).reshape(x.shape[0], -1, WINDOW) ** 2, axis=(0, 2)))
+    return 20 * np.log10(level(processed) / level(original))
+
+
+def ms(start, end):
+    return slice(start // 10, end // 10)
+
+
+class CompressSegmentTest(unittest.TestCase):
+    def compare(self, threshold, ratio, attack=5.0, release=50.0):
+        seg = to_audio_segment(tone_burst(), SR)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ref = effects.compress_dynamic_range(seg, threshold=threshold, ratio=ratio, attack=attack, release=release)
+        new = compress_segment(seg, threshold=threshold, ratio=ratio, attack=attack, release=release)
+        self.assertEqual((new.sample_width, new.channels, new.frame_rate, len(new.raw_data)),
+                         (seg.sample_width, seg.channels, seg.frame_rate, len(seg.raw_data)))
+        original = segment_to_array(seg)
+        return windowed_gain_db(segment_to_array(ref), original), windowed_gain_db(segment_to_array(new), original)
+
+    def test_matches_pydub(self):
+        for threshold, ratio in ((-12.0, 2.5), (-18.0, 3.0), (-20.0, 4.0)):
+            with self.subTest(threshold=threshold, ratio=ratio):
+                g_ref, g_new = self.compare(threshold, ratio)
+                # 임계값 아래: 감쇠 없음
+                self.assertLessEqual(np.abs(g_new[ms(0, 450)]).max(), 0.05)
+                # 정상 상태 / 어택 구간: pydub 와 같은 게인
+                self.assertLessEqual(np.abs(g_ref[ms(600, 1150)] - g_new[ms(600, 1150)]).max(), 0.25)
+                self.assertLessEqual(np.abs(g_ref[ms(500, 600)] - g_new[ms(500, 600)]).max(), 1.0)
+                # 정상 상태 감쇠량 = (1 - 1/ratio) x 임계값 초과 dB
+                expected = (1 - 1 / ratio) * (20 * np.log10(0.8 / np.sqrt(2)) - threshold)
+                self.assertAlmostEqual(-np.median(g_new[ms(600, 1150)]), expected, delta=0.25)
+
+    def test_releases_below_threshold(self):
+        # pydub 는 감쇠를 유지하지만 여기서는 release 시간 안에 0 dB 로 복귀 (의도된 차이)
+        _, g_new = self.compare(-12.0, 2.5)
+        self.assertLessEqual(np.abs(g_new[ms(1300, 2000)]).max(), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
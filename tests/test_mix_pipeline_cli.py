@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""mix_pipeline CLI - --params JSON 과 CLI 옵션이 같은 키를 가질 때 CLI 가 우선하는지 확인"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+
+from mix_pipeline import build_params
+
+
+def cli_args(**overrides):
+    """main() 파서와 같은 필드를 가진 인자 (기본값 = 옵션 미지정)"""
+    values = dict(params=None, mode=None, vocal=None, mr=None, sfx=None, effect=None, preset=None,
+                  gain=None, fx=None, gpu=False, dolby=False, hifi=False, int8=False, file_handoff=False)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+class BuildParamsOverrideTest(unittest.TestCase):
+    def setUp(self):
+        # GUI 가 저장하는 JSON 처럼 모든 스템 / FX 키가 들어 있는 파라미터
+        saved = {"mode": "6-Stem",
+                 "pro_mixer": {"vocals": 1, "drums": -3, "bass": 0, "guitar": 0, "piano": 0, "other": 0},
+                 "pro_fx": {"vocal_air": True, "drum_punch": False, "bass_warmth": False, "stereo_wall": False}}
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_cli_gain_overrides_json_stem(self):
+        params = build_params(cli_args(params=self.path, gain=["drums=2"]))
+        self.assertEqual(params["pro_mixer"]["drums"], 2.0)
+        self.assertEqual(params["pro_mixer"]["vocals"], 1)
+
+    def test_cli_fx_overrides_json_flag(self):
+        params = build_params(cli_args(params=self.path, fx=["drum_punch"]))
+        self.assertTrue(params["pro_fx"]["drum_punch"])
+        self.assertTrue(params["pro_fx"]["vocal_air"])
+
+    def test_defaults_without_json(self):
+        params = build_params(cli_args(gain=["bass=-1.5"]))
+        self.assertEqual(params["pro_mixer"]["bass"], -1.5)
+        self.assertEqual(params["pro_mixer"]["other"], 0)
+        self.assertFalse(params["pro_fx"]["stereo_wall"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized Compressor - 마이크로벤치마크 + 수치 동등성 검사
+core/dynamics.compress_segment 와 pydub effects.compress_dynamic_range 를 비교합니다.
+(같은 동등성 기준은 tests/test_dynamics.py 단위 테스트로도 검사)
+
+사용법:
+    python utils/benchmark_compressor.py                 (동등성 검사 + 30초 스테레오 벤치마크)
+    python utils/benchmark_compressor.py --seconds 300   (5분 곡 기준 - pydub 쪽이 수 분 걸림)
+    python utils/benchmark_compressor.py --check-only
+
+동등성 기준 (10 ms 창 평균 게인, dB):
+- 임계값 아래: 두 구현 모두 0 dB
+- 임계값 위 정상 상태: 차이 0.25 dB 이하 (pydub 는 5 ms RMS 창의 최댓값 쪽, NumPy 는 평균 쪽으로 수렴)
+- 어택 구간: 차이 1 dB 이하
+- 릴리즈: pydub 는 임계값 아래에서 감쇠를 유지(풀지 않음), NumPy 는 release 시간 안에 0 dB 로 복귀 → 복귀 여부만 검사
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+from dynamics import compress_segment
+from stem_arrays import to_audio_segment
+from mix_bus import segment_to_array
+
+SR = 44100
+WINDOW = SR // 100  # 10 ms
+
+
+def windowed_gain_db(processed, original):
+    n = min(processed.shape[-1], original.shape[-1]) // WINDOW * WINDOW
+    def level(x):
+        return np.sqrt(np.mean(x[:, :n].astype(np.float64).reshape(x.shape[0], -1, WINDOW) ** 2, axis=(0, 2)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 20 * np.log10(level(processed) / level(original))
+
+
+def tone_burst(loud=0.8, quiet=0.1, seconds=2.0):
+    """quiet → (0.5~1.2초) loud → quiet 스테레오 사인파"""
+    t = np.arange(int(SR * seconds)) / SR
+    env = np.where((t >= 0.5) & (t < 1.2), loud, quiet)
+    return np.stack([np.sin(2 * np.pi * 220 * t) * env, np.sin(2 * np.pi * 330 * t) * env]).astype(np.float32)
+
+
+def check_equivalence(threshold=-12.0, ratio=2.5, attack=5.0, release=50.0):
+    from pydub import effects
+    x = tone_burst()
+    seg = to_audio_segment(x, SR)
+    ref = segment_to_array(effects.compress_dynamic_range(seg, threshold=threshold, ratio=ratio,
+                                                          attack=attack, release=release))
+    new = segment_to_array(compress_segment(seg, threshold=threshold, ratio=ratio, attack=attack, release=release))
+    original = segment_to_array(seg)
+    g_ref, g_new = windowed_gain_db(ref, original), windowed_gain_db(new, original)
+
+    ms = lambda a, b: slice(a // 10, b // 10)
+    results = {
+        "below threshold (0-450 ms)": (np.abs(g_new[ms(0, 450)]).max(), 0.05),
+        "steady state (600-1150 ms)": (np.abs(g_ref[ms(600, 1150)] - g_new[ms(600, 1150)]).max(), 0.25),
+        "attack (500-600 ms)": (np.abs(g_ref[ms(500, 600)] - g_new[ms(500, 600)]).max(), 1.0),
+        "released (1300-2000 ms)": (np.abs(g_new[ms(1300, 2000)]).max(), 0.05),
+    }
+    expected = (1 - 1 / ratio) * (20 * np.log10(0.8 / np.sqrt(2)) - threshold)
+    results["steady = (1-1/ratio) x over"] = (abs(-np.median(g_new[ms(600, 1150)]) - expected), 0.25)
+
+    ok = True
+    print(f"Equivalence (threshold={threshold}, ratio={ratio}, attack={attack}, release={release})")
+    for name, (err, limit) in results.items():
+        passed = err <= limit
+        ok &= passed
+        print(f"  {'PASS' if passed else 'FAIL'}  {name:<32} max |diff| {err:.3f} dB (limit {limit})")
+    return ok
+
+
+def benchmark(seconds, repeat):
+    from pydub import effects
+    rng = np.random.default_rng(0)
+    # 음악처럼 레벨이 변하는 노이즈 (0.25초 단위 엔벨로프)
+    frames = int(SR * seconds)
+    env = np.repeat(rng.uniform(0.05, 0.6, int(np.ceil(frames / (SR // 4)))), SR // 4)[:frames]
+    seg = to_audio_segment((rng.standard_normal((2, frames)) * 0.3 * env).clip(-1, 1).astype(np.float32), SR)
+
+    started = time.time()
+    effects.compress_dynamic_range(seg, threshold=-12.0, ratio=2.5)
+    pydub_sec = time.time() - started
+
+    times = []
+    for _ in range(repeat):
+        started = time.time()
+        compress_segment(seg, threshold=-12.0, ratio=2.5)
+        times.append(time.time() - started)
+    numpy_sec = min(times)
+    print(f"\nBenchmark ({seconds:.0f}s stereo @ {SR} Hz)")
+    print(f"  pydub compress_dynamic_range : {pydub_sec:8.3f} s")
+    print(f"  dynamics.compress_segment    : {numpy_sec:8.3f} s  ({pydub_sec / numpy_sec:.0f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized compressor benchmark / equivalence check")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check-only", action="store_true")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=RuntimeWarning, module="pydub")
+
+    ok = all([check_equivalence(-12.0, 2.5), check_equivalence(-18.0, 3.0), check_equivalence(-20.0, 4.0)])
+    if not args.check_only:
+        benchmark(args.seconds, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
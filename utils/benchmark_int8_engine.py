@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+INT8 CPU Engine - 품질/속도 리포트
+같은 파일들을 기본(float) 엔진과 int8 양자화 엔진으로 분리하고,
+float 결과를 기준으로 한 int8 스템의 SDR(dB)과 처리 시간을 비교합니다.
+
+사용법:
+    python utils/benchmark_int8_engine.py song1.wav song2.mp3 --model htdemucs_6s --shifts 1
+
+- 엔진마다 상주 서버 1개를 띄우고 cold(모델 로딩/양자화 포함) 1회 + warm 측정
+- int8 양자화 모델은 model_cache 폴더에 저장되어 두 번째 실행부터 바로 로딩됩니다.
+- --json 으로 결과 저장 (기본: output_result/benchmarks/int8_<시각>.json)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import soundfile as sf
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+from separation_worker import SeparationWorker
+from quantized_engine import ENGINE_FLOAT, ENGINE_INT8
+from benchmark_sharded_separation import server_cmd, time_runs, compare_stems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 CPU engine quality/speed report")
+    parser.add_argument("inputs", nargs="+", help="테스트할 오디오 파일들")
+    parser.add_argument("--model", default="htdemucs_6s")
+    parser.add_argument("--shifts", type=int, default=1)
+    parser.add_argument("--overlap", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=1, help="warm 측정 횟수")
+    parser.add_argument("--cache", default=os.path.join(ROOT_DIR, "model_cache"), help="int8 모델 캐시 폴더")
+    parser.add_argument("--json", default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="int8_bench_")
+    workers = {engine: SeparationWorker(server_cmd(), threads=os.cpu_count()) for engine in (ENGINE_FLOAT, ENGINE_INT8)}
+    rows = []
+    try:
+        for index, path in enumerate(args.inputs):
+            try:
+                duration = sf.info(path).duration
+            except Exception:
+                duration = None
+            row = {"file": path, "duration_sec": duration}
+            for engine, worker in workers.items():
+                out_dir = os.path.join(work, f"{index:02d}_{engine}")
+                options = {"engine": engine, "engine_cache": args.cache}
+                cold, warm = time_runs(lambda i: worker.separate(path, out_dir, args.model, device="cpu",
+                                                                 shifts=args.shifts, overlap=args.overlap,
+                                                                 options=options), args.repeat)
+                row[engine] = {"cold_sec": round(cold, 2), "warm_sec": round(warm, 2),
+                               "peak_mem_mb": (worker.last_stats or {}).get("peak_mem_mb")}
+            row["speedup"] = round(row[ENGINE_FLOAT]["warm_sec"] / row[ENGINE_INT8]["warm_sec"], 2)
+            row["sdr_vs_float"] = compare_stems(os.path.join(work, f"{index:02d}_{ENGINE_FLOAT}"),
+                                                os.path.join(work, f"{index:02d}_{ENGINE_INT8}"))
+            rows.append(row)
+    finally:
+        for worker in workers.values():
+            worker.close()
+        shutil.rmtree(work, ignore_errors=True)
+
+    print("\n" + "=" * 86)
+    print(f"{'file':<28}{'float(s)':>10}{'int8(s)':>10}{'speedup':>9}  SDR vs float (dB)")
+    print("=" * 86)
+    for row in rows:
+        sdr = ", ".join(f"{name} {q['sdr_db']:.1f}" for name, q in row["sdr_vs_float"].items())
+        print(f"{os.path.basename(row['file'])[:27]:<28}{row[ENGINE_FLOAT]['warm_sec']:>10}"
+              f"{row[ENGINE_INT8]['warm_sec']:>10}{row['speedup']:>9}  {sdr}")
+
+    json_path = args.json or os.path.join(ROOT_DIR, "output_result", "benchmarks",
+                                          f"int8_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"model": args.model, "shifts": args.shifts, "cores": os.cpu_count(), "results": rows},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\nSaved: {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+MIDI 변환 - 스템별 1회용 프로세스 vs 상주 서버 vs 배치 추론 벤치마크 + 동등성 검사
+convert_all_to_midi_request 의 기존 경로(스템마다 python core/midi_engine.py 실행)와
+상주 변환 서버(스템마다 작업 1개), 배치 엔트리(midi_engine.transcribe_batch, 스템 전체가 작업 1개)를 비교합니다.
+
+사용법:
+    python utils/benchmark_midi_batch.py                              (합성 6-스템 30초)
+    python utils/benchmark_midi_batch.py --seconds 60 --stems 6
+    python utils/benchmark_midi_batch.py 6S_vocals_song.wav 6S_bass_song.wav ...   (실제 스템 파일)
+    python utils/benchmark_midi_batch.py --skip-oneshot                  (1회용 프로세스 측정 생략)
+
+동등성 기준:
+- 배치 결과 MIDI 의 노트(시작/끝/음높이/세기)가 스템별 basic-pitch predict 결과와 완전히 같음
+- --json 으로 결과 저장
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+from transcription_worker import TranscriptionWorker
+
+ENGINE_PATH = os.path.join(ROOT_DIR, "core", "midi_engine.py")
+STEM_NAMES = ["vocals", "drums", "bass", "guitar", "piano", "other"]
+SR = 44100
+
+
+def synthetic_stems(work_dir, seconds, count, seed=0):
+    """스템마다 다른 음역의 0.5초 간격 톤 (무작위 음높이) WAV"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    paths = []
+    for index in range(count):
+        y = np.zeros_like(t)
+        base = 55 * 2 ** index
+        for n in range(int(seconds * 2)):
+            freq = base * 2 ** (rng.integers(0, 24) / 12)
+            mask = (t >= n * 0.5) & (t < n * 0.5 + 0.4)
+            y[mask] += 0.3 * np.sin(2 * np.pi * freq * t[mask])
+        path = os.path.join(work_dir, f"{STEM_NAMES[index % len(STEM_NAMES)]}_{index}.wav")
+        sf.write(path, y.astype(np.float32), SR)
+        paths.append(path)
+    return paths
+
+
+def midi_notes(path):
+    import pretty_midi
+    midi = pretty_midi.PrettyMIDI(path)
+    return sorted((n.start, n.end, n.pitch, n.velocity) for inst in midi.instruments for n in inst.notes)
+
+
+def run_oneshot(paths, out_dir):
+    """기존 경로: 스템마다 새 프로세스 (인터프리터 + TensorFlow + 모델 로딩 매번)"""
+    started = time.time()
+    for path in paths:
+        out = os.path.join(out_dir, os.path.basename(path) + ".mid")
+        subprocess.run([sys.executable, ENGINE_PATH, path, out], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+    return time.time() - started
+
+
+def run_server(worker, paths, out_dir):
+    """상주 서버: 스템마다 작업 1개 (모델은 한 번만 로딩)"""
+    started = time.time()
+    for path in paths:
+        worker.transcribe(path, os.path.join(out_dir, os.path.basename(path) + ".mid"))
+    return time.time() - started
+
+
+def run_batch(worker, paths, out_dir):
+    """배치: 스템 전체가 작업 1개 (창을 모아 추론 배치 공유)"""
+    started = time.time()
+    results = worker.transcribe_batch([(p, os.path.join(out_dir, os.path.basename(p) + ".mid")) for p in paths])
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        raise RuntimeError(f"batch errors: {errors}")
+    return time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched multi-stem MIDI transcription benchmark")
+    parser.add_argument("inputs", nargs="*", help="스템 오디오 파일 (없으면 합성 스템)")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--stems", type=int, default=6)
+    parser.add_argument("--skip-oneshot", action="store_true", help="스템별 1회용 프로세스 측정 생략")
+    parser.add_argument("--json", default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="midi_batch_bench_")
+    try:
+        paths = args.inputs or synthetic_stems(work, args.seconds, args.stems)
+        dirs = {name: os.path.join(work, name) for name in ("oneshot", "server", "batch")}
+        for d in dirs.values():
+            os.makedirs(d, exist_ok=True)
+
+        result = {"stems": len(paths), "files": paths}
+        if not args.skip_oneshot:
+            result["oneshot_sec"] = round(run_oneshot(paths, dirs["oneshot"]), 2)
+
+        # 서버 경로는 cold(서버 기동 + 모델 로딩 포함) 1회 후 warm 측정
+        worker = TranscriptionWorker([sys.executable, ENGINE_PATH, "--serve"])
+        try:
+            result["server_cold_sec"] = round(run_server(worker, paths, dirs["server"]), 2)
+            result["server_warm_sec"] = round(run_server(worker, paths, dirs["server"]), 2)
+            result["batch_warm_sec"] = round(run_batch(worker, paths, dirs["batch"]), 2)
+            result["batch_stats"] = worker.last_stats
+        finally:
+            worker.close()
+
+        # 동등성: 배치 결과 == 스템별 predict 결과 (서버 경로)
+        mismatched = [os.path.basename(p) for p in paths
+                      if midi_notes(os.path.join(dirs["batch"], os.path.basename(p) + ".mid"))
+                      != midi_notes(os.path.join(dirs["server"], os.path.basename(p) + ".mid"))]
+        result["identical_notes"] = not mismatched
+
+        print(f"\nMIDI transcription ({len(paths)} stems)")
+        for key in ("oneshot_sec", "server_cold_sec", "server_warm_sec", "batch_warm_sec"):
+            if key in result:
+                print(f"  {key:<18}{result[key]:>9.2f}s")
+        stats = result["batch_stats"] or {}
+        print(f"  batch: {stats.get('windows')} windows, batched={stats.get('batched')}, "
+              f"predict {stats.get('predict_sec')}s")
+        print(f"  {'PASS' if not mismatched else 'FAIL'}  batch notes identical to per-stem predict"
+              f"{'' if not mismatched else ' (' + ', '.join(mismatched) + ')'}")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        sys.exit(0 if not mismatched else 1)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+librosa 예비 경로 - piptrack → 노트 변환: 프레임 루프(기존) vs 배열 연산(piptrack_notes) 벤치마크 + 동등성 검사
+midi_engine.piptrack_notes 가 기존 프레임 루프와 노트 단위로 같은지 확인합니다.
+
+사용법:
+    python utils/benchmark_piptrack_notes.py                    (합성 멜로디 60초)
+    python utils/benchmark_piptrack_notes.py --seconds 300
+    python utils/benchmark_piptrack_notes.py song_piano.wav      (실제 오디오)
+
+동등성 기준:
+- (음높이, 시작, 끝) 목록이 기존 루프와 완전히 같음 (실제 piptrack 결과 + 무작위 유성/무성 패턴)
+- --json 으로 결과 저장
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+import librosa
+import midi_engine
+
+SR = 22050
+HOP_LENGTH = 512
+
+
+def loop_notes(pitches, magnitudes, frame_duration, total_duration):
+    """기존 구현: 프레임마다 argmax + hz_to_midi + 노트 상태 관리"""
+    notes = []
+    current_note = None
+    note_start = 0
+    for i in range(pitches.shape[1]):
+        index = magnitudes[:, i].argmax()
+        pitch_hz = pitches[index, i]
+        if pitch_hz > 0:
+            midi_note = int(librosa.hz_to_midi(pitch_hz))
+            if current_note is None:
+                current_note = midi_note
+                note_start = i * frame_duration
+            elif midi_note != current_note:
+                note_end = i * frame_duration
+                if note_end - note_start > 0.1:
+                    notes.append((current_note, note_start, note_end))
+                current_note = midi_note
+                note_start = i * frame_duration
+        else:
+            if current_note is not None:
+                note_end = i * frame_duration
+                if note_end - note_start > 0.1:
+                    notes.append((current_note, note_start, note_end))
+                current_note = None
+    if current_note is not None:
+        note_end = total_duration
+        if note_end - note_start > 0.1:
+            notes.append((current_note, note_start, note_end))
+    return notes
+
+
+def synthetic_melody(seconds, seed=0):
+    """길이가 제각각인 톤 + 쉼표 (짧은 노트로 최소 길이 필터도 확인)"""
+    rng = np.random.default_rng(seed)
+    y = np.zeros(int(seconds * SR), dtype=np.float32)
+    pos = 0
+    while pos < len(y):
+        length = int(rng.uniform(0.03, 0.6) * SR)
+        if rng.random() < 0.8:
+            freq = librosa.midi_to_hz(rng.integers(40, 90))
+            t = np.arange(min(length, len(y) - pos)) / SR
+            y[pos:pos + len(t)] = 0.3 * np.sin(2 * np.pi * freq * t)
+        pos += length
+    return y
+
+
+def random_piptrack(n_frames, seed=1):
+    """무작위 유성/무성 패턴 + 음높이 (경계 조건 확인용, 마지막 프레임까지 유성인 경우 포함)"""
+    rng = np.random.default_rng(seed)
+    magnitudes = rng.random((32, n_frames)).astype(np.float32)
+    pitches = np.zeros((32, n_frames), dtype=np.float32)
+    runs = np.repeat(rng.integers(0, 40, size=n_frames // 4 + 1), 4)[:n_frames]
+    hz = librosa.midi_to_hz(36 + runs).astype(np.float32)
+    hz[rng.random(n_frames) < 0.1] = 0
+    hz[-8:] = hz[-9]
+    pitches[magnitudes.argmax(axis=0), np.arange(n_frames)] = hz
+    return pitches, magnitudes
+
+
+def timed(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized piptrack-to-notes benchmark")
+    parser.add_argument("input", nargs="?", default=None, help="오디오 파일 (없으면 합성 멜로디)")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--json", default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    if args.input:
+        y, _ = librosa.load(args.input, sr=SR, mono=True)
+    else:
+        y = synthetic_melody(args.seconds)
+    pitches, magnitudes = librosa.piptrack(y=y, sr=SR, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
+    frame_duration = HOP_LENGTH / SR
+    total = len(y) / SR
+
+    reference, loop_sec = timed(loop_notes, pitches, magnitudes, frame_duration, total)
+    vectorized, vec_sec = timed(midi_engine.piptrack_notes, pitches, magnitudes, frame_duration, total)
+
+    rand_p, rand_m = random_piptrack(pitches.shape[1])
+    rand_total = rand_p.shape[1] * frame_duration + 0.05
+    random_ok = (loop_notes(rand_p, rand_m, frame_duration, rand_total)
+                 == midi_engine.piptrack_notes(rand_p, rand_m, frame_duration, rand_total))
+
+    identical = reference == vectorized and random_ok
+    result = {
+        "audio_sec": round(total, 1),
+        "frames": int(pitches.shape[1]),
+        "notes": len(reference),
+        "loop_sec": round(loop_sec, 4),
+        "vectorized_sec": round(vec_sec, 4),
+        "speedup": round(loop_sec / max(vec_sec, 1e-9), 1),
+        "identical_notes": identical,
+    }
+
+    print(f"\npiptrack → notes ({result['audio_sec']}s audio, {result['frames']} frames, {result['notes']} notes)")
+    print(f"  frame loop    {loop_sec * 1000:9.1f} ms")
+    print(f"  vectorized    {vec_sec * 1000:9.1f} ms   (x{result['speedup']})")
+    print(f"  {'PASS' if identical else 'FAIL'}  notes identical to frame loop (piptrack + random patterns)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Sharded CPU Separation - 벤치마크
+단일 프로세스 분리(현재 separate() 의 상주 서버 경로)와 샤드 분리(1~N 워커)의 wall-clock 시간을 비교합니다.
+
+사용법:
+    python utils/benchmark_sharded_separation.py song.wav --workers 1,2,4,8 --model htdemucs --shifts 1
+
+- 설정마다 서버를 새로 띄우고 cold(모델 로딩 포함) 1회 + warm N회 측정, warm 최솟값으로 비교
+- 결과 스템은 단일 프로세스 결과 대비 SDR(dB)/최대 오차로 품질 차이를 함께 표시
+- --json 으로 결과 저장 (기본: output_result/benchmarks/sharded_<시각>.json)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+from separation_worker import SeparationWorker
+from sharded_separator import ShardedSeparator, recommended_shard_workers
+
+
+def server_cmd():
+    return [sys.executable, os.path.join(ROOT_DIR, "core", "demucs_runner.py"), "--serve"]
+
+
+def time_runs(run, repeat):
+    """cold 1회 + warm repeat 회 실행, (cold 초, warm 최솟값 초)"""
+    started = time.time()
+    run(0)
+    cold = time.time() - started
+    warm = []
+    for i in range(repeat):
+        started = time.time()
+        run(i + 1)
+        warm.append(time.time() - started)
+    return cold, min(warm) if warm else cold
+
+
+def compare_stems(ref_dir, test_dir):
+    """스템별 (SDR dB, 최대 절대 오차)"""
+    result = {}
+    for name in sorted(os.listdir(ref_dir)):
+        if not name.endswith(".wav") or not os.path.exists(os.path.join(test_dir, name)):
+            continue
+        ref, _ = sf.read(os.path.join(ref_dir, name), dtype="float32")
+        test, _ = sf.read(os.path.join(test_dir, name), dtype="float32")
+        n = min(len(ref), len(test))
+        diff = ref[:n] - test[:n]
+        noise = float(np.sum(diff.astype(np.float64) ** 2))
+        signal = float(np.sum(ref[:n].astype(np.float64) ** 2))
+        sdr = 10 * np.log10(signal / noise) if noise > 0 else float("inf")
+        result[name[:-4]] = {"sdr_db": round(sdr, 2), "max_abs_err": round(float(np.abs(diff).max()), 6)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded CPU separation benchmark")
+    parser.add_argument("input", help="테스트할 오디오 파일 (30초 이상 권장)")
+    parser.add_argument("--model", default="htdemucs")
+    parser.add_argument("--workers", default=None, help="비교할 워커 수 목록 (예: 1,2,4,8)")
+    parser.add_argument("--shifts", type=int, default=1)
+    parser.add_argument("--overlap", type=float, default=0.25)
+    parser.add_argument("--two-stems", default=None)
+    parser.add_argument("--repeat", type=int, default=1, help="warm 측정 횟수")
+    parser.add_argument("--json", default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    else:
+        top = max(1, recommended_shard_workers())
+        worker_counts = sorted({1, *[2 ** i for i in range(1, 6) if 2 ** i <= top], top})
+
+    try:
+        duration = sf.info(args.input).duration
+    except Exception:
+        duration = None
+    work = tempfile.mkdtemp(prefix="shard_bench_")
+    rows = []
+    try:
+        # [기준] 단일 프로세스 (코어 전체 사용)
+        print(f"CPU cores: {cores}, input: {args.input}")
+        ref_dir = os.path.join(work, "single")
+        worker = SeparationWorker(server_cmd(), threads=cores)
+        try:
+            cold, warm = time_runs(lambda i: worker.separate(args.input, ref_dir, args.model, device="cpu",
+                                                             shifts=args.shifts, overlap=args.overlap,
+                                                             two_stems=args.two_stems), args.repeat)
+        finally:
+            worker.close()
+        rows.append({"mode": "single", "workers": 1, "threads_per_worker": cores,
+                     "cold_sec": round(cold, 2), "warm_sec": round(warm, 2), "speedup": 1.0})
+        baseline = warm
+
+        # [샤드] 워커 수별
+        for n in worker_counts:
+            out_dir = os.path.join(work, f"sharded_{n}")
+            sharded = ShardedSeparator(server_cmd(), workers=n, threads_per_worker=max(1, cores // n))
+            try:
+                cold, warm = time_runs(lambda i: sharded.separate(args.input, out_dir, args.model, shifts=args.shifts,
+                                                                  overlap=args.overlap, two_stems=args.two_stems,
+                                                                  work_dir=os.path.join(work, f"shard_work_{n}")),
+                                       args.repeat)
+                shards = sharded.last_stats.get("shards")
+            finally:
+                sharded.close()
+            rows.append({"mode": "sharded", "workers": n, "shards": shards, "threads_per_worker": max(1, cores // n),
+                         "cold_sec": round(cold, 2), "warm_sec": round(warm, 2),
+                         "speedup": round(baseline / warm, 2) if warm > 0 else None,
+                         "quality_vs_single": compare_stems(ref_dir, out_dir)})
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print("\n" + "=" * 78)
+    print(f"{'mode':<9}{'workers':>8}{'threads':>9}{'cold(s)':>10}{'warm(s)':>10}{'speedup':>9}{'RTF':>8}  min SDR")
+    print("=" * 78)
+    for row in rows:
+        rtf = f"{duration / row['warm_sec']:.2f}x" if duration and row["warm_sec"] else "-"
+        quality = row.get("quality_vs_single")
+        min_sdr = f"{min(q['sdr_db'] for q in quality.values()):.1f} dB" if quality else "-"
+        print(f"{row['mode']:<9}{row['workers']:>8}{row['threads_per_worker']:>9}{row['cold_sec']:>10}"
+              f"{row['warm_sec']:>10}{row['speedup']:>9}{rtf:>8}  {min_sdr}")
+
+    json_path = args.json or os.path.join(ROOT_DIR, "output_result", "benchmarks",
+                                          f"sharded_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"input": args.input, "model": args.model, "shifts": args.shifts, "cores": cores,
+                   "duration_sec": duration, "results": rows}, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved: {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Side-Chain Ducking - 선형 확장 벤치마크 + 동등성 검사
+core/dynamics.sidechain_segment (audio_merger 기본 경로) 와 기존 50ms 청크 루프를 비교합니다.
+
+사용법:
+    python utils/benchmark_sidechain.py                        (동등성 검사 + 3/10/60분 스테레오 벤치마크)
+    python utils/benchmark_sidechain.py --minutes 3 10         (길이 지정)
+    python utils/benchmark_sidechain.py --legacy-max 3         (청크 루프는 3분 이하에서만 - 누적 += 복사로 길이의 제곱에 비례)
+    python utils/benchmark_sidechain.py --check-only
+
+동등성 기준:
+- 프레임별 감쇠량(dB): 청크 루프의 vocal_chunk.dBFS 계산과 차이 0.001 dB 이하
+- 프레임 중심 샘플: 청크 루프 출력과 차이 2 LSB 이하 (프레임 사이는 계단 대신 선형 보간이므로 비교하지 않음)
+- 60분 입력에서 분당 처리 시간이 3분 입력의 2배 이하 (선형 확장)
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+from pydub import AudioSegment
+from dynamics import sidechain_segment, frame_rms_db, sidechain_reduction_db
+from audio_merger import _apply_sidechain_compression_chunks
+
+SR = 44100
+FRAME_MS = 50
+
+
+def synthetic_pair(seconds, seed=0):
+    """보컬(구간마다 레벨이 바뀌는 톤 + 쉼) / 반주(노이즈) 16-bit 스테레오 AudioSegment 쌍"""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * SR)
+    levels = rng.choice([0.0, 0.02, 0.1, 0.3, 0.6], size=-(-frames // (SR // 2)))
+    vocal = np.empty((frames, 2), dtype="<i2")
+    inst = np.empty((frames, 2), dtype="<i2")
+    block = SR * 60
+    for start in range(0, frames, block):
+        n = min(block, frames - start)
+        t = (start + np.arange(n)) / SR
+        env = np.repeat(levels, SR // 2)[start:start + n]
+        tone = (np.sin(2 * np.pi * 220 * t) * env * 32767).astype("<i2")
+        vocal[start:start + n] = tone[:, None]
+        inst[start:start + n] = rng.integers(-6000, 6000, size=(n, 2), dtype="<i2")
+    to_seg = lambda a: AudioSegment(data=a.tobytes(), sample_width=2, frame_rate=SR, channels=2)
+    return to_seg(vocal), to_seg(inst)
+
+
+def check_equivalence(seconds=10.0, threshold_db=-25.0, ratio=2.5):
+    vocal, inst = synthetic_pair(seconds)
+    ref = _apply_sidechain_compression_chunks(vocal, inst, threshold_db, ratio)
+    new = sidechain_segment(vocal, inst, threshold_db, ratio, max_reduction_db=6.0, frame_ms=FRAME_MS)
+
+    # 프레임별 감쇠량: 청크 루프와 같은 식
+    key = np.frombuffer(vocal.raw_data, dtype="<i2").reshape(-1, 2).T / 32768.0
+    level_db, frame = frame_rms_db(key, SR, FRAME_MS)
+    reduction = sidechain_reduction_db(level_db, threshold_db, ratio, 6.0)
+    legacy = []
+    for i in range(0, len(vocal), FRAME_MS):
+        db = vocal[i:i + FRAME_MS].dBFS
+        legacy.append(max((threshold_db - db) / ratio, -6.0) if db > threshold_db else 0.0)
+    n = min(len(legacy), len(reduction))
+    frame_err = float(np.abs(np.array(legacy[:n]) - reduction[:n]).max())
+
+    centers = np.arange(n) * frame + frame // 2
+    centers = centers[centers < len(inst.get_array_of_samples()) // 2]
+    r = np.frombuffer(ref.raw_data, dtype="<i2").reshape(-1, 2)[centers].astype(np.int32)
+    o = np.frombuffer(new.raw_data, dtype="<i2").reshape(-1, 2)[centers].astype(np.int32)
+    sample_err = int(np.abs(r - o).max())
+
+    ok = frame_err <= 0.001 and sample_err <= 2 and len(new) == len(inst)
+    print(f"Equivalence ({seconds:.0f}s, threshold={threshold_db}, ratio={ratio})")
+    print(f"  {'PASS' if frame_err <= 0.001 else 'FAIL'}  frame reduction max |diff| {frame_err:.4f} dB (limit 0.001)")
+    print(f"  {'PASS' if sample_err <= 2 else 'FAIL'}  frame-center samples max |diff| {sample_err} LSB (limit 2)")
+    return ok
+
+
+def benchmark(minutes_list, legacy_max, repeat):
+    print(f"\nBenchmark (stereo 16-bit @ {SR} Hz)")
+    print(f"{'minutes':>8}{'vectorized(s)':>16}{'s/min':>10}{'chunk loop(s)':>16}{'s/min':>10}")
+    per_minute = {}
+    for minutes in minutes_list:
+        vocal, inst = synthetic_pair(minutes * 60, seed=int(minutes))
+        times = []
+        for _ in range(repeat):
+            started = time.time()
+            sidechain_segment(vocal, inst, max_reduction_db=6.0, frame_ms=FRAME_MS)
+            times.append(time.time() - started)
+        best = min(times)
+        per_minute[minutes] = best / minutes
+        legacy = "-"
+        legacy_rate = "-"
+        if minutes <= legacy_max:
+            started = time.time()
+            _apply_sidechain_compression_chunks(vocal, inst)
+            elapsed = time.time() - started
+            legacy, legacy_rate = f"{elapsed:.2f}", f"{elapsed / minutes:.3f}"
+        print(f"{minutes:>8g}{best:>16.3f}{best / minutes:>10.4f}{legacy:>16}{legacy_rate:>10}")
+        del vocal, inst
+
+    if len(per_minute) > 1:
+        shortest, longest = min(per_minute), max(per_minute)
+        growth = per_minute[longest] / per_minute[shortest]
+        print(f"\nper-minute cost {longest:g} min / {shortest:g} min = {growth:.2f} (1.0 = perfectly linear)")
+        return growth <= 2.0
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Side-chain ducking benchmark / equivalence check")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[3, 10, 60])
+    parser.add_argument("--legacy-max", type=float, default=3.0, help="청크 루프를 실행할 최대 길이 (분)")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--check-only", action="store_true")
+    args = parser.parse_args()
+
+    ok = check_equivalence()
+    if not args.check_only:
+        ok &= benchmark(args.minutes, args.legacy_max, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
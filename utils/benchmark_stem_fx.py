@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Pro 6-Stem FX - 벤치마크
+스템 FX(Vocal Air / Drum Punch / Bass Warmth / Stereo Wall) + 합산 단계를 방식별로 비교합니다.
+
+사용법:
+    python utils/benchmark_stem_fx.py --stems output_result/곡/음원분리   (vocals.wav, drums.wav ... 또는 6S_<이름>_*.wav)
+    python utils/benchmark_stem_fx.py --synthetic 240                     (240초 랜덤 스템)
+
+- legacy   : 기존 process() 경로 (pydub 게인/컴프레서/로우패스 + 효과마다 ffmpeg 파이프 왕복 + overlay)
+- graph    : ffmpeg filter_complex 1회 (fx_graph)
+- pb-serial: Pedalboard 체인 스템 순차 처리 + NumPy 합산
+- pb-pool  : Pedalboard 체인 스템별 스레드 풀 동시 처리 + NumPy 합산 (현재 기본 경로)
+"""
+
+import os
+import io
+import sys
+import glob
+import time
+import argparse
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+from mix_bus import MixBus, segment_to_array
+from fx_graph import render_fx_graph, stem_fx_filters, VOCAL_AIR_AF, STEREO_WALL_AF
+from stem_fx import PEDALBOARD_AVAILABLE, apply_stem_fx
+from stem_arrays import to_audio_segment
+from subprocess_utils import hidden_startupinfo
+
+STEM_NAMES = ["vocals", "drums", "bass", "guitar", "piano", "other"]
+ALL_FX = {"vocal_air": True, "drum_punch": True, "bass_warmth": True, "stereo_wall": True}
+
+
+def load_stems(stem_dir):
+    arrays, samplerate = {}, None
+    for name in STEM_NAMES:
+        matches = glob.glob(os.path.join(stem_dir, f"{name}.wav")) or glob.glob(os.path.join(stem_dir, f"6S_{name}_*.wav"))
+        if matches:
+            data, samplerate = sf.read(matches[0], dtype="float32", always_2d=True)
+            arrays[name] = data.T
+    return arrays, samplerate
+
+
+def synthetic_stems(seconds, samplerate=44100):
+    rng = np.random.default_rng(0)
+    return {name: (rng.standard_normal((2, int(seconds * samplerate))) * 0.05).astype(np.float32)
+            for name in STEM_NAMES}, samplerate
+
+
+def new_bus(arrays, samplerate):
+    bus = MixBus(samplerate)
+    for name, array in arrays.items():
+        bus.add(name, array)
+    return bus
+
+
+def ffmpeg_roundtrip(segment, af, ffmpeg):
+    """기존 코드의 효과 1회 왕복 (export → pipe → from_wav)"""
+    from pydub import AudioSegment
+    raw = segment.export(format="wav").read()
+    proc = subprocess.Popen([ffmpeg, "-i", "pipe:0", "-af", af, "-f", "wav", "pipe:1"], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=hidden_startupinfo())
+    out, _ = proc.communicate(input=raw)
+    return AudioSegment.from_wav(io.BytesIO(out)) if proc.returncode == 0 else segment
+
+
+def run_legacy(arrays, samplerate, ffmpeg):
+    from pydub import effects
+    stems = {name: to_audio_segment(array, samplerate) for name, array in arrays.items()}
+    stems["vocals"] = ffmpeg_roundtrip(stems["vocals"], VOCAL_AIR_AF, ffmpeg)
+    stems["drums"] = effects.compress_dynamic_range(stems["drums"], threshold=-15, ratio=3.0, attack=5, release=100)
+    stems["bass"] = stems["bass"].low_pass_filter(500) + 2
+    for name in ("guitar", "piano"):
+        stems[name] = ffmpeg_roundtrip(stems[name], STEREO_WALL_AF, ffmpeg)
+    final = None
+    for segment in stems.values():
+        final = segment if final is None else final.overlay(segment)
+    return segment_to_array(final)
+
+
+def run_graph(arrays, samplerate, ffmpeg):
+    bus = new_bus(arrays, samplerate)
+    fx = stem_fx_filters(ALL_FX)
+    return render_fx_graph(bus.stack, samplerate, [fx.get(name) for name in bus.names], [None] * len(bus),
+                           None, ffmpeg=ffmpeg)
+
+
+def run_pedalboard(arrays, samplerate, workers):
+    bus = new_bus(arrays, samplerate)
+    apply_stem_fx(bus, ALL_FX, max_workers=workers)
+    return bus.mix()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pro 6-Stem FX benchmark")
+    parser.add_argument("--stems", default=None, help="스템 WAV 폴더")
+    parser.add_argument("--synthetic", type=float, default=60.0, help="--stems 가 없을 때 랜덤 스템 길이 (초)")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="pydub 경로 생략 (긴 곡에서 매우 느림)")
+    args = parser.parse_args()
+
+    arrays, samplerate = load_stems(args.stems) if args.stems else synthetic_stems(args.synthetic)
+    if not arrays:
+        sys.exit(f"스템을 찾을 수 없습니다: {args.stems}")
+    seconds = next(iter(arrays.values())).shape[-1] / samplerate
+    print(f"stems: {', '.join(arrays)} / {seconds:.1f}s @ {samplerate} Hz / cores: {os.cpu_count()}")
+
+    modes = []
+    if not args.skip_legacy:
+        modes.append(("legacy", lambda: run_legacy(arrays, samplerate, args.ffmpeg)))
+    modes.append(("graph", lambda: run_graph(arrays, samplerate, args.ffmpeg)))
+    if PEDALBOARD_AVAILABLE:
+        modes.append(("pb-serial", lambda: run_pedalboard(arrays, samplerate, 1)))
+        modes.append(("pb-pool", lambda: run_pedalboard(arrays, samplerate, None)))
+    else:
+        print("pedalboard 가 설치되어 있지 않아 Pedalboard 경로는 생략합니다 (pip install pedalboard)")
+
+    print("\n" + "=" * 44)
+    print(f"{'mode':<12}{'best(s)':>10}{'x realtime':>12}{'speedup':>10}")
+    print("=" * 44)
+    baseline = None
+    for name, run in modes:
+        times = []
+        for _ in range(1 if name == "legacy" else args.repeat):
+            started = time.time()
+            run()
+            times.append(time.time() - started)
+        best = min(times)
+        baseline = baseline or best
+        print(f"{name:<12}{best:>10.3f}{seconds / best:>12.1f}{baseline / best:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
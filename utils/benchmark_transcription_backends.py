@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+MIDI 변환 엔진 비교 벤치마크 - midi_engine.BACKENDS 에 등록된 모든 엔진을 같은 합성 신호로 측정
+정답 노트를 알고 있는 합성 신호(단선율 사인파 / 배음 + 감쇠 / 3화음)를 만들어
+엔진마다 별도 프로세스에서 변환한 뒤 속도·메모리·정확도를 표로 보여줍니다.
+
+사용법:
+    python utils/benchmark_transcription_backends.py                      (등록된 엔진 전체, 신호당 20초)
+    python utils/benchmark_transcription_backends.py --seconds 60
+    python utils/benchmark_transcription_backends.py --backends librosa
+    python utils/benchmark_transcription_backends.py --json backends.json
+
+측정 항목:
+- notes/s : 변환된 노트 수 / 변환 시간 (warm)
+- RTF     : 변환 시간 / 오디오 길이 (warm, 1 미만이면 실시간보다 빠름)
+- cold    : 프로세스 첫 변환 (모델 로딩 포함)
+- peak MB : 엔진 프로세스의 최대 메모리 (demucs_runner.peak_memory_mb)
+- onset F1 : 시작 시점 ±50ms 이내 일치 (음높이 무관)
+- note F1  : 시작 시점 ±50ms + 음높이 일치
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "core"))
+
+import midi_engine
+
+SR = 44100
+ONSET_TOLERANCE = 0.05
+
+
+def _tone(freq, length, harmonics, decay):
+    t = np.arange(length) / SR
+    y = sum((0.5 ** k) * np.sin(2 * np.pi * freq * (k + 1) * t) for k in range(harmonics))
+    return y * np.exp(-decay * t)
+
+
+def synthetic_signal(kind, seconds, seed=0):
+    """
+    정답 노트가 있는 합성 신호 → (오디오, [(음높이, 시작, 끝)])
+    mono_sine: 사인파 단선율, mono_harmonic: 배음 4개 + 감쇠 (피아노 유사), chords: 배음 3화음
+    """
+    rng = np.random.default_rng(seed)
+    y = np.zeros(int(seconds * SR))
+    notes = []
+    pos = 0.25
+    while pos + 0.5 < seconds:
+        duration = rng.uniform(0.25, 0.6)
+        root = int(rng.integers(45, 80))
+        pitches = [root, root + 4, root + 7] if kind == "chords" else [root]
+        harmonics, decay = (1, 0.0) if kind == "mono_sine" else (4, 2.5)
+        start, length = int(pos * SR), int(duration * SR)
+        for pitch in pitches:
+            freq = 440.0 * 2 ** ((pitch - 69) / 12)
+            y[start:start + length] += 0.25 * _tone(freq, length, harmonics, decay)
+            notes.append((pitch, round(pos, 4), round(pos + duration, 4)))
+        pos += duration + rng.uniform(0.05, 0.3)
+    return (y / max(1.0, np.abs(y).max())).astype(np.float32), notes
+
+
+def midi_notes(path):
+    import pretty_midi
+    midi = pretty_midi.PrettyMIDI(path)
+    return [(n.pitch, n.start, n.end) for inst in midi.instruments for n in inst.notes]
+
+
+def _match(reference, estimated, use_pitch):
+    """시작 시점이 가까운 순서로 1:1 매칭 (use_pitch 면 음높이도 같아야 함) → 매칭 수"""
+    pairs = sorted((abs(r[1] - e[1]), i, j) for i, r in enumerate(reference) for j, e in enumerate(estimated)
+                   if abs(r[1] - e[1]) <= ONSET_TOLERANCE and (not use_pitch or r[0] == e[0]))
+    used_ref, used_est = set(), set()
+    for _, i, j in pairs:
+        if i not in used_ref and j not in used_est:
+            used_ref.add(i)
+            used_est.add(j)
+    return len(used_ref)
+
+
+def _f1(matched, n_ref, n_est):
+    precision = matched / n_est if n_est else 0.0
+    recall = matched / n_ref if n_ref else 0.0
+    return round(2 * precision * recall / (precision + recall), 3) if matched else 0.0
+
+
+def accuracy(reference, estimated):
+    onset = _match(reference, estimated, use_pitch=False)
+    note = _match(reference, estimated, use_pitch=True)
+    return {"onset_f1": _f1(onset, len(reference), len(estimated)),
+            "note_f1": _f1(note, len(reference), len(estimated)),
+            "pitch_acc": round(note / onset, 3) if onset else 0.0}
+
+
+def run_child(channel, backend, inputs, out_dir):
+    """엔진 1개를 이 프로세스에서 실행 (첫 신호는 cold + warm 두 번) → JSON 한 줄"""
+    from demucs_runner import peak_memory_mb
+    results = []
+    for index, path in enumerate(inputs):
+        output = os.path.join(out_dir, f"{backend}_{os.path.basename(path)}.mid")
+        cold_sec = None
+        if index == 0:
+            started = time.time()
+            midi_engine.transcribe(path, output, backend=backend)
+            cold_sec = time.time() - started
+        started = time.time()
+        stats = midi_engine.transcribe(path, output, backend=backend)
+        results.append({"input": path, "output": output, "cold_sec": cold_sec,
+                        "warm_sec": time.time() - started, "stats": stats})
+    channel.write(json.dumps({"results": results, "peak_mb": peak_memory_mb()}) + "\n")
+
+
+def benchmark_backend(backend, signals, work_dir):
+    """엔진 1개를 별도 프로세스에서 측정 (메모리 최대치가 다른 엔진과 섞이지 않도록)"""
+    inputs = [path for _, path, _, _ in signals]
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", backend, "--out-dir", work_dir] + inputs
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"backend": backend, "error": (proc.stderr.strip().splitlines() or ["unknown error"])[-1]}
+
+    child = json.loads(lines[-1])
+    rows = []
+    for (kind, _, duration, reference), result in zip(signals, child["results"]):
+        estimated = midi_notes(result["output"])
+        warm = max(result["warm_sec"], 1e-6)
+        row = {"signal": kind, "notes": len(estimated), "ref_notes": len(reference),
+               "notes_per_sec": round(len(estimated) / warm, 1), "rtf": round(warm / duration, 4),
+               "warm_sec": round(warm, 3)}
+        if result["cold_sec"] is not None:
+            row["cold_sec"] = round(result["cold_sec"], 3)
+        row.update(accuracy(reference, estimated))
+        rows.append(row)
+    return {"backend": backend, "peak_mb": child["peak_mb"], "signals": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription backend benchmark")
+    parser.add_argument("--seconds", type=float, default=20.0, help="합성 신호 길이 (신호당)")
+    parser.add_argument("--backends", nargs="*", default=None, help="측정할 엔진 (기본: 설치된 전체)")
+    parser.add_argument("--json", default=None, help="결과 JSON 경로")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out-dir", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("inputs", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # 엔진 로그는 stderr 로 돌리고 stdout 은 결과 JSON 전용
+        channel, sys.stdout = sys.stdout, sys.stderr
+        run_child(channel, args.child, args.inputs, args.out_dir)
+        return
+
+    backends = args.backends or midi_engine.available_backends()
+    missing = [b for b in backends if b not in midi_engine.BACKENDS]
+    if missing:
+        sys.exit(f"Unknown backend(s): {', '.join(missing)} (registered: {', '.join(midi_engine.BACKENDS)})")
+
+    work = tempfile.mkdtemp(prefix="transcription_bench_")
+    try:
+        signals = []
+        for index, kind in enumerate(("mono_sine", "mono_harmonic", "chords")):
+            audio, reference = synthetic_signal(kind, args.seconds, seed=index)
+            path = os.path.join(work, f"{kind}.wav")
+            sf.write(path, audio, SR)
+            signals.append((kind, path, len(audio) / SR, reference))
+
+        report = [benchmark_backend(backend, signals, work) for backend in backends]
+
+        print(f"\nTranscription backends ({args.seconds:.0f}s per signal, onset tolerance ±{ONSET_TOLERANCE * 1000:.0f}ms)")
+        print(f"  {'backend':<12}{'signal':<15}{'notes':>7}{'notes/s':>10}{'RTF':>8}{'cold':>8}"
+              f"{'peak MB':>9}{'onset F1':>10}{'note F1':>9}{'pitch':>7}")
+        for entry in report:
+            if "error" in entry:
+                print(f"  {entry['backend']:<12}ERROR {entry['error']}")
+                continue
+            for row in entry["signals"]:
+                cold = f"{row['cold_sec']:.2f}" if "cold_sec" in row else ""
+                peak = f"{entry['peak_mb']:.0f}" if entry["peak_mb"] is not None else "-"
+                print(f"  {entry['backend']:<12}{row['signal']:<15}{row['notes']:>4}/{row['ref_notes']:<3}"
+                      f"{row['notes_per_sec']:>9.1f}{row['rtf']:>8.3f}{cold:>8}{peak:>9}"
+                      f"{row['onset_f1']:>10.3f}{row['note_f1']:>9.3f}{row['pitch_acc']:>7.2f}")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"seconds": args.seconds, "backends": report}, f, ensure_ascii=False, indent=2)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()